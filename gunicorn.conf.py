@@ -0,0 +1,18 @@
+"""
+Gunicorn config, SERVER_MODE environment variable switches between
+wsgi: sync workers serving pigeon_app.wsgi, one request per worker at a time
+asgi: uvicorn workers serving pigeon_app.asgi, read views wait for database in thread pool (requires uvicorn)
+"""
+import os
+
+server_mode = os.environ.get('SERVER_MODE', 'wsgi')
+
+if server_mode == 'asgi':
+    wsgi_app = 'pigeon_app.asgi:application'
+    worker_class = 'pigeon_app.workers.AutoUvicornWorker'
+else:
+    wsgi_app = 'pigeon_app.wsgi:application'
+    worker_class = 'sync'
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class PigeonConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'pigeon'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from pigeon import signals  # noqa: F401
+        from pigeon.instrumentation import timings
+        # jobs register themselves on import
+        from pigeon.auth import jobs as auth_jobs  # noqa: F401
+        from pigeon.blog.images import jobs as image_jobs  # noqa: F401
+        connection_created.connect(timings.add_query_recorder)
@@ -0,0 +1,12 @@
+from django.core.mail import EmailMessage
+
+from pigeon.jobs.registry import job
+
+
+@job('send_email', max_attempts=8)
+def send_email(payload: dict):
+    """
+    Send email, SMTP errors are retried by worker
+    :param payload: dict in format {'subject': str, 'body': str, 'to': [str]}
+    """
+    EmailMessage(subject=payload['subject'], body=payload['body'], to=payload['to']).send()
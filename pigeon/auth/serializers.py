@@ -5,8 +5,10 @@ from rest_framework_simplejwt.tokens import RefreshToken
 
 from django.contrib.auth.hashers import make_password
 
+from pigeon.instrumentation.serializers import TimedSerializerMixin
 
-class UserSerializer(serializers.ModelSerializer):
+
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     email = serializers.EmailField()
     """
     Serializer for User class
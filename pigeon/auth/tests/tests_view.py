@@ -4,10 +4,12 @@ from unittest import mock
 
 import jwt
 from django.contrib.auth.models import User
-from django.test import TestCase
+from django.core import mail
+from django.test import TestCase, override_settings
 from rest_framework.reverse import reverse
 
 from pigeon.auth.serializers import UserSerializer
+from pigeon.models import Job
 
 
 class TestLoginView(TestCase):
@@ -75,6 +77,22 @@ class TestRegisterView(TestCase):
         # then
         self.assertEqual(response.status_code, 201)
 
+    def test_should_send_verification_email(self):
+        # when
+        self.client.post(self.register_url, data=self.data, content_type="application/json")
+        # then
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['email@email.com'])
+
+    @override_settings(JOBS_EAGER=False)
+    def test_should_queue_verification_email_instead_of_sending_it(self):
+        # when
+        response = self.client.post(self.register_url, data=self.data, content_type="application/json")
+        # then
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(Job.objects.get().name, 'send_email')
+
     def test_should_throw_400_when_empty_username(self):
         # given
         data = {
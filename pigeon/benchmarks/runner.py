@@ -0,0 +1,124 @@
+import math
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client, override_settings
+
+from pigeon.benchmarks.scenarios import Scenario
+from pigeon.instrumentation.timings import RequestTimings, current_timings
+
+
+def benchmark_settings():
+    """
+    Settings of in process benchmarks: test client host allowed, emails and images left in queue,
+    instrumentation middleware off as runner records timings itself
+    """
+    return override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'], JOBS_EAGER=False,
+                             SERVER_TIMING_ENABLED=False, METRICS_ENABLED=False, PROFILE_SAMPLE_RATE=0)
+
+
+def percentile(values: list, share: float) -> float:
+    """
+    Nearest rank percentile
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(share * len(ordered)) - 1)]
+
+
+class Sample:
+    def __init__(self, status: int, seconds: float, timings: RequestTimings):
+        self.status = status
+        self.seconds = seconds
+        self.queries = timings.queries
+        self.db_seconds = timings.seconds['db']
+
+
+class Runner:
+    """
+    Run scenario through request handler in process, from concurrency threads with own database connections
+    """
+
+    def __init__(self, requests: int = 200, concurrency: int = 8, warmup: int = 20, seed: int = 0):
+        self.requests = requests
+        self.concurrency = concurrency
+        self.warmup = warmup
+        self.seed = seed
+
+    def measure(self, scenario: Scenario, client: Client, user_id: int, rng: random.Random) -> Sample:
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        started_at = time.perf_counter()
+        try:
+            response = scenario.request(client, user_id, rng)
+        finally:
+            current_timings.reset(token)
+        return Sample(response.status_code, time.perf_counter() - started_at, timings)
+
+    def work(self, scenario: Scenario, index: int, count: int) -> List[Sample]:
+        rng = random.Random(self.seed * 1000 + index)
+        users = scenario.data.get_users(rng)
+        samples = []
+        try:
+            for _ in range(count):
+                user_id = None if scenario.anonymous else users.choose()[0]
+                headers = {} if user_id is None else {'HTTP_AUTHORIZATION': f'Bearer {scenario.data.tokens[user_id]}'}
+                # errors of views are counted as 500 responses instead of stopping run
+                client = Client(raise_request_exception=False, **headers)
+                samples.append(self.measure(scenario, client, user_id, rng))
+        finally:
+            connection.close()
+        return samples
+
+    def run(self, scenario: Scenario) -> dict:
+        """
+        :return: latency percentiles in milliseconds, queries per request and throughput of scenario
+        """
+        with benchmark_settings():
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                # warmup runs in other thread too, work closes database connection of its thread
+                executor.submit(self.work, scenario, -1, self.warmup).result()
+            shares = [self.requests // self.concurrency + (i < self.requests % self.concurrency)
+                      for i in range(self.concurrency)]
+            started_at = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                results = executor.map(lambda args: self.work(scenario, *args), enumerate(shares))
+                samples = [sample for result in results for sample in result]
+            elapsed = time.perf_counter() - started_at
+        latencies = [sample.seconds * 1000 for sample in samples]
+        queries = [sample.queries for sample in samples]
+        return {
+            'requests': len(samples),
+            'errors': sum(sample.status >= 400 for sample in samples),
+            'throughput_rps': round(len(samples) / elapsed, 2) if elapsed else 0.0,
+            'latency_ms': {'p50': round(percentile(latencies, 0.5), 2), 'p95': round(percentile(latencies, 0.95), 2),
+                           'p99': round(percentile(latencies, 0.99), 2),
+                           'mean': round(sum(latencies) / len(latencies), 2) if latencies else 0.0},
+            'queries_per_request': {'mean': round(sum(queries) / len(queries), 2) if queries else 0.0,
+                                    'max': max(queries, default=0)},
+            'db_ms_p50': round(percentile([sample.db_seconds * 1000 for sample in samples], 0.5), 2),
+        }
+
+
+def compare(baseline: dict, current: dict, max_regression: float) -> List[str]:
+    """
+    Compare results of two runs
+    :param max_regression: allowed growth of p95 latency and mean queries per request, in percent
+    :return: descriptions of regressions
+    """
+    regressions = []
+    for name, result in current['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if previous is None:
+            continue
+        for label, before, after in (('p95 latency', previous['latency_ms']['p95'], result['latency_ms']['p95']),
+                                     ('queries per request', previous['queries_per_request']['mean'],
+                                      result['queries_per_request']['mean'])):
+            if after > before * (1 + max_regression / 100) and after - before > 0.01:
+                regressions.append(f'{name}: {label} {before} -> {after}')
+    return regressions
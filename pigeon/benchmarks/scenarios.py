@@ -0,0 +1,120 @@
+import random
+import uuid
+from collections import defaultdict
+
+from django.contrib.auth.models import User
+from django.http import HttpResponse
+from django.test import Client
+from rest_framework_simplejwt.tokens import AccessToken
+
+from pigeon.benchmarks.seed import ZipfChooser
+from pigeon.models import Channel, Post
+
+
+class BenchmarkData:
+    """
+    Users making requests and objects scenarios request, loaded once before run.
+    Users are taken in order of ids, seeded users are ranked by activity in that order
+    """
+
+    def __init__(self, users: int = 1000, skew: float = 1.1):
+        self.user_ids = list(User.objects.filter(is_active=True).order_by('id').values_list('id', flat=True)[:users])
+        self.skew = skew
+        self.channel_ids = defaultdict(list)
+        for channel_id, user_id in Channel.channel_access.through.objects.filter(user_id__in=self.user_ids) \
+                .values_list('channel_id', 'user_id'):
+            self.channel_ids[user_id].append(channel_id)
+        self.liked_post_ids = list(Post.objects.order_by('-likes_count').values_list('id', flat=True)[:20])
+        self.commented_post_ids = list(Post.objects.order_by('-comments_count').values_list('id', flat=True)[:20])
+        self.tokens = {user_id: str(AccessToken.for_user(User(id=user_id))) for user_id in self.user_ids}
+
+    def get_users(self, rng: random.Random) -> ZipfChooser:
+        return ZipfChooser(self.user_ids, self.skew, rng)
+
+
+class Scenario:
+    """
+    Kind of request made by random user, authenticated unless scenario is anonymous
+    """
+    name = None
+    anonymous = False
+
+    def __init__(self, data: BenchmarkData):
+        self.data = data
+
+    def is_ready(self) -> bool:
+        return bool(self.data.user_ids)
+
+    def request(self, client: Client, user_id: int, rng: random.Random) -> HttpResponse:
+        raise NotImplementedError
+
+
+class FeedRead(Scenario):
+    name = 'feed_read'
+
+    def request(self, client, user_id, rng):
+        channel_ids = self.data.channel_ids[user_id]
+        if channel_ids:
+            return client.get('/posts/', {'channel': rng.choice(channel_ids), 'pagination': 'cursor'})
+        return client.get('/posts/')
+
+
+class TimelineRead(Scenario):
+    name = 'timeline'
+
+    def request(self, client, user_id, rng):
+        return client.get('/timeline/')
+
+
+class ChannelList(Scenario):
+    name = 'channel_list'
+
+    def request(self, client, user_id, rng):
+        return client.get('/channels/')
+
+
+class LikeStorm(Scenario):
+    """
+    Many users toggling likes of few hottest posts, contention on counters of same rows
+    """
+    name = 'like_storm'
+
+    def is_ready(self):
+        return super().is_ready() and bool(self.data.liked_post_ids)
+
+    def request(self, client, user_id, rng):
+        return client.post(f'/posts/{rng.choice(self.data.liked_post_ids[:5])}/like/')
+
+
+class CommentThread(Scenario):
+    """
+    Reading comments of most commented posts, every fifth request adds comment
+    """
+    name = 'comment_thread'
+
+    def is_ready(self):
+        return super().is_ready() and bool(self.data.commented_post_ids)
+
+    def request(self, client, user_id, rng):
+        post_id = rng.choice(self.data.commented_post_ids)
+        if rng.random() < 0.2:
+            return client.post(f'/posts/{post_id}/comments/', {'body': 'benchmark comment'},
+                               content_type='application/json')
+        return client.get(f'/posts/{post_id}/comments/')
+
+
+class Registration(Scenario):
+    name = 'registration'
+    anonymous = True
+
+    def is_ready(self):
+        return True
+
+    def request(self, client, user_id, rng):
+        name = f'benchmark_{uuid.uuid4().hex[:16]}'
+        return client.post('/auth/register/', {'username': name, 'email': f'{name}@pigeon.app',
+                                               'password': 'benchmark-password'}, content_type='application/json')
+
+
+SCENARIOS = {scenario.name: scenario for scenario in
+             (FeedRead, TimelineRead, ChannelList, LikeStorm, CommentThread, Registration)}
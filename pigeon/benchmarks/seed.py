@@ -0,0 +1,179 @@
+import itertools
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Callable, List, Optional
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from pigeon.models import Channel, Comment, Like, Post, Tag
+
+
+@contextmanager
+def disable_auto_now_add(*models):
+    """
+    Let bulk_create keep generated created_at instead of time of insert
+    """
+    fields = [model._meta.get_field('created_at') for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class ZipfChooser:
+    """
+    Random choice of population where k-th item is chosen with probability proportional to 1 / k ** skew,
+    so first items are popular and long tail is rarely chosen
+    """
+
+    def __init__(self, population: list, skew: float, rng: random.Random):
+        self.population = population
+        self.cum_weights = list(itertools.accumulate(1 / (rank + 1) ** skew for rank in range(len(population))))
+        self.rng = rng
+
+    def choose(self, count: int = 1) -> list:
+        return self.rng.choices(self.population, cum_weights=self.cum_weights, k=count)
+
+    def choose_unique(self, count: int) -> set:
+        return set(self.choose(min(count, len(self.population))))
+
+
+class Seeder:
+    """
+    Synthetic data set with skew of real social apps: memberships of channels, authors of posts
+    and likes and comments of posts follow Zipf law, numbers of channels per user and comments per post
+    follow Pareto distribution. Data is generated from seed, so same options give same data set
+    """
+    global_share = 0.2
+    private_share = 0.1
+    max_tags_per_post = 3
+
+    def __init__(self, users: int, channels: int, posts: int, tags: int, memberships_per_user: float = 5,
+                 comments_per_post: float = 3, likes_per_post: float = 5, skew: float = 1.1, days: int = 365,
+                 batch_size: int = 10_000, seed: int = 0, log: Optional[Callable[[str], None]] = None):
+        self.users = users
+        self.channels = channels
+        self.posts = posts
+        self.tags = tags
+        self.memberships_per_user = memberships_per_user
+        self.comments_per_post = comments_per_post
+        self.likes_per_post = likes_per_post
+        self.skew = skew
+        self.days = days
+        self.batch_size = batch_size
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.log = log or (lambda message: None)
+
+    def pareto_count(self, mean: float, limit: int) -> int:
+        # Pareto distribution with alpha 1.5 and minimum 1 has mean 3
+        return min(limit, int(mean * self.rng.paretovariate(1.5) / 3))
+
+    def bulk_insert(self, model, objects: list) -> List[int]:
+        """
+        Insert objects, return their ids in order, read back from database which can not return them (SQLite)
+        """
+        if connection.features.can_return_rows_from_bulk_insert:
+            model.objects.bulk_create(objects, batch_size=self.batch_size)
+            return [instance.pk for instance in objects]
+        last_id = model.objects.aggregate(last_id=Max('id'))['last_id'] or 0
+        model.objects.bulk_create(objects, batch_size=self.batch_size)
+        ids = list(model.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True))
+        for instance, instance_id in zip(objects, ids):
+            instance.pk = instance_id
+        return ids
+
+    def run(self) -> dict:
+        """
+        :return: number of created rows by model
+        """
+        password = make_password('benchmark')
+        prefix = f'seed{self.seed}'
+        user_ids = []
+        for start in range(0, self.users, self.batch_size):
+            user_ids += self.bulk_insert(User, [User(username=f'{prefix}_{i}', email=f'{prefix}_{i}@pigeon.app',
+                                                     password=password)
+                                                for i in range(start, min(start + self.batch_size, self.users))])
+        self.log(f'Seeded {len(user_ids)} users')
+        users = ZipfChooser(user_ids, self.skew, self.rng)
+        channel_ids = self.bulk_insert(Channel, [
+            Channel(name=f'{prefix} channel {i}', is_private=self.rng.random() < self.private_share,
+                    owner_id=users.choose()[0]) for i in range(self.channels)])
+        channels = ZipfChooser(channel_ids, self.skew, self.rng)
+        memberships = self.seed_memberships(user_ids, channels)
+        self.log(f'Seeded {len(channel_ids)} channels with {memberships} memberships')
+        tag_ids = self.bulk_insert(Tag, [Tag(name=f'{prefix}_tag_{i}') for i in range(self.tags)])
+        tags = ZipfChooser(tag_ids, self.skew, self.rng)
+        counts = self.seed_posts(users, channels, tags)
+        with transaction.atomic():
+            Post.objects.rebuild_counters()
+            Channel.objects.rebuild_counters()
+            Tag.objects.rebuild_counters()
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+        return {'users': len(user_ids), 'channels': len(channel_ids), 'memberships': memberships,
+                'tags': len(tag_ids), **counts}
+
+    def seed_memberships(self, user_ids: list, channels: ZipfChooser) -> int:
+        through = Channel.channel_access.through
+        count = 0
+        batch = []
+        for user_id in user_ids:
+            for channel_id in channels.choose_unique(self.pareto_count(self.memberships_per_user, self.channels)):
+                batch.append(through(channel_id=channel_id, user_id=user_id))
+            if len(batch) >= self.batch_size:
+                through.objects.bulk_create(batch, ignore_conflicts=True)
+                count += len(batch)
+                batch = []
+        through.objects.bulk_create(batch, ignore_conflicts=True)
+        return count + len(batch)
+
+    def seed_posts(self, users: ZipfChooser, channels: ZipfChooser, tags: ZipfChooser) -> dict:
+        """
+        Posts are created in order of created_at spread over last days, comments come after their post
+        """
+        start = timezone.now() - timedelta(days=self.days)
+        step = timedelta(days=self.days) / max(1, self.posts)
+        counts = {'posts': 0, 'comments': 0, 'likes': 0, 'tagged': 0}
+        tag_through = Tag.post.through
+        with disable_auto_now_add(Post, Comment):
+            for batch_start in range(0, self.posts, self.batch_size):
+                batch_end = min(batch_start + self.batch_size, self.posts)
+                created_at = [start + step * i for i in range(batch_start, batch_end)]
+                posts = [Post(title=f'post {i}', body='lorem ipsum dolor sit amet ' * self.rng.randint(1, 20),
+                              author_id=users.choose()[0], created_at=created_at[i - batch_start],
+                              channel_id=None if self.rng.random() < self.global_share else channels.choose()[0])
+                         for i in range(batch_start, batch_end)]
+                post_ids = self.bulk_insert(Post, posts)
+                # popularity of post is its rank in random order, so hot posts are spread over time
+                hot = ZipfChooser(post_ids, self.skew, self.rng)
+                comments, likes, links = [], set(), set()
+                for post in posts:
+                    for _ in range(self.pareto_count(self.comments_per_post, 1000)):
+                        comments.append(Comment(post_id=post.id, user_id=users.choose()[0], body='nice post',
+                                                created_at=post.created_at + step * self.rng.random()))
+                    links.update((tag_id, post.id) for tag_id in tags.choose_unique(
+                        self.rng.randint(0, self.max_tags_per_post)))
+                for post_id in hot.choose(int(self.likes_per_post * len(posts))):
+                    likes.add((users.choose()[0], post_id))
+                Comment.objects.bulk_create(comments, batch_size=self.batch_size)
+                Like.objects.bulk_create([Like(user_id=user_id, post_id=post_id) for user_id, post_id in likes],
+                                         batch_size=self.batch_size, ignore_conflicts=True)
+                tag_through.objects.bulk_create([tag_through(tag_id=tag_id, post_id=post_id)
+                                                 for tag_id, post_id in links],
+                                                batch_size=self.batch_size, ignore_conflicts=True)
+                counts['posts'] += len(posts)
+                counts['comments'] += len(comments)
+                counts['likes'] += len(likes)
+                counts['tagged'] += len(links)
+                self.log(f'Seeded {batch_end} posts')
+        return counts
@@ -0,0 +1,64 @@
+from datetime import timedelta
+
+from django.db.models import Count
+from django.test import SimpleTestCase, TransactionTestCase
+
+from pigeon.benchmarks.runner import Runner, compare, percentile
+from pigeon.benchmarks.scenarios import BenchmarkData, FeedRead, Registration
+from pigeon.benchmarks.seed import Seeder
+from pigeon.models import Channel, Post
+
+
+class TestSeeder(TransactionTestCase):
+    def test_should_seed_skewed_data_with_counters(self):
+        # given
+        seeder = Seeder(users=50, channels=10, posts=300, tags=20, batch_size=100)
+        # when
+        counts = seeder.run()
+        # then
+        self.assertEqual(counts['posts'], 300)
+        self.assertEqual(Post.objects.count(), 300)
+        members = list(Channel.objects.annotate(members=Count('channel_access')).order_by('id')
+                       .values_list('members', flat=True))
+        self.assertGreater(members[0], members[-1])
+        channel = Channel.objects.order_by('id').first()
+        self.assertEqual(channel.posts_count, Post.objects.filter(channel=channel).count())
+        first, last = Post.objects.order_by('id').first(), Post.objects.order_by('id').last()
+        self.assertGreater(last.created_at - first.created_at, timedelta(days=seeder.days / 2))
+
+class TestRunner(TransactionTestCase):
+    def setUp(self) -> None:
+        Seeder(users=20, channels=3, posts=50, tags=5, batch_size=100).run()
+
+    def test_should_report_latency_and_queries_of_scenario(self):
+        # given
+        runner = Runner(requests=6, concurrency=2, warmup=1)
+        # when
+        result = runner.run(FeedRead(BenchmarkData(users=10)))
+        # then
+        self.assertEqual(result['requests'], 6)
+        self.assertEqual(result['errors'], 0)
+        self.assertGreater(result['queries_per_request']['mean'], 0)
+        self.assertLessEqual(result['latency_ms']['p50'], result['latency_ms']['p99'])
+
+    def test_should_register_anonymous_users(self):
+        # when
+        result = Runner(requests=2, concurrency=1, warmup=0).run(Registration(BenchmarkData(users=10)))
+        # then
+        self.assertEqual(result['errors'], 0)
+
+
+class TestCompare(SimpleTestCase):
+    def make_result(self, p95: float, queries: float) -> dict:
+        return {'scenarios': {'feed_read': {'latency_ms': {'p95': p95}, 'queries_per_request': {'mean': queries}}}}
+
+    def test_should_report_regression_above_threshold(self):
+        # when
+        regressions = compare(self.make_result(100, 5), self.make_result(105, 7), max_regression=10)
+        # then
+        self.assertEqual(regressions, ['feed_read: queries per request 5 -> 7'])
+
+    def test_should_take_nearest_rank_percentile(self):
+        # then
+        self.assertEqual(percentile(list(range(1, 101)), 0.95), 95)
+        self.assertEqual(percentile([], 0.5), 0.0)
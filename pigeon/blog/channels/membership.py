@@ -0,0 +1,57 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from pigeon.models import Channel
+
+
+class ChannelMembership:
+    """
+    Set of ids of channels user is member of, memoized on request and in Django cache,
+    so access checks do not load members of channel
+    """
+    request_attribute = '_member_channel_ids'
+
+    @staticmethod
+    def get_cache_key(user_id: int) -> str:
+        return f'channel_membership:{user_id}'
+
+    @staticmethod
+    def get_channel_ids(user, request=None) -> frozenset:
+        """
+        Get ids of channels user is member of
+        :param user: User from request, anonymous user is member of no channel
+        :param request: request of same user to memoize ids on, memo lives as long as request
+        """
+        if user is None or user.id is None:
+            return frozenset()
+        channel_ids = getattr(request, ChannelMembership.request_attribute, None)
+        if channel_ids is not None:
+            return channel_ids
+        cache_key = ChannelMembership.get_cache_key(user.id)
+        # without shared cache invalidation would not reach other processes, membership is read every request then
+        use_cache = settings.CHANNEL_MEMBERSHIP_CACHE_TIMEOUT > 0
+        channel_ids = cache.get(cache_key) if use_cache else None
+        if channel_ids is None:
+            channel_ids = frozenset(Channel.channel_access.through.objects.filter(user=user.id)
+                                    .values_list('channel_id', flat=True))
+            if use_cache:
+                cache.set(cache_key, channel_ids, settings.CHANNEL_MEMBERSHIP_CACHE_TIMEOUT)
+        if request is not None:
+            setattr(request, ChannelMembership.request_attribute, channel_ids)
+        return channel_ids
+
+    @staticmethod
+    def is_member(user, channel_id: int, request=None) -> bool:
+        return channel_id in ChannelMembership.get_channel_ids(user, request)
+
+    @staticmethod
+    def invalidate(user_ids):
+        """
+        Drop cached membership of users, once now and once again after commit,
+        so request reading membership before commit can not cache it for good
+        """
+        cache_keys = [ChannelMembership.get_cache_key(user_id) for user_id in user_ids]
+        if cache_keys:
+            cache.delete_many(cache_keys)
+            transaction.on_commit(lambda: cache.delete_many(cache_keys))
@@ -1,7 +1,17 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination
 
+from pigeon.blog.utils.pagination import SelectablePagination
 
-class ChannelPagination(PageNumberPagination):
+
+class ChannelCursorPagination(CursorPagination):
+    page_size = 6
+    page_size_query_param = 'channel_size'
+    max_page_size = 12
+    ordering = ('id',)
+
+
+class ChannelPagination(SelectablePagination):
     page_size = 6
     page_size_query_param = 'channel_size'
     max_page_size = 12
+    cursor_pagination_class = ChannelCursorPagination
@@ -5,24 +5,28 @@ from rest_framework.generics import get_object_or_404
 from rest_framework.relations import PrimaryKeyRelatedField
 
 from pigeon.auth.serializers import UserSerializer
+from pigeon.blog.channels.membership import ChannelMembership
 from pigeon.blog.images.serializers import ChannelImageSerializer
+from pigeon.blog.images.utils import ImageUtils
 from pigeon.blog.tags.serializers import ChannelTagSerializer
+from pigeon.blog.tags.utils import TagUtils
 from pigeon.blog.utils.utils import BlogSerializerUtils
-from pigeon.models import Channel, Tag, Post, ChannelImage
+from pigeon.instrumentation.serializers import TimedSerializerMixin
+from pigeon.models import Channel, Tag, ChannelImage
 
 
-class ChannelSerializer(WritableNestedModelSerializer):
+class ChannelSerializer(TimedSerializerMixin, WritableNestedModelSerializer):
     channel_access = PrimaryKeyRelatedField(many=True, write_only=True, queryset=User.objects.all(), required=False)
     has_access = serializers.SerializerMethodField()
     tags = serializers.SerializerMethodField()
     owner = UserSerializer(many=False, read_only=True, allow_null=False)
-    number_of_members = serializers.SerializerMethodField()
-    number_of_posts = serializers.SerializerMethodField()
+    number_of_members = serializers.IntegerField(source='members_count', read_only=True)
+    number_of_posts = serializers.IntegerField(source='posts_count', read_only=True)
     channel_image = ChannelImageSerializer(many=True, read_only=True)
 
     class Meta:
         model = Channel
-        fields = "__all__"
+        exclude = ("members_count", "posts_count", "modified_at")
         read_only_fields = ("id",)
         extra_kwargs = {'password': {'write_only': True}}
 
@@ -47,19 +51,7 @@ class ChannelSerializer(WritableNestedModelSerializer):
         Get bool if user has access to channel
         """
         user = self.get_user_from_request()
-        return user in channel.channel_access.all() or user == channel.owner
-
-    def get_number_of_members(self, channel: Channel) -> int:
-        """
-        Get number of members in channel
-        """
-        return channel.channel_access.count()
-
-    def get_number_of_posts(self, channel: Channel) -> int:
-        """
-        Get number of posts in channel
-        """
-        return Post.objects.filter(channel=channel.id).count()
+        return user.id == channel.owner_id or ChannelMembership.is_member(user, channel.id, self.context['request'])
 
     def get_channel_by_id(self, id: int) -> Channel:
         """
@@ -71,7 +63,7 @@ class ChannelSerializer(WritableNestedModelSerializer):
         """
         Get tags assigned to Post
         """
-        tags = Tag.objects.filter(channel=channel.id)
+        tags = channel.tag_set.all() if channel.pk else Tag.objects.none()
         serializer = ChannelTagSerializer(tags, many=True)
         return serializer.data
 
@@ -86,6 +78,7 @@ class ChannelSerializer(WritableNestedModelSerializer):
         channel = Channel(**validated_data)
         channel.save()
         channel.channel_access.add(user_id)
+        channel.refresh_from_db(fields=['members_count'])
         channel.password = User.objects.make_random_password()
         if 'tags' in self.context['request'].data:
             tag_list_data = self.context['request'].data['tags']
@@ -93,18 +86,11 @@ class ChannelSerializer(WritableNestedModelSerializer):
             self.link_tags(channel, tags)
         return channel
 
-    def link_tags(self, channel: Channel, tags_to_be_added: list):
-        existing_tags = Tag.objects.filter(name__in=[tag.name for tag in tags_to_be_added])
-        for tag in tags_to_be_added:
-            existing_tag = existing_tags.filter(name=tag.name).first()
-            if not existing_tag:
-                existing_tag = tag
-                existing_tag.save()
-            existing_tag.channel.add(channel.id)
+    def link_tags(self, channel: Channel, tags_to_be_added: list, remove_stale: bool = False):
+        TagUtils.link_tags(channel, 'channel', [tag.name for tag in tags_to_be_added], remove_stale)
 
     def save_image(self, image, channel: Channel):
-        photo = ChannelImage.objects.create(image=image, channel=channel)
-        photo.save()
+        ImageUtils.stage_image(ChannelImage, image, channel=channel)
 
     def update(self, instance, validated_data):
         user = self.get_user_id_from_request()
@@ -112,12 +98,7 @@ class ChannelSerializer(WritableNestedModelSerializer):
             if user == instance.owner.id:
                 tag_list_data = self.context['request'].data['tags']
                 tags = [Tag(**tag_data) for tag_data in tag_list_data]
-                channel_tags = Tag.objects.filter(channel=instance.id)
-                for tag in channel_tags:
-                    if tag not in tags:
-                        tag = Tag.objects.get(id=tag.id)
-                        tag.channel.remove(instance)
-                self.link_tags(instance, tags)
+                self.link_tags(instance, tags, remove_stale=True)
                 return super(ChannelSerializer, self).update(instance, validated_data)
             raise serializers.ValidationError(detail=f'User {user} not owner of channel with id {instance.id}')
         raise serializers.ValidationError(detail=f"Channel with id {instance.id} has no owner, contact with admin")
@@ -0,0 +1,103 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from model_bakery import baker
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient, APIRequestFactory
+
+from pigeon.blog.channels.membership import ChannelMembership
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+                   CHANNEL_MEMBERSHIP_CACHE_TIMEOUT=60)
+class TestChannelMembership(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='some_username1', email='some_email', password='some_password')
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_should_not_hit_database_when_cache_is_warm(self):
+        # given
+        channel = baker.make('pigeon.Channel', channel_access=[self.user])
+        ChannelMembership.get_channel_ids(self.user)
+        # when
+        with self.assertNumQueries(0):
+            is_member = ChannelMembership.is_member(self.user, channel.id)
+        # then
+        self.assertTrue(is_member)
+
+    @override_settings(CHANNEL_MEMBERSHIP_CACHE_TIMEOUT=0)
+    def test_should_see_removal_made_through_other_process_without_shared_cache(self):
+        # given
+        channel = baker.make('pigeon.Channel', channel_access=[self.user])
+        ChannelMembership.get_channel_ids(self.user)
+        # when
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                                                   'LOCATION': 'other-worker'}}):
+            channel.channel_access.remove(self.user)
+        # then
+        self.assertFalse(ChannelMembership.is_member(self.user, channel.id))
+
+    def test_should_memoize_membership_on_request(self):
+        # given
+        channel = baker.make('pigeon.Channel', channel_access=[self.user])
+        request = APIRequestFactory().get('/')
+        ChannelMembership.get_channel_ids(self.user, request)
+        cache.clear()
+        # when
+        with self.assertNumQueries(0):
+            is_member = ChannelMembership.is_member(self.user, channel.id, request)
+        # then
+        self.assertTrue(is_member)
+
+    def test_authenticate_should_invalidate_membership(self):
+        # given
+        channel = baker.make('pigeon.Channel', is_private=False)
+        self.assertFalse(ChannelMembership.is_member(self.user, channel.id))
+        # when
+        self.client.post(reverse('channels-authenticate', args=[channel.id]))
+        # then
+        self.assertTrue(ChannelMembership.is_member(self.user, channel.id))
+
+    def test_unauthenticate_should_invalidate_membership(self):
+        # given
+        channel = baker.make('pigeon.Channel', channel_access=[self.user])
+        self.assertTrue(ChannelMembership.is_member(self.user, channel.id))
+        # when
+        self.client.post(reverse('channels-unauthenticate', args=[channel.id]))
+        # then
+        self.assertFalse(ChannelMembership.is_member(self.user, channel.id))
+
+    def test_channel_creation_should_invalidate_creator_membership(self):
+        # given
+        ChannelMembership.get_channel_ids(self.user)
+        # when
+        response = self.client.post(reverse('channels-list'), data={'name': 'test_channel', 'is_private': 'False'})
+        # then
+        self.assertTrue(ChannelMembership.is_member(self.user, response.data['id']))
+
+    def test_clear_of_members_should_invalidate_membership(self):
+        # given
+        channel = baker.make('pigeon.Channel', channel_access=[self.user])
+        self.assertTrue(ChannelMembership.is_member(self.user, channel.id))
+        # when
+        channel.channel_access.clear()
+        # then
+        self.assertFalse(ChannelMembership.is_member(self.user, channel.id))
+
+    def test_warm_cache_should_remove_membership_query_from_channel_feed(self):
+        # given
+        channel = baker.make('pigeon.Channel', channel_access=[self.user])
+        baker.make('pigeon.Post', channel=channel, _quantity=3)
+        url = f"{reverse('posts-list')}?channel={channel.id}"
+        self.client.get(url)
+        # when
+        with self.assertNumQueries(5):
+            response = self.client.get(url)
+        # then
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 3)
@@ -1,5 +1,7 @@
 from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from model_bakery import baker
 from rest_framework.reverse import reverse
 from rest_framework.test import APIClient
@@ -73,3 +75,35 @@ class ChannelPaginationTest(TestCase):
         response = self.client.get(f'{self.channels_url}?page=4')
         # then
         self.assertEqual(response.status_code, 404)
+
+    def test_should_paginate_by_cursor_when_requested(self):
+        # when
+        response = self.client.get(f'{self.channels_url}?pagination=cursor')
+        # then
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('count', response.data)
+        self.assertEqual(len(response.data['results']), 6)
+        self.assertIsNone(response.data['previous'])
+        self.assertIn('cursor=', response.data['next'])
+
+    def test_should_follow_cursor_to_last_page(self):
+        # given
+        url = f'{self.channels_url}?pagination=cursor'
+        ids = []
+        # when
+        while url:
+            response = self.client.get(url)
+            ids += [channel['id'] for channel in response.data['results']]
+            url = response.data['next']
+        # then
+        self.assertEqual(len(ids), self.quantity)
+        self.assertEqual(ids, sorted(ids))
+
+    def test_cursor_page_should_not_count_rows(self):
+        # given
+        response = self.client.get(f'{self.channels_url}?pagination=cursor')
+        # when
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(response.data['next'])
+        # then
+        self.assertFalse(any('__count' in query['sql'] for query in queries))
@@ -266,6 +266,84 @@ class TestChannelView(TestCase):
         # then
         self.assertEqual(response.status_code, 400)
 
+    def test_channel_list_should_run_constant_number_of_queries(self):
+        # given
+        members = baker.make('User', _quantity=3)
+        channels = baker.make('pigeon.Channel', channel_access=members, _quantity=12)
+        for channel in channels:
+            baker.make('pigeon.Post', channel=channel, _quantity=2)
+            baker.make('pigeon.Tag', channel=[channel])
+        channels[0].channel_access.add(self.user)
+        # when
+        for page_size in range(6, 13):
+            with self.assertNumQueries(5):
+                response = self.client.get(f'{self.channels_url}?channel_size={page_size}')
+            # then
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['results']), page_size)
+            self.assertEqual(response.data['results'][0]['number_of_members'], 4)
+            self.assertEqual(response.data['results'][0]['number_of_posts'], 2)
+            self.assertEqual(response.data['results'][0]['has_access'], True)
+            self.assertEqual(response.data['results'][1]['has_access'], False)
+            self.assertEqual(len(response.data['results'][1]['tags']), 1)
+
+    def test_authenticate_and_unauthenticate_should_update_members_counter(self):
+        # given
+        channel = baker.make('pigeon.Channel', is_private=False)
+        authenticate_url = reverse('channels-authenticate', args=[channel.id, ])
+        # when
+        self.client.post(authenticate_url)
+        self.client.post(authenticate_url)
+        channel.refresh_from_db()
+        members_after_authenticate = channel.members_count
+        self.client.post(reverse('channels-unauthenticate', args=[channel.id, ]))
+        channel.refresh_from_db()
+        # then
+        self.assertEqual(members_after_authenticate, 1)
+        self.assertEqual(channel.members_count, 0)
+
+    def test_created_channel_should_count_creator_as_member(self):
+        # when
+        response = self.client.post(self.channels_url, data=self.public_channel_data)
+        # then
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['number_of_members'], 1)
+        self.assertEqual(Channel.objects.get().members_count, 1)
+
+    def test_should_filter_channels_by_tags(self):
+        # given
+        tagged, other = baker.make('pigeon.Channel', _quantity=2)
+        baker.make('pigeon.Tag', name='python', channel=[tagged])
+        baker.make('pigeon.Tag', name='django', channel=[tagged, other])
+        # when
+        response = self.client.get(self.channels_url, {'tags': 'python,django'})
+        # then
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([channel['id'] for channel in response.data['results']], [tagged.id])
+
+    def test_should_return_304_when_channel_not_modified(self):
+        # given
+        channel = baker.make('pigeon.Channel', owner=self.user)
+        url = reverse('channels-detail', args=[channel.id])
+        etag = self.client.get(url)['ETag']
+        # when
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        # then
+        self.assertEqual(response.status_code, 304)
+
+    def test_should_return_200_when_channel_members_changed(self):
+        # given
+        channel = baker.make('pigeon.Channel', is_private=False, owner=self.user)
+        url = reverse('channels-detail', args=[channel.id])
+        etag = self.client.get(url)['ETag']
+        self.client.post(reverse('channels-authenticate', args=[channel.id, ]))
+        # when
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        # then
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['number_of_members'], 1)
+
     #TODO This is failing but need to be skipped before demo
 
     # def test_should_throw_500_when_more_than_1_image_provided_while_creating_channel(self):
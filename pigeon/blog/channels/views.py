@@ -1,4 +1,5 @@
 from django.contrib.auth.models import User
+from django.db import transaction
 from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
@@ -8,10 +9,14 @@ from rest_framework.status import *
 
 from pigeon.blog.channels.pagination import ChannelPagination
 from pigeon.blog.channels.serializers import ChannelSerializer
+from pigeon.blog.images.uploads import BoundedUploadMixin
+from pigeon.blog.tags.utils import TagUtils
+from pigeon.blog.utils.asynchronous import AsyncReadMixin
+from pigeon.blog.utils.conditional import ConditionalGetMixin
 from pigeon.models import Channel
 
 
-class ChannelViewSet(viewsets.ModelViewSet):
+class ChannelViewSet(AsyncReadMixin, BoundedUploadMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """
     View for posts
     """
@@ -20,8 +25,9 @@ class ChannelViewSet(viewsets.ModelViewSet):
     pagination_class = ChannelPagination
 
     def get_queryset(self):
-        return Channel.objects.all().order_by('id')
+        return TagUtils.filter_by_request(Channel.objects.directory(), 'channel', self.request).order_by('id')
 
+    @transaction.atomic
     def create(self, request: Request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data, context={
             'request': request})
@@ -35,6 +41,7 @@ class ChannelViewSet(viewsets.ModelViewSet):
         return Response(data={'message': 'Channel can have only one image'}, status=HTTP_500_INTERNAL_SERVER_ERROR)
 
     @action(detail=True, methods=['post'])
+    @transaction.atomic
     def authenticate(self, request, *args, **kwargs) -> Response:
         """
         Add user to channel, if channel isPrivate parameter is True then
@@ -53,6 +60,7 @@ class ChannelViewSet(viewsets.ModelViewSet):
         return Response(data={'message': 'Unauthorized'}, status=HTTP_401_UNAUTHORIZED)
 
     @action(detail=True, methods=['post'])
+    @transaction.atomic
     def unauthenticate(self, request, *args, **kwargs) -> Response:
         """
         Remove user from channel
@@ -65,6 +73,9 @@ class ChannelViewSet(viewsets.ModelViewSet):
         return Response(data={'message': 'Removed'})
 
     def retrieve(self, request: Request, *args, **kwargs) -> Response:
+        """
+        Get channel, 304 when channel did not change since version client has
+        """
         id = kwargs.get('pk')
         try:
             channel = Channel.objects.get(id=id)
@@ -72,6 +83,9 @@ class ChannelViewSet(viewsets.ModelViewSet):
             return Response(data={'message': f'Channel not found with id {id}'}, status=HTTP_500_INTERNAL_SERVER_ERROR)
         serializer = ChannelSerializer(channel, context={'request': request})
         if serializer.get_has_access(channel):
+            not_modified = self.get_not_modified_response(request, channel.modified_at)
+            if not_modified is not None:
+                return not_modified
             return Response(serializer.data, status=HTTP_200_OK)
         return Response(data={'message': f'User {request.user} not part of channel with id {id}'},
                         status=HTTP_401_UNAUTHORIZED)
@@ -1,7 +1,17 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination
 
+from pigeon.blog.utils.pagination import SelectablePagination
 
-class CommentPagination(PageNumberPagination):
+
+class CommentCursorPagination(CursorPagination):
+    page_size = 10
+    page_size_query_param = 'comment_size'
+    max_page_size = 20
+    ordering = ('created_at', 'id')
+
+
+class CommentPagination(SelectablePagination):
     page_size = 10
     page_size_query_param = 'comment_size'
     max_page_size = 20
+    cursor_pagination_class = CommentCursorPagination
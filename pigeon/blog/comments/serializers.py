@@ -1,42 +1,35 @@
-from django.contrib.auth.models import User
+from django.conf import settings
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
 from pigeon.auth.serializers import UserSerializer
-from pigeon.blog.posts.serializers import PostSerializer, GlobalPostSerializer
-from pigeon.models import Comment, Post
+from pigeon.instrumentation.serializers import TimedSerializerMixin
+from pigeon.models import Comment
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """
+    Comment with nested author, post is returned as id, access to post is checked once per request by view
+    """
     user = UserSerializer(many=False, read_only=True)
-    post = PostSerializer(many=False, read_only=True)
 
     class Meta:
-        fields = "__all__"
-        read_only_fields = ('id', 'created_at')
+        exclude = ('path',)
+        read_only_fields = ('id', 'created_at', 'post', 'depth', 'replies_count')
         model = Comment
 
-    def to_internal_value(self, data):
+    def validate_parent(self, parent: Comment):
         """
-        Method for translating user id and post id from request to nested serializer user, post object
+        Reply has to be in same post as comment it replies to and not nested deeper than COMMENTS_MAX_DEPTH
         """
-        user_id = self.context['request'].user.id
-        post_id = self.context['post_id']
-        data.update({'user': user_id})
-        data.update({'post': post_id})
-        self.fields['user'] = serializers.PrimaryKeyRelatedField(queryset=User.objects.all())
-        self.fields['post'] = serializers.PrimaryKeyRelatedField(queryset=Post.objects.all())
-        return super(CommentSerializer, self).to_internal_value(data)
-
-    def to_representation(self, instance: Comment):
-        """
-        Method for returning Post JSON with nested user field without tokens
-        """
-        if instance.post.channel is None:
-            self.fields['post'] = GlobalPostSerializer(many=False, read_only=True)
-        response = super().to_representation(instance)
-        response.pop("post")
-        return response
+        if parent is None:
+            return parent
+        if str(parent.post_id) != str(self.context['post_id']):
+            raise ValidationError(
+                detail=f'Comment with id {parent.id} not part of post with id {self.context["post_id"]}')
+        if parent.depth >= settings.COMMENTS_MAX_DEPTH:
+            raise ValidationError(detail=f'Replies can be nested at most {settings.COMMENTS_MAX_DEPTH} levels')
+        return parent
 
     def remove(self):
         user = self.context['request'].user
@@ -49,5 +42,19 @@ class CommentSerializer(serializers.ModelSerializer):
         user = self.context['request'].user
         comment = self.instance
         if user == comment.user:
+            # reply can not be moved to other thread, path of its subtree would be stale
+            validated_data.pop('parent', None)
             return super(CommentSerializer, self).update(instance, validated_data)
         raise ValidationError(detail={'message': f'User {user} not author of comment'})
+
+
+class CommentThreadSerializer(CommentSerializer):
+    """
+    Comment with replies nested below it, replies are loaded up front by view and passed in 'replies' context,
+    so serializing thread runs no queries
+    """
+    replies = serializers.SerializerMethodField()
+
+    def get_replies(self, comment: Comment) -> list:
+        replies = self.context.get('replies', {}).get(comment.id, [])
+        return CommentThreadSerializer(replies, many=True, context=self.context).data
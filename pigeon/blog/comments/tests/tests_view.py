@@ -1,9 +1,12 @@
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from model_bakery import baker
 from rest_framework.reverse import reverse
 from rest_framework.test import APIClient, APIRequestFactory, APITestCase
 
-from pigeon.blog.comments.serializers import CommentSerializer
+from pigeon.blog.comments.serializers import CommentSerializer, CommentThreadSerializer
 from pigeon.models import Comment
 
 
@@ -30,7 +33,7 @@ class TestCommentView(APITestCase):
         # given
         post = baker.make('pigeon.Post')
         comments = baker.make('pigeon.Comment', _quantity=2, post=post)
-        comment_serializer_data = CommentSerializer(comments, many=True).data
+        comment_serializer_data = CommentThreadSerializer(comments, many=True).data
         # when
         url = reverse('post-comments-list', args=[post.id, ])
         response = self.client.get(url)
@@ -96,3 +99,174 @@ class TestCommentView(APITestCase):
         response = self.client.get(f'{url}?channel={channel.id}')
         # then
         self.assertEqual(response.status_code, 400)
+
+    def test_should_throw_400_when_commenting_post_of_channel_user_not_part_of(self):
+        # given
+        post = baker.make('pigeon.Post', channel=baker.make('pigeon.Channel'))
+        url = reverse('post-comments-list', args=[post.id, ])
+        # when
+        response = self.client.post(url, data={'body': 'some comment'})
+        # then
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Comment.objects.count(), 0)
+
+    def test_should_throw_404_when_post_not_found(self):
+        # when
+        response = self.client.get(reverse('post-comments-list', args=[0, ]))
+        # then
+        self.assertEqual(response.status_code, 404)
+
+    def test_should_display_comments_of_channel_post_in_constant_number_of_queries(self):
+        # given
+        channel = baker.make('pigeon.Channel', channel_access=[self.user, ])
+        post = baker.make('pigeon.Post', channel=channel)
+        url = f"{reverse('post-comments-list', args=[post.id, ])}?comment_size=20"
+        baker.make('pigeon.Comment', post=post)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(url)
+        baker.make('pigeon.Comment', post=post, _quantity=19)
+        # when
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(url)
+        # then
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertEqual(response.data['results'][0]['post'], post.id)
+        self.assertEqual(len(many), len(few))
+
+    def test_should_paginate_comments_by_cursor_when_requested(self):
+        # given
+        post = baker.make('pigeon.Post')
+        comments = baker.make('pigeon.Comment', _quantity=3, post=post)
+        url = reverse('post-comments-list', args=[post.id, ])
+        # when
+        response = self.client.get(f'{url}?pagination=cursor&comment_size=2')
+        next_response = self.client.get(response.data['next'])
+        # then
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([comment['id'] for comment in response.data['results']], [comments[0].id, comments[1].id])
+        self.assertEqual([comment['id'] for comment in next_response.data['results']], [comments[2].id])
+        self.assertIsNone(next_response.data['next'])
+
+    def test_comment_create_and_delete_should_update_comments_counter(self):
+        # given
+        post = baker.make('pigeon.Post')
+        url = reverse('post-comments-list', args=[post.id, ])
+        # when
+        response = self.client.post(url, data={'body': 'some comment'})
+        post.refresh_from_db()
+        comments_after_create = post.comments_count
+        self.client.delete(reverse('post-comments-detail', args=[post.id, response.data['id']]))
+        post.refresh_from_db()
+        # then
+        self.assertEqual(comments_after_create, 1)
+        self.assertEqual(post.comments_count, 0)
+
+
+class TestCommentThreads(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = baker.make('User')
+        cls.post = baker.make('pigeon.Post')
+        cls.url = reverse('post-comments-list', args=[cls.post.id, ])
+
+    def setUp(self) -> None:
+        self.client.force_authenticate(self.user)
+
+    def reply(self, parent: Comment, **kwargs) -> Comment:
+        return baker.make('pigeon.Comment', post=self.post, parent=parent, **kwargs)
+
+    def test_should_reply_to_comment(self):
+        # given
+        comment = baker.make('pigeon.Comment', post=self.post)
+        reply = self.reply(comment)
+        # when
+        response = self.client.post(self.url, data={'body': 'some reply', 'parent': reply.id})
+        # then
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['parent'], reply.id)
+        self.assertEqual(response.data['depth'], 2)
+        created = Comment.objects.get(id=response.data['id'])
+        self.assertEqual(created.get_ancestor_ids(), [comment.id, reply.id])
+        comment.refresh_from_db()
+        reply.refresh_from_db()
+        self.assertEqual((comment.replies_count, reply.replies_count), (2, 1))
+
+    def test_should_throw_400_when_replying_to_comment_of_other_post(self):
+        # given
+        comment = baker.make('pigeon.Comment')
+        # when
+        response = self.client.post(self.url, data={'body': 'some reply', 'parent': comment.id})
+        # then
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_should_list_threads_with_replies_up_to_depth(self):
+        # given
+        first, second = baker.make('pigeon.Comment', post=self.post, _quantity=2)
+        reply = self.reply(first)
+        nested_reply = self.reply(reply)
+        self.reply(nested_reply)
+        # when
+        response = self.client.get(self.url, {'depth': 2})
+        # then
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 2)
+        threads = response.data['results']
+        self.assertEqual([thread['id'] for thread in threads], [first.id, second.id])
+        self.assertEqual(threads[0]['replies_count'], 3)
+        self.assertEqual(threads[0]['replies'][0]['id'], reply.id)
+        self.assertEqual(threads[0]['replies'][0]['replies'][0]['id'], nested_reply.id)
+        self.assertEqual(threads[0]['replies'][0]['replies'][0]['replies'], [])
+        self.assertEqual(threads[0]['replies'][0]['replies'][0]['replies_count'], 1)
+        self.assertEqual(threads[1]['replies'], [])
+
+    def test_should_retrieve_subtree_of_reply(self):
+        # given
+        comment = baker.make('pigeon.Comment', post=self.post)
+        reply = self.reply(comment)
+        nested_replies = [self.reply(reply) for _ in range(2)]
+        self.reply(comment)
+        # when
+        response = self.client.get(reverse('post-comments-detail', args=[self.post.id, reply.id]))
+        # then
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([nested['id'] for nested in response.data['replies']],
+                         [nested.id for nested in nested_replies])
+
+    def test_should_list_threads_in_constant_number_of_queries(self):
+        # given
+        comment = baker.make('pigeon.Comment', post=self.post)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(self.url)
+        for thread in [comment, *baker.make('pigeon.Comment', post=self.post, _quantity=4)]:
+            self.reply(self.reply(self.reply(thread)))
+        # when
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(self.url, {'depth': 3})
+        # then
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertEqual(len(many), len(few))
+
+    def test_should_delete_subtree_with_comment(self):
+        # given
+        comment = baker.make('pigeon.Comment', post=self.post)
+        reply = self.reply(comment, user=self.user)
+        self.reply(self.reply(reply))
+        # when
+        response = self.client.delete(reverse('post-comments-detail', args=[self.post.id, reply.id]))
+        # then
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(Comment.objects.all()), [comment])
+        comment.refresh_from_db()
+        self.post.refresh_from_db()
+        self.assertEqual((comment.replies_count, self.post.comments_count), (0, 1))
+
+    def test_should_fit_path_of_deepest_reply_allowed_by_settings(self):
+        # given
+        comment = baker.make('pigeon.Comment', post=self.post)
+        # when
+        for _ in range(settings.COMMENTS_MAX_DEPTH_LIMIT):
+            comment = self.reply(comment)
+        # then
+        self.assertEqual(comment.depth, settings.COMMENTS_MAX_DEPTH_LIMIT)
+        self.assertLessEqual(len(comment.path), Comment._meta.get_field('path').max_length)
@@ -0,0 +1,21 @@
+from collections import defaultdict
+from typing import Dict, List
+
+from pigeon.models import Comment
+
+
+class CommentUtils:
+    @staticmethod
+    def get_replies(comments: List[Comment], depth: int) -> Dict[int, List[Comment]]:
+        """
+        Load replies of comments at most depth levels below them in one query
+        :param comments: comments of one page or single comment
+        :param depth: number of levels of replies, 0 loads none
+        :return: replies with authors grouped by id of comment they reply to, oldest first
+        """
+        replies = defaultdict(list)
+        if depth <= 0:
+            return replies
+        for reply in Comment.objects.subtrees(comments, depth).select_related('user').order_by('created_at', 'id'):
+            replies[reply.parent_id].append(reply)
+        return replies
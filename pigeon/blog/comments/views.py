@@ -1,35 +1,104 @@
+from django.conf import settings
+from django.db import transaction
 from rest_framework import viewsets
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.status import HTTP_200_OK
 
+from pigeon.blog.channels.membership import ChannelMembership
 from pigeon.blog.comments.pagination import CommentPagination
-from pigeon.blog.comments.serializers import CommentSerializer
-from pigeon.models import Comment
+from pigeon.blog.comments.serializers import CommentSerializer, CommentThreadSerializer
+from pigeon.blog.comments.utils import CommentUtils
+from pigeon.blog.utils.asynchronous import AsyncReadMixin
+from pigeon.models import Comment, Post
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(AsyncReadMixin, viewsets.ModelViewSet):
     """
-    Viewset for comments
+    Viewset for comments, list is paginated by top level comments, each with replies nested up to ?depth= levels
     """
     serializer_class = CommentSerializer
     permission_classes = [IsAuthenticated]
+    async_actions = ('list',)
     pagination_class = CommentPagination
 
+    def initial(self, request, *args, **kwargs):
+        super(CommentViewSet, self).initial(request, *args, **kwargs)
+        self.check_post_access(request)
+
+    def check_post_access(self, request):
+        """
+        Check once per request that user has access to channel of post, comments of global posts are open
+        """
+        post_id = self.kwargs['post_pk']
+        post = Post.objects.filter(id=post_id).values('channel_id', 'channel__owner_id').first()
+        if post is None:
+            raise NotFound(detail={"message": f'Post not found with id {post_id}'})
+        channel_id = post['channel_id']
+        if channel_id is not None and request.user.id != post['channel__owner_id'] \
+                and not ChannelMembership.is_member(request.user, channel_id, request):
+            raise ValidationError(detail={"message": f'User {request.user} not part of channel with id {channel_id}'},
+                                  code=403)
+
     def get_queryset(self):
         """
-        Get queryset of comments
+        Get queryset of comments of post with their authors, only top level comments when listing threads
         :return:
         """
-        return Comment.objects.filter(post=self.kwargs['post_pk']).order_by('created_at')
+        comments = Comment.objects.filter(post=self.kwargs['post_pk']).select_related('user')
+        if self.action == 'list':
+            comments = comments.filter(depth=0)
+        return comments.order_by('created_at')
+
+    def get_reply_depth(self) -> int:
+        """
+        Get number of levels of replies from ?depth= query param, COMMENTS_REPLY_DEPTH without it
+        """
+        depth = self.request.query_params.get('depth', settings.COMMENTS_REPLY_DEPTH)
+        try:
+            depth = int(depth)
+        except (TypeError, ValueError):
+            raise ValidationError(detail={"message": f'Depth has to be number, got {depth}'})
+        return max(0, min(depth, settings.COMMENTS_MAX_DEPTH))
+
+    def get_thread_serializer(self, comments, many: bool):
+        """
+        Serializer of comments with their replies, replies of all comments are loaded in one query
+        """
+        replies = CommentUtils.get_replies(comments if many else [comments], self.get_reply_depth())
+        context = self.get_serializer_context()
+        context.update({'replies': replies})
+        return CommentThreadSerializer(comments, many=many, context=context)
+
+    def list(self, request, *args, **kwargs):
+        """
+        Get page of threads of post
+        """
+        comments = self.paginate_queryset(self.get_queryset())
+        return self.get_paginated_response(self.get_thread_serializer(comments, many=True).data)
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Get comment with its subtree of replies
+        """
+        return Response(self.get_thread_serializer(self.get_object(), many=False).data)
 
     def get_serializer_context(self):
         context = super(CommentViewSet, self).get_serializer_context()
         context.update({'post_id': self.kwargs['post_pk']})
         return context
 
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user, post_id=self.kwargs['post_pk'])
+
+    @transaction.atomic
+    def create(self, request, *args, **kwargs):
+        return super(CommentViewSet, self).create(request, *args, **kwargs)
+
+    @transaction.atomic
     def destroy(self, request, *args, **kwargs):
-        comment = Comment.objects.get(id=kwargs.get('pk'))
+        comment = self.get_object()
         serializer = self.get_serializer(comment)
         serializer.remove()
         return Response(status=HTTP_200_OK)
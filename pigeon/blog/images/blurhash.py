@@ -0,0 +1,72 @@
+import math
+
+from PIL import Image as PillowImage
+
+"""
+BlurHash encoder (https://blurha.sh), compact placeholder clients render while image is downloaded
+"""
+CHARACTERS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~'
+# hash is computed from thumbnail, placeholder has no details anyway and cost grows with pixels
+SAMPLE_SIZE = 32
+
+
+def encode_base83(value: int, length: int) -> str:
+    return ''.join(CHARACTERS[(value // 83 ** (length - i)) % 83] for i in range(1, length + 1))
+
+
+def srgb_to_linear(value: int) -> float:
+    value = value / 255
+    return value / 12.92 if value <= 0.04045 else ((value + 0.055) / 1.055) ** 2.4
+
+
+def linear_to_srgb(value: float) -> int:
+    value = max(0.0, min(1.0, value))
+    if value <= 0.0031308:
+        return int(value * 12.92 * 255 + 0.5)
+    return int((1.055 * value ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def sign_pow(value: float, exponent: float) -> float:
+    return math.copysign(abs(value) ** exponent, value)
+
+
+def encode(image: PillowImage.Image, components_x: int = 4, components_y: int = 3) -> str:
+    """
+    :param image: Pillow image, any mode
+    :param components_x: number of horizontal components, 1 to 9
+    :param components_y: number of vertical components, 1 to 9
+    :return: blurhash string
+    """
+    sample = image.convert('RGB')
+    sample.thumbnail((SAMPLE_SIZE, SAMPLE_SIZE))
+    width, height = sample.size
+    pixels = [tuple(srgb_to_linear(channel) for channel in pixel) for pixel in sample.getdata()]
+    factors = []
+    for j in range(components_y):
+        for i in range(components_x):
+            normalisation = 1 if i == 0 and j == 0 else 2
+            red = green = blue = 0.0
+            for y in range(height):
+                basis_y = math.cos(math.pi * j * y / height)
+                for x in range(width):
+                    basis = normalisation * math.cos(math.pi * i * x / width) * basis_y
+                    pixel = pixels[y * width + x]
+                    red += basis * pixel[0]
+                    green += basis * pixel[1]
+                    blue += basis * pixel[2]
+            scale = 1 / (width * height)
+            factors.append((red * scale, green * scale, blue * scale))
+    dc, ac = factors[0], factors[1:]
+    result = encode_base83((components_x - 1) + (components_y - 1) * 9, 1)
+    if ac:
+        quantised_max = max(0, min(82, math.floor(max(abs(value) for factor in ac for value in factor) * 166 - 0.5)))
+        max_value = (quantised_max + 1) / 166
+        result += encode_base83(quantised_max, 1)
+    else:
+        max_value = 1
+        result += encode_base83(0, 1)
+    result += encode_base83((linear_to_srgb(dc[0]) << 16) + (linear_to_srgb(dc[1]) << 8) + linear_to_srgb(dc[2]), 4)
+    for factor in ac:
+        red, green, blue = (max(0, min(18, math.floor(sign_pow(value / max_value, 0.5) * 9 + 9.5))) for value in factor)
+        result += encode_base83(red * 19 * 19 + green * 19 + blue, 2)
+    return result
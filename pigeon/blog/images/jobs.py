@@ -0,0 +1,51 @@
+import logging
+import os
+
+from django.apps import apps
+
+from pigeon.blog.images.processing import INVALID_IMAGE_ERRORS, process_image_file
+from pigeon.blog.images.utils import staging_storage
+from pigeon.jobs.registry import job
+from pigeon.models import Image
+
+logger = logging.getLogger(__name__)
+
+
+def mark_image_failed(payload: dict, exception: Exception):
+    apps.get_model(payload['model']).objects.filter(id=payload['id']).update(status=Image.FAILED)
+    staging_storage.delete(payload['staged_name'])
+
+
+@job('process_image', on_failure=mark_image_failed)
+def process_image(payload: dict):
+    """
+    Resize and recompress staged image, store it with its variants in media storage and mark it ready.
+    File which is not an image or cannot be decoded is marked failed right away, retrying would not help
+    :param payload: dict in format {'model': 'pigeon.postimage', 'id': int, 'staged_name': str}
+    """
+    image = apps.get_model(payload['model']).objects.filter(id=payload['id']).first()
+    if image is not None and image.status != Image.READY:
+        invalid = None
+        with staging_storage.open(payload['staged_name']) as staged:
+            try:
+                processed = process_image_file(staged)
+            except INVALID_IMAGE_ERRORS as exception:
+                invalid = exception
+        if invalid is not None:
+            logger.warning('Staged file %s is not a valid image: %r', payload['staged_name'], invalid)
+            mark_image_failed(payload, invalid)
+            return
+        stem = os.path.splitext(os.path.basename(payload['staged_name']))[0]
+        storage = image.image.storage
+        image.variants = {
+            str(width): {extension: storage.save(f'images/{stem}_{width}.{extension}', content)
+                         for extension, content in formats.items()}
+            for width, formats in processed.variants.items()
+        }
+        image.image.save(f'{stem}.jpeg', processed.main, save=False)
+        image.width, image.height = processed.width, processed.height
+        image.blurhash = processed.blurhash
+        image.bytes = processed.main.size
+        image.status = Image.READY
+        image.save(update_fields=['image', 'status', 'width', 'height', 'blurhash', 'bytes', 'variants'])
+    staging_storage.delete(payload['staged_name'])
@@ -0,0 +1,74 @@
+import io
+from typing import Dict
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image as PillowImage, ImageOps, UnidentifiedImageError
+
+from pigeon.blog.images import blurhash
+
+# Pillow format name and file extension of variants
+VARIANT_FORMATS = {'webp': 'WEBP', 'jpeg': 'JPEG'}
+# errors of decoding file which is not image, is corrupt, truncated or too big, retrying would not help
+INVALID_IMAGE_ERRORS = (UnidentifiedImageError, PillowImage.DecompressionBombError, OSError, SyntaxError)
+
+
+class ProcessedImage:
+    """
+    Result of processing uploaded image: sanitized main JPEG, resized variants and metadata
+    """
+
+    def __init__(self, main: ContentFile, variants: Dict[int, Dict[str, ContentFile]], width: int, height: int,
+                 blurhash_value: str):
+        self.main = main
+        self.variants = variants
+        self.width = width
+        self.height = height
+        self.blurhash = blurhash_value
+
+
+def encode(image: PillowImage.Image, image_format: str) -> ContentFile:
+    """
+    Re-encode image, Pillow does not copy EXIF (location, camera) unless asked to
+    """
+    output = io.BytesIO()
+    image.save(output, format=image_format, quality=settings.IMAGE_QUALITY, optimize=image_format == 'JPEG')
+    return ContentFile(output.getvalue())
+
+
+def process_image_file(file) -> ProcessedImage:
+    """
+    Rotate image by EXIF orientation, strip metadata, limit size to IMAGE_MAX_WIDTH
+    and create WebP and JPEG variants of IMAGE_VARIANT_WIDTHS narrower than image
+    :param file: file like object with image
+    :raises INVALID_IMAGE_ERRORS: when file is not an image or cannot be decoded
+    """
+    with PillowImage.open(file) as opened:
+        # whole file is decoded before anything is resized, so corrupt file fails before variants are made
+        opened.load()
+        image = to_rgb(ImageOps.exif_transpose(opened))
+    if image.width > settings.IMAGE_MAX_WIDTH:
+        image = resize(image, settings.IMAGE_MAX_WIDTH)
+    variants = {}
+    for width in sorted(settings.IMAGE_VARIANT_WIDTHS):
+        if width >= image.width:
+            break
+        resized = resize(image, width)
+        variants[width] = {extension: encode(resized, image_format)
+                           for extension, image_format in VARIANT_FORMATS.items()}
+    return ProcessedImage(encode(image, 'JPEG'), variants, image.width, image.height, blurhash.encode(image))
+
+
+def to_rgb(image: PillowImage.Image) -> PillowImage.Image:
+    """
+    Convert image to RGB, transparent pixels are composited onto white background instead of turning black
+    """
+    if image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info):
+        background = PillowImage.new('RGBA', image.size, (255, 255, 255, 255))
+        image = PillowImage.alpha_composite(background, image.convert('RGBA'))
+    return image.convert('RGB')
+
+
+def resize(image: PillowImage.Image, width: int) -> PillowImage.Image:
+    height = max(1, round(image.height * width / image.width))
+    return image.resize((width, height), PillowImage.LANCZOS)
@@ -1,15 +1,45 @@
 from rest_framework import serializers
 
-from pigeon.models import ChannelImage, PostImage
+from pigeon.instrumentation.serializers import TimedSerializerMixin
+from pigeon.models import ChannelImage, PostImage, Image
 
 
-class ChannelImageSerializer(serializers.ModelSerializer):
+class ImageSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """
+    Image with urls of resized variants, clients pick smallest variant wide enough for their layout
+    """
+    variants = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
+
+    def get_variants(self, image: Image) -> dict:
+        """
+        :return: dict in format {'webp': {'320': url, ...}, 'jpeg': {'320': url, ...}}
+        """
+        storage = image.image.storage
+        variants = {}
+        for width, formats in image.variants.items():
+            for extension, name in formats.items():
+                variants.setdefault(extension, {})[width] = storage.url(name)
+        return variants
+
+    def get_srcset(self, image: Image) -> dict:
+        """
+        :return: dict in format {'webp': 'url 320w, url 640w', ...}, ready for srcset attribute
+        """
+        variants = self.get_variants(image)
+        return {extension: ', '.join(f'{urls[width]} {width}w' for width in sorted(urls, key=int))
+                for extension, urls in variants.items()}
+
+
+class ChannelImageSerializer(ImageSerializer):
     class Meta:
         model = ChannelImage
         fields = "__all__"
+        read_only_fields = ('status', 'width', 'height', 'blurhash', 'bytes')
 
 
-class PostImageSerializer(serializers.ModelSerializer):
+class PostImageSerializer(ImageSerializer):
     class Meta:
         model = PostImage
         fields = "__all__"
+        read_only_fields = ('status', 'width', 'height', 'blurhash', 'bytes')
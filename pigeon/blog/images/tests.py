@@ -0,0 +1,221 @@
+import io
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile, TemporaryUploadedFile
+from django.test import TestCase, override_settings
+from model_bakery import baker
+from PIL import Image as PillowImage
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from pigeon.blog.images import blurhash
+from pigeon.blog.images.processing import process_image_file
+from pigeon.blog.images.serializers import PostImageSerializer
+from pigeon.blog.images.utils import ImageUtils, staging_storage
+from pigeon.jobs.queue import run
+from pigeon.models import Job, Post, PostImage
+
+
+def make_jpeg(width: int, height: int, color=(200, 30, 30), exif: bytes = b'') -> bytes:
+    output = io.BytesIO()
+    PillowImage.new('RGB', (width, height), color).save(output, format='JPEG', exif=exif)
+    return output.getvalue()
+
+
+def make_exif(orientation: int = 1) -> bytes:
+    exif = PillowImage.Exif()
+    exif[0x0112] = orientation
+    exif[0x010f] = 'Camera maker'
+    return exif.tobytes()
+
+
+class TestImageProcessing(TestCase):
+    def test_should_create_variants_narrower_than_image(self):
+        # when
+        processed = process_image_file(io.BytesIO(make_jpeg(1000, 500)))
+        # then
+        self.assertEqual(sorted(processed.variants), [320, 640])
+        with PillowImage.open(processed.variants[320]['webp']) as variant:
+            self.assertEqual((variant.format, variant.size), ('WEBP', (320, 160)))
+        with PillowImage.open(processed.variants[640]['jpeg']) as variant:
+            self.assertEqual((variant.format, variant.size), ('JPEG', (640, 320)))
+
+    def test_should_limit_width_of_main_image(self):
+        # when
+        with self.settings(IMAGE_MAX_WIDTH=400):
+            processed = process_image_file(io.BytesIO(make_jpeg(800, 200)))
+        # then
+        self.assertEqual((processed.width, processed.height), (400, 100))
+
+    def test_should_strip_exif_and_apply_orientation(self):
+        # given
+        jpeg = make_jpeg(300, 100, exif=make_exif(orientation=6))
+        # when
+        processed = process_image_file(io.BytesIO(jpeg))
+        # then
+        with PillowImage.open(processed.main) as main:
+            self.assertEqual(main.size, (100, 300))
+            self.assertEqual(len(main.getexif()), 0)
+
+    def test_should_composite_transparent_pixels_onto_white(self):
+        # given
+        output = io.BytesIO()
+        PillowImage.new('RGBA', (10, 10), (0, 0, 0, 0)).save(output, format='PNG')
+        output.seek(0)
+        # when
+        processed = process_image_file(output)
+        # then
+        with PillowImage.open(processed.main) as main:
+            self.assertEqual(main.getpixel((5, 5)), (255, 255, 255))
+
+    def test_should_encode_blurhash_of_solid_image(self):
+        # when
+        value = blurhash.encode(PillowImage.new('RGB', (64, 64), (255, 0, 0)))
+        # then
+        self.assertEqual(len(value), 28)
+        self.assertEqual(value[2:6], blurhash.encode_base83((255 << 16) + (0 << 8) + 0, 4))
+
+
+class TestImageJob(TestCase):
+    def test_should_store_metadata_and_variants(self):
+        # given
+        post = baker.make('pigeon.Post')
+        upload = SimpleUploadedFile('photo.jpg', make_jpeg(700, 350), content_type='image/jpeg')
+        # when
+        image = ImageUtils.stage_image(PostImage, upload, post=post)
+        image.refresh_from_db()
+        data = PostImageSerializer(image).data
+        # then
+        self.assertEqual(image.status, PostImage.READY)
+        self.assertEqual((image.width, image.height), (700, 350))
+        self.assertEqual(image.bytes, image.image.size)
+        self.assertTrue(image.blurhash)
+        self.assertEqual(sorted(data['variants']), ['jpeg', 'webp'])
+        self.assertRegex(data['srcset']['webp'], r'^\S+_320\.webp 320w, \S+_640\.webp 640w$')
+
+    @override_settings(JOBS_EAGER=False)
+    def test_should_stage_upload_in_shared_storage_until_processed(self):
+        # given
+        post = baker.make('pigeon.Post')
+        upload = SimpleUploadedFile('photo.jpg', make_jpeg(100, 50), content_type='image/jpeg')
+        image = ImageUtils.stage_image(PostImage, upload, post=post)
+        job = Job.objects.get()
+        staged_name = job.payload['staged_name']
+        # when
+        staged = staging_storage.exists(staged_name)
+        run(job)
+        # then
+        self.assertTrue(staged)
+        self.assertTrue(staged_name.startswith('staging/'))
+        self.assertFalse(staging_storage.exists(staged_name))
+        image.refresh_from_db()
+        self.assertEqual(image.status, PostImage.READY)
+
+    def test_should_mark_image_failed_when_file_is_not_image(self):
+        # given
+        post = baker.make('pigeon.Post')
+        upload = SimpleUploadedFile('photo.jpg', b'not an image', content_type='image/jpeg')
+        # when
+        with self.assertLogs('pigeon.blog.images.jobs', 'WARNING'):
+            image = ImageUtils.stage_image(PostImage, upload, post=post)
+        image.refresh_from_db()
+        # then
+        self.assertEqual(image.status, PostImage.FAILED)
+
+    @override_settings(JOBS_EAGER=False)
+    def test_should_mark_image_failed_without_retry_when_file_is_truncated_or_too_big(self):
+        for name, content, max_pixels in [('truncated.jpg', make_jpeg(200, 100)[:-500], None),
+                                          ('bomb.jpg', make_jpeg(200, 100), 1000)]:
+            with self.subTest(name):
+                # given
+                post = baker.make('pigeon.Post')
+                upload = SimpleUploadedFile(name, content, content_type='image/jpeg')
+                image = ImageUtils.stage_image(PostImage, upload, post=post)
+                job = Job.objects.get(payload__id=image.id)
+                # when
+                with mock.patch.object(PillowImage, 'MAX_IMAGE_PIXELS', max_pixels or PillowImage.MAX_IMAGE_PIXELS), \
+                        self.assertLogs('pigeon.blog.images.jobs', 'WARNING'):
+                    succeeded = run(job)
+                # then
+                self.assertTrue(succeeded)
+                image.refresh_from_db()
+                self.assertEqual(image.status, PostImage.FAILED)
+                self.assertEqual(image.variants, {})
+                self.assertFalse(staging_storage.exists(job.payload['staged_name']))
+
+
+@override_settings(IMAGE_UPLOAD_MAX_COUNT=2, IMAGE_UPLOAD_MAX_FILE_SIZE=64 * 1024,
+                   IMAGE_UPLOAD_MAX_REQUEST_SIZE=256 * 1024)
+class TestBoundedImageUpload(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = baker.make('User')
+        cls.url = reverse('posts-list')
+
+    def setUp(self) -> None:
+        self.client.force_authenticate(self.user)
+
+    def post_images(self, *images):
+        return self.client.post(self.url, data={'title': 'title', 'body': 'body', 'images': list(images)},
+                                format='multipart')
+
+    def jpeg(self, size: int = 0) -> SimpleUploadedFile:
+        return SimpleUploadedFile('photo.jpg', make_jpeg(10, 10) + b'\0' * size, content_type='image/jpeg')
+
+    def test_should_stream_upload_to_temporary_file(self):
+        # given
+        uploaded = []
+        # when
+        stage_images = mock.patch.object(ImageUtils, 'stage_images',
+                                         side_effect=lambda model, files, **fields: uploaded.extend(files))
+        with stage_images:
+            response = self.post_images(self.jpeg())
+        # then
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(uploaded[0], TemporaryUploadedFile)
+
+    def test_should_reject_file_which_is_not_image(self):
+        # when
+        response = self.post_images(SimpleUploadedFile('photo.jpg', b'#!/bin/sh', content_type='image/jpeg'))
+        # then
+        self.assertEqual(response.status_code, 415)
+        self.assertFalse(Post.objects.exists())
+
+    def test_should_accept_webp_image(self):
+        # given
+        content = io.BytesIO()
+        PillowImage.new('RGB', (10, 10)).save(content, 'WEBP')
+        upload = SimpleUploadedFile('photo.webp', content.getvalue(), content_type='image/webp')
+        # when
+        with mock.patch.object(ImageUtils, 'stage_images'):
+            response = self.post_images(upload)
+        # then
+        self.assertEqual(response.status_code, 200)
+
+    def test_should_reject_webp_signature_outside_riff_container(self):
+        # when
+        response = self.post_images(SimpleUploadedFile('photo.webp', b'#!/bin/sWEBP\necho', content_type='image/webp'))
+        # then
+        self.assertEqual(response.status_code, 415)
+        self.assertFalse(Post.objects.exists())
+
+    def test_should_reject_too_large_file(self):
+        # when
+        response = self.post_images(self.jpeg(size=128 * 1024))
+        # then
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(Post.objects.exists())
+
+    def test_should_reject_too_many_files(self):
+        # when
+        response = self.post_images(self.jpeg(), self.jpeg(), self.jpeg())
+        # then
+        self.assertEqual(response.status_code, 413)
+
+    def test_should_reject_too_large_request_before_reading_it(self):
+        # when
+        with self.settings(IMAGE_UPLOAD_MAX_REQUEST_SIZE=1024):
+            response = self.post_images(self.jpeg(size=4 * 1024))
+        # then
+        self.assertEqual(response.status_code, 413)
+        self.assertIn('message', response.data)
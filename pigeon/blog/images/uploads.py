@@ -0,0 +1,87 @@
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from rest_framework.exceptions import APIException
+from rest_framework.status import HTTP_413_REQUEST_ENTITY_TOO_LARGE, HTTP_415_UNSUPPORTED_MEDIA_TYPE
+
+# leading bytes of image formats Pillow pipeline accepts, every (offset, bytes) part of signature has to match
+IMAGE_SIGNATURES = (
+    ((0, b'\xff\xd8\xff'),),  # JPEG
+    ((0, b'\x89PNG\r\n\x1a\n'),),  # PNG
+    ((0, b'GIF87a'),),
+    ((0, b'GIF89a'),),
+    ((0, b'RIFF'), (8, b'WEBP')),  # RIFF container, format at offset 8
+)
+
+
+class UploadTooLarge(APIException):
+    status_code = HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_code = 'upload_too_large'
+
+
+class UnsupportedUpload(APIException):
+    status_code = HTTP_415_UNSUPPORTED_MEDIA_TYPE
+    default_code = 'unsupported_upload'
+
+
+def is_image(head: bytes) -> bool:
+    return any(all(head[offset:offset + len(part)] == part for offset, part in signature)
+               for signature in IMAGE_SIGNATURES)
+
+
+class BoundedImageUploadHandler(TemporaryFileUploadHandler):
+    """
+    Streams every uploaded file to temporary file chunk by chunk, so memory used by upload does not depend on its size.
+    Request is rejected as soon as it exceeds IMAGE_UPLOAD_MAX_COUNT files, IMAGE_UPLOAD_MAX_FILE_SIZE bytes per file
+    or IMAGE_UPLOAD_MAX_REQUEST_SIZE bytes in total, or when file does not start with signature of image
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.files_count = 0
+        self.file_size = 0
+        self.request_size = 0
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        if content_length > settings.IMAGE_UPLOAD_MAX_REQUEST_SIZE:
+            raise UploadTooLarge(detail={"message": f'Upload can have at most '
+                                                    f'{settings.IMAGE_UPLOAD_MAX_REQUEST_SIZE} bytes'})
+        return super().handle_raw_input(input_data, META, content_length, boundary, encoding)
+
+    def new_file(self, *args, **kwargs):
+        self.files_count += 1
+        if self.files_count > settings.IMAGE_UPLOAD_MAX_COUNT:
+            raise UploadTooLarge(detail={"message": f'Upload can have at most {settings.IMAGE_UPLOAD_MAX_COUNT} files'})
+        self.file_size = 0
+        return super().new_file(*args, **kwargs)
+
+    def reject(self, exception: APIException):
+        """
+        Drop temporary file of rejected upload right away, parser does not do it for exceptions of handlers
+        """
+        if getattr(self, 'file', None) is not None:
+            self.file.close()
+        raise exception
+
+    def receive_data_chunk(self, raw_data: bytes, start: int):
+        if start == 0 and not is_image(raw_data[:16]):
+            self.reject(UnsupportedUpload(detail={"message": f'File {self.file_name} is not JPEG, PNG, GIF '
+                                                             f'or WebP image'}))
+        self.file_size += len(raw_data)
+        self.request_size += len(raw_data)
+        if self.file_size > settings.IMAGE_UPLOAD_MAX_FILE_SIZE:
+            self.reject(UploadTooLarge(detail={"message": f'File {self.file_name} is larger than '
+                                                          f'{settings.IMAGE_UPLOAD_MAX_FILE_SIZE} bytes'}))
+        if self.request_size > settings.IMAGE_UPLOAD_MAX_REQUEST_SIZE:
+            self.reject(UploadTooLarge(detail={"message": f'Upload can have at most '
+                                                          f'{settings.IMAGE_UPLOAD_MAX_REQUEST_SIZE} bytes'}))
+        return super().receive_data_chunk(raw_data, start)
+
+
+class BoundedUploadMixin:
+    """
+    Parses multipart requests of view with BoundedImageUploadHandler only
+    """
+
+    def initialize_request(self, request, *args, **kwargs):
+        request.upload_handlers = [BoundedImageUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
@@ -0,0 +1,59 @@
+import uuid
+from typing import List
+
+from django.conf import settings
+from django.core.files.storage import get_storage_class
+from django.db import connection
+from django.db.models import Max
+from django.utils.functional import LazyObject
+
+from pigeon.jobs.queue import enqueue_many
+from pigeon.models import Image
+
+
+class StagingStorage(LazyObject):
+    """
+    Storage of uploaded images waiting for process_image job, web and worker processes run on separate
+    machines, so it is IMAGE_STAGING_STORAGE (media storage by default) instead of local disk
+    """
+
+    def _setup(self):
+        self._wrapped = get_storage_class(settings.IMAGE_STAGING_STORAGE)()
+
+
+staging_storage = StagingStorage()
+
+
+class ImageUtils:
+    @staticmethod
+    def stage_image(model, uploaded_file, **fields) -> Image:
+        """
+        Save uploaded file to staging storage and create pending image, upload to media storage is done by job
+        :param model: PostImage or ChannelImage
+        :param uploaded_file: file from request
+        :param fields: fields of created image, e.g. post=post
+        :return: created image with empty image field
+        """
+        return ImageUtils.stage_images(model, [uploaded_file], **fields)[0]
+
+    @staticmethod
+    def stage_images(model, uploaded_files: list, **fields) -> List[Image]:
+        """
+        Stage many uploaded files of one post or channel, images and their jobs are created with one INSERT each.
+        bulk_create sends no post_save, feed is touched when process_image job saves the finished image
+        :return: created images in order of files
+        """
+        staged_names = [staging_storage.save(f'staging/{uuid.uuid4().hex}/{uploaded_file.name}', uploaded_file)
+                        for uploaded_file in uploaded_files]
+        images = [model(status=Image.PENDING, **fields) for _ in staged_names]
+        if connection.features.can_return_rows_from_bulk_insert:
+            model.objects.bulk_create(images)
+        else:
+            last_id = model.objects.aggregate(last_id=Max('id'))['last_id'] or 0
+            model.objects.bulk_create(images)
+            ids = model.objects.filter(id__gt=last_id, **fields).order_by('id').values_list('id', flat=True)
+            for image, image_id in zip(images, ids):
+                image.id = image_id
+        enqueue_many('process_image', [{'model': model._meta.label_lower, 'id': image.id, 'staged_name': staged_name}
+                                       for image, staged_name in zip(images, staged_names)])
+        return images
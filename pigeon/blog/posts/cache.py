@@ -0,0 +1,57 @@
+from datetime import datetime
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.request import Request
+
+
+class GlobalFeedCache:
+    """
+    Pages of global feed cached as serialized data, global feed is the same for every user.
+    Key contains version of global feed, so every write bumping FeedVersion invalidates all pages at once,
+    stale pages expire after GLOBAL_FEED_CACHE_TIMEOUT
+    """
+    cacheable_params = frozenset(('page', 'post_size'))
+    stats_keys = {'hits': 'global_feed_cache:hits', 'misses': 'global_feed_cache:misses'}
+
+    @staticmethod
+    def get_cache_key(request: Request, version: datetime) -> Optional[str]:
+        """
+        :return: key of requested page, None when request has params changing result besides page and its size
+        """
+        if not set(request.query_params) <= GlobalFeedCache.cacheable_params:
+            return None
+        page = request.query_params.get('page', '1')
+        size = request.query_params.get('post_size', '')
+        return f'global_feed:{version.timestamp()}:{request.get_host()}:{page}:{size}'
+
+    @staticmethod
+    def get(cache_key: str) -> Optional[dict]:
+        data = cache.get(cache_key)
+        GlobalFeedCache.count('hits' if data is not None else 'misses')
+        return data
+
+    @staticmethod
+    def set(cache_key: str, data: dict):
+        cache.set(cache_key, data, settings.GLOBAL_FEED_CACHE_TIMEOUT)
+
+    @staticmethod
+    def count(stat: str):
+        key = GlobalFeedCache.stats_keys[stat]
+        cache.add(key, 0, None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            pass
+
+    @staticmethod
+    def get_stats() -> dict:
+        """
+        :return: dict in format {'hits': int, 'misses': int, 'hit_ratio': float}
+        """
+        values = cache.get_many(GlobalFeedCache.stats_keys.values())
+        stats = {stat: values.get(key, 0) for stat, key in GlobalFeedCache.stats_keys.items()}
+        requests = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = stats['hits'] / requests if requests else 0.0
+        return stats
@@ -1,7 +1,17 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination
 
+from pigeon.blog.utils.pagination import SelectablePagination
 
-class PostPagination(PageNumberPagination):
+
+class PostCursorPagination(CursorPagination):
+    page_size = 12
+    page_size_query_param = 'post_size'
+    max_page_size = 24
+    ordering = ('created_at', 'id')
+
+
+class PostPagination(SelectablePagination):
     page_size = 12
     page_size_query_param = 'post_size'
     max_page_size = 24
+    cursor_pagination_class = PostCursorPagination
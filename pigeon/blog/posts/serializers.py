@@ -2,19 +2,22 @@ from django.contrib.auth.models import User
 from rest_framework import serializers, status
 
 from pigeon.auth.serializers import UserSerializer
+from pigeon.blog.channels.membership import ChannelMembership
 from pigeon.blog.channels.serializers import ChannelSerializer
 from pigeon.blog.images.serializers import PostImageSerializer
 from pigeon.blog.utils.utils import BlogSerializerUtils
 from pigeon.blog.tags.serializers import PostTagSerializer
-from pigeon.models import Post, Channel, Tag, Comment, Like
+from pigeon.blog.tags.utils import TagUtils
+from pigeon.instrumentation.serializers import TimedSerializerMixin
+from pigeon.models import Post, Channel, Tag
 
 
-class PostSerializer(serializers.ModelSerializer):
+class PostSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     author = UserSerializer(many=False, read_only=True)
     tags = serializers.SerializerMethodField()
-    comments_count = serializers.SerializerMethodField()
+    comments_count = serializers.IntegerField(read_only=True)
     post_images = PostImageSerializer(many=True, read_only=True)
-    likes_count = serializers.SerializerMethodField()
+    likes_count = serializers.IntegerField(read_only=True)
     """
     class for serializing Post model
     """
@@ -42,8 +45,8 @@ class PostSerializer(serializers.ModelSerializer):
 
     def to_representation(self, instance: Post):
         user = self.get_user_from_request()
-        channel_serializer = ChannelSerializer(context={'request': self.context['request']})
         self.fields['author'] = UserSerializer(many=False, read_only=True, allow_null=False)
+        channel_serializer = ChannelSerializer(context={'request': self.context['request']})
         has_access = channel_serializer.get_has_access(instance.channel)
         if has_access:
             return super(PostSerializer, self).to_representation(instance)
@@ -60,21 +63,16 @@ class PostSerializer(serializers.ModelSerializer):
         return post
 
     def get_tags(self, post: Post):
-        tags = Tag.objects.filter(post=post.id)
+        tags = post.tag_set.all() if post.pk else Tag.objects.none()
         serializer = PostTagSerializer(tags, many=True)
         return serializer.data
 
-    def get_comments_count(self, post: Post):
-        return Comment.objects.filter(post=post.id).count()
-
-    def get_likes_count(self, post: Post):
-        return Like.objects.filter(post=post.id).count()
-
     def validate(self, attrs):
         author = attrs['author']
         channel = attrs.get('channel')
         request_user = self.get_user_from_request()
-        if channel is not None and author not in channel.channel_access.all() and request_user != channel.owner:
+        if (channel is not None and not ChannelMembership.is_member(author, channel.id)
+                and request_user != channel.owner):
             raise serializers.ValidationError(detail=f'User {author} not part of channel with id {channel.id}')
         return attrs
 
@@ -83,7 +81,7 @@ class PostSerializer(serializers.ModelSerializer):
         post = self.instance
         post_channel = post.channel
         if user == post.author \
-                and user in post_channel.channel_access.all() \
+                and ChannelMembership.is_member(user, post_channel.id, self.context['request']) \
                 or user == post_channel.owner:
             return post.delete()
         raise serializers.ValidationError(detail=f'User {user} not part of channel with id {post_channel.id}')
@@ -92,28 +90,16 @@ class PostSerializer(serializers.ModelSerializer):
         user = self.context['request'].user
         post_channel = instance.channel
         if user == instance.author \
-                and user in post_channel.channel_access.all() \
+                and ChannelMembership.is_member(user, post_channel.id, self.context['request']) \
                 or user == post_channel.owner:
             tag_list_data = self.context['request'].data['tags']
             tags = [Tag(**tag_data) for tag_data in tag_list_data]
-            post_tags = Tag.objects.filter(post=instance.id)
-            for tag in post_tags:
-                if tag not in tags:
-                    tag = Tag.objects.get(id=tag.id)
-                    tag.post.remove(instance)
-            self.link_tags(instance, tags)
+            self.link_tags(instance, tags, remove_stale=True)
             return super(PostSerializer, self).update(instance, validated_data)
         raise serializers.ValidationError(detail=f'User {user} not part of channel with id {post_channel.id}')
 
-    def link_tags(self, post: Post, tags_to_be_added: list):
-        # get all tags which have same names as in request
-        existing_tags = Tag.objects.filter(name__in=[tag.name for tag in tags_to_be_added])
-        for tag in tags_to_be_added:
-            existing_tag = existing_tags.filter(name=tag.name).first()
-            if not existing_tag:
-                existing_tag = tag
-                existing_tag.save()
-            existing_tag.post.add(post.id)
+    def link_tags(self, post: Post, tags_to_be_added: list, remove_stale: bool = False):
+        TagUtils.link_tags(post, 'post', [tag.name for tag in tags_to_be_added], remove_stale)
 
 
 class GlobalPostSerializer(PostSerializer):
@@ -151,12 +137,31 @@ class GlobalPostSerializer(PostSerializer):
         if user == instance.author:
             tag_list_data = self.context['request'].data['tags']
             request_tags = [Tag(**tag_data) for tag_data in tag_list_data]
-            post_tags = Tag.objects.filter(post=instance.id)
-            for tag in post_tags:
-                if tag not in request_tags:
-                    tag = Tag.objects.get(id=tag.id)
-                    tag.post.remove(instance)
-            self.link_tags(instance, request_tags)
+            self.link_tags(instance, request_tags, remove_stale=True)
             return super(PostSerializer, self).update(instance, validated_data)
         raise serializers.ValidationError(detail=f'User {user} not autor of post with id {instance.id}',
                                           code=status.HTTP_401_UNAUTHORIZED)
+
+
+class TimelinePostSerializer(GlobalPostSerializer):
+    """
+    class for serializing posts of timeline, access to channels is checked when timeline is built
+    """
+
+    class Meta:
+        model = Post
+        fields = ["id", "body", "title", "author", "channel", "post_images", "created_at", "tags", "comments_count",
+                  "likes_count"]
+
+
+class BulkTagSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=100)
+
+
+class BulkPostSerializer(serializers.Serializer):
+    """
+    class for validating posts of bulk import, author and channel are taken from request
+    """
+    title = serializers.CharField(max_length=50)
+    body = serializers.CharField()
+    tags = BulkTagSerializer(many=True, required=False)
@@ -1,16 +1,28 @@
+import asyncio
+import json
 import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from unittest import mock
 from unittest.mock import patch
 
+from asgiref.sync import async_to_sync
 from django.contrib.auth.models import User
+from django.db import connection
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from model_bakery import baker
 from rest_framework.reverse import reverse
-from rest_framework.test import APIClient, APIRequestFactory, APITestCase
+from rest_framework.test import APIClient, APIRequestFactory, APITestCase, force_authenticate
 
 from pigeon.blog.images.serializers import  PostImageSerializer
+from pigeon.blog.images.tests import make_jpeg
 from pigeon.blog.posts.serializers import GlobalPostSerializer, PostSerializer
+from pigeon.blog.posts.views import PostViewSet
 from pigeon.blog.tags.serializers import PostTagSerializer
-from pigeon.models import Post, Image, Like, PostImage
+from pigeon.models import Post, Image, Job, Like, PostImage, Tag
 
 
 class TestPostView(APITestCase):
@@ -316,6 +328,7 @@ class TestPostView(APITestCase):
         response = self.client.post(url)
         # then
         self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'liked': True, 'likes_count': 1})
         self.assertEqual(Like.objects.count(), 1)
         self.assertEqual(Like.objects.get().post.id, post.id)
         self.assertEqual(Like.objects.get().user.id, self.user.id)
@@ -328,7 +341,8 @@ class TestPostView(APITestCase):
         url = reverse('posts-like', args=[post.id])
         response = self.client.post(url)
         # then
-        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'liked': False, 'likes_count': 0})
         self.assertEqual(Like.objects.count(), 0)
 
     def test_should_return_likes_count(self):
@@ -341,3 +355,520 @@ class TestPostView(APITestCase):
         # then
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.data['likes_count'], 1)
+
+    @patch('django.db.models.fields.files.FieldFile.url')
+    def test_global_feed_should_run_constant_number_of_queries(self, mock_url):
+        # given
+        mock_url.return_value = 'some_url'
+        posts = baker.make('pigeon.Post', _quantity=12)
+        for post in posts:
+            baker.make('pigeon.Comment', post=post, _quantity=2)
+            baker.make('pigeon.Like', post=post)
+            baker.make('pigeon.Tag', post=[post])
+            baker.make('pigeon.PostImage', post=post, image='image.jpg')
+        url = reverse('posts-list')
+        # when
+        for page_size in (2, 12):
+            with self.assertNumQueries(5):
+                response = self.client.get(f'{url}?post_size={page_size}')
+            # then
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['results']), page_size)
+            self.assertEqual(response.data['results'][0]['comments_count'], 2)
+            self.assertEqual(response.data['results'][0]['likes_count'], 1)
+            self.assertEqual(len(response.data['results'][0]['tags']), 1)
+
+    def test_channel_feed_should_run_constant_number_of_queries(self):
+        # given
+        channel = baker.make('pigeon.Channel', channel_access=[self.user, ])
+        posts = baker.make('pigeon.Post', channel=channel, _quantity=12)
+        for post in posts:
+            baker.make('pigeon.Comment', post=post)
+            baker.make('pigeon.Tag', post=[post])
+        url = reverse('posts-list')
+        # when
+        for page_size in (2, 12):
+            with self.assertNumQueries(6):
+                response = self.client.get(f'{url}?channel={channel.id}&post_size={page_size}')
+            # then
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['results']), page_size)
+            self.assertEqual(response.data['results'][0]['comments_count'], 1)
+
+    def test_should_paginate_channel_posts_by_cursor_when_requested(self):
+        # given
+        channel = baker.make('pigeon.Channel', channel_access=[self.user, ])
+        posts = baker.make('pigeon.Post', channel=channel, _quantity=5)
+        url = f"{reverse('posts-list')}?channel={channel.id}&pagination=cursor&post_size=2"
+        ids = []
+        # when
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [post['id'] for post in response.data['results']]
+            url = response.data['next']
+        # then
+        self.assertEqual(ids, [post.id for post in posts])
+
+    def test_like_should_update_likes_counter(self):
+        # given
+        post = baker.make('pigeon.Post')
+        url = reverse('posts-like', args=[post.id])
+        # when
+        self.client.post(url)
+        post.refresh_from_db()
+        likes_after_like = post.likes_count
+        self.client.post(url)
+        post.refresh_from_db()
+        # then
+        self.assertEqual(likes_after_like, 1)
+        self.assertEqual(post.likes_count, 0)
+
+    def test_post_create_and_delete_should_update_channel_posts_counter(self):
+        # given
+        channel = baker.make('pigeon.Channel', channel_access=[self.user, ])
+        post = baker.make('pigeon.Post', author=self.user, channel=channel)
+        channel.refresh_from_db()
+        posts_after_create = channel.posts_count
+        # when
+        url = reverse('posts-detail', args=[post.id])
+        self.client.delete(f'{url}?channel={channel.id}')
+        channel.refresh_from_db()
+        # then
+        self.assertEqual(posts_after_create, 1)
+        self.assertEqual(channel.posts_count, 0)
+
+    def test_post_delete_should_notify_feed_once_regardless_of_comments_and_likes(self):
+        # given
+        channel = baker.make('pigeon.Channel', channel_access=[self.user, ])
+        post = baker.make('pigeon.Post', author=self.user, channel=channel)
+        baker.make('pigeon.Comment', post=post, _quantity=3)
+        baker.make('pigeon.Like', post=post, _quantity=3)
+        broker = mock.Mock()
+        url = reverse('posts-detail', args=[post.id])
+        # when
+        with patch('pigeon.realtime.events.get_broker', return_value=broker), \
+                patch('pigeon.signals.FeedVersion.touch') as touch, \
+                self.captureOnCommitCallbacks(execute=True), \
+                CaptureQueriesContext(connection) as queries:
+            response = self.client.delete(f'{url}?channel={channel.id}')
+        # then
+        self.assertEqual(response.status_code, 200)
+        touch.assert_called_once()
+        broker.publish.assert_called_once()
+        self.assertEqual(broker.publish.call_args[0][1]['type'], 'post.deleted')
+        self.assertFalse([query for query in queries if query['sql'].startswith('UPDATE "pigeon_post"')])
+
+    def test_moving_post_to_other_channel_should_update_posts_counters_of_both_channels(self):
+        # given
+        channel = baker.make('pigeon.Channel')
+        other_channel = baker.make('pigeon.Channel')
+        post = Post.objects.get(id=baker.make('pigeon.Post', author=self.user, channel=channel).id)
+        # when
+        post.channel = other_channel
+        post.save()
+        post.save()
+        channel.refresh_from_db()
+        other_channel.refresh_from_db()
+        # then
+        self.assertEqual((channel.posts_count, other_channel.posts_count), (0, 1))
+
+    def test_should_throw_404_when_liking_not_existing_post(self):
+        # when
+        response = self.client.post(reverse('posts-like', args=[1]))
+        # then
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(Like.objects.count(), 0)
+
+
+    def test_should_filter_channel_feed_by_all_tags(self):
+        # given
+        channel = baker.make('pigeon.Channel', channel_access=[self.user, ])
+        both, first_only = baker.make('pigeon.Post', channel=channel, _quantity=2)
+        baker.make('pigeon.Tag', name='first', post=[both, first_only])
+        baker.make('pigeon.Tag', name='second', post=[both])
+        url = reverse('posts-list')
+        # when
+        response = self.client.get(url, {'channel': channel.id, 'tags': 'first,second'})
+        # then
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([post['id'] for post in response.data['results']], [both.id])
+
+    def test_should_filter_global_feed_by_any_tag(self):
+        # given
+        first, second, untagged = baker.make('pigeon.Post', _quantity=3)
+        baker.make('pigeon.Tag', name='first', post=[first])
+        baker.make('pigeon.Tag', name='second', post=[second])
+        url = reverse('posts-list')
+        # when
+        response = self.client.get(url, {'tags': 'first,second', 'tags_mode': 'any'})
+        # then
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([post['id'] for post in response.data['results']], [first.id, second.id])
+
+    def test_should_throw_400_when_tags_mode_unknown(self):
+        # when
+        response = self.client.get(reverse('posts-list'), {'tags': 'first', 'tags_mode': 'some'})
+        # then
+        self.assertEqual(response.status_code, 400)
+
+
+    def test_should_upload_post_images_by_job(self):
+        # given
+        image = SimpleUploadedFile('photo.jpg', make_jpeg(800, 600), content_type='image/jpeg')
+        # when
+        response = self.client.post(reverse('posts-list'), data={'title': 'title', 'body': 'body', 'images': [image]},
+                                    format='multipart')
+        # then
+        self.assertEqual(response.status_code, 200)
+        post_image = PostImage.objects.get()
+        self.assertEqual(post_image.status, PostImage.READY)
+        self.assertEqual((post_image.width, post_image.height), (800, 600))
+        self.assertEqual(sorted(response.data['post_images'][0]['variants']['webp']), ['320', '640'])
+
+    @override_settings(JOBS_EAGER=False)
+    def test_should_create_pending_image_and_queue_job(self):
+        # given
+        image = SimpleUploadedFile('photo.jpg', make_jpeg(100, 100), content_type='image/jpeg')
+        # when
+        response = self.client.post(reverse('posts-list'), data={'title': 'title', 'body': 'body', 'images': [image]},
+                                    format='multipart')
+        # then
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['post_images'][0]['status'], PostImage.PENDING)
+        self.assertIsNone(response.data['post_images'][0]['image'])
+        self.assertEqual(Job.objects.get().name, 'process_image')
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+                   CHANNEL_MEMBERSHIP_CACHE_TIMEOUT=60)
+class TestPostConditionalGet(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = baker.make('User')
+        cls.channel = baker.make('pigeon.Channel', channel_access=[cls.user, ])
+        cls.post = baker.make('pigeon.Post', channel=cls.channel)
+        cls.url = reverse('posts-list')
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def test_should_return_304_when_channel_feed_not_modified(self):
+        # given
+        etag = self.client.get(self.url, {'channel': self.channel.id})['ETag']
+        # when
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {'channel': self.channel.id}, HTTP_IF_NONE_MATCH=etag)
+        # then
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_should_return_200_when_post_in_channel_liked(self):
+        # given
+        etag = self.client.get(self.url, {'channel': self.channel.id})['ETag']
+        self.client.post(reverse('posts-like', args=[self.post.id]))
+        # when
+        response = self.client.get(self.url, {'channel': self.channel.id}, HTTP_IF_NONE_MATCH=etag)
+        # then
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['likes_count'], 1)
+
+    def test_should_return_304_when_global_feed_not_modified(self):
+        # given
+        baker.make('pigeon.Post')
+        etag = self.client.get(self.url)['ETag']
+        # when
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        # then
+        self.assertEqual(response.status_code, 304)
+        self.assertNotIn('Last-Modified', response)
+
+    def test_should_return_200_when_global_feed_modified_through_other_process(self):
+        # given
+        worker_caches = [{'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': name}}
+                         for name in ('first-worker', 'second-worker')]
+        with override_settings(CACHES=worker_caches[0]):
+            etag = self.client.get(self.url)['ETag']
+        with override_settings(CACHES=worker_caches[1]):
+            baker.make('pigeon.Post')
+        # when
+        with override_settings(CACHES=worker_caches[0]):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        # then
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+    def test_should_return_200_when_global_post_commented(self):
+        # given
+        post = baker.make('pigeon.Post')
+        etag = self.client.get(self.url)['ETag']
+        baker.make('pigeon.Comment', post=post)
+        # when
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        # then
+        self.assertEqual(response.status_code, 200)
+
+    def test_should_not_share_etag_between_users(self):
+        # given
+        etag = self.client.get(self.url, {'channel': self.channel.id})['ETag']
+        self.client.force_authenticate(baker.make('User'))
+        # when
+        response = self.client.get(self.url, {'channel': self.channel.id}, HTTP_IF_NONE_MATCH=etag)
+        # then
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class TestGlobalFeedCache(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = baker.make('User')
+        cls.post = baker.make('pigeon.Post')
+        cls.url = reverse('posts-list')
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def test_should_serve_global_feed_page_from_cache(self):
+        # given
+        first = self.client.get(self.url, {'post_size': 2})
+        # when
+        with self.assertNumQueries(1):
+            second = self.client.get(self.url, {'post_size': 2})
+        # then
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.data, first.data)
+
+    def test_should_invalidate_cache_when_global_post_liked(self):
+        # given
+        self.client.get(self.url)
+        self.client.post(reverse('posts-like', args=[self.post.id]))
+        # when
+        response = self.client.get(self.url)
+        # then
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['likes_count'], 1)
+
+    def test_should_invalidate_cache_when_global_post_tagged(self):
+        # given
+        self.client.get(self.url)
+        baker.make('pigeon.Tag', post=[self.post])
+        # when
+        response = self.client.get(self.url)
+        # then
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.data['results'][0]['tags']), 1)
+
+    def test_should_keep_cache_when_channel_post_commented(self):
+        # given
+        channel_post = baker.make('pigeon.Post', channel=baker.make('pigeon.Channel'))
+        self.client.get(self.url)
+        # when
+        baker.make('pigeon.Comment', post=channel_post)
+        response = self.client.get(self.url)
+        # then
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+    def test_should_bypass_cache_when_filtered_by_tags(self):
+        # when
+        response = self.client.get(self.url, {'tags': 'some'})
+        # then
+        self.assertFalse(response.has_header('X-Cache'))
+
+    def test_should_return_cache_stats_to_admin(self):
+        # given
+        self.client.get(self.url)
+        self.client.get(self.url)
+        self.client.force_authenticate(baker.make('User', is_staff=True))
+        # when
+        response = self.client.get(reverse('posts-cache-stats'))
+        # then
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'hits': 1, 'misses': 1, 'hit_ratio': 0.5})
+
+
+class TestPostBulkCreate(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = baker.make('User')
+        cls.channel = baker.make('pigeon.Channel', channel_access=[cls.user, ])
+        cls.url = reverse('posts-bulk')
+
+    def setUp(self) -> None:
+        self.client.force_authenticate(self.user)
+
+    def make_posts(self, count: int) -> list:
+        return [{'title': f'title {i}', 'body': 'body', 'tags': [{'name': 'import'}, {'name': f'tag {i % 2}'}]}
+                for i in range(count)]
+
+    def test_should_create_posts_with_tags_in_channel(self):
+        # when
+        response = self.client.post(f'{self.url}?channel={self.channel.id}', data={'posts': self.make_posts(3)},
+                                    format='json')
+        # then
+        self.assertEqual(response.status_code, 201)
+        posts = Post.objects.filter(id__in=response.data['ids']).order_by('id')
+        self.assertEqual([post.title for post in posts], ['title 0', 'title 1', 'title 2'])
+        self.assertTrue(all(post.channel_id == self.channel.id and post.author == self.user for post in posts))
+        self.assertEqual(sorted(posts[1].tag_set.values_list('name', flat=True)), ['import', 'tag 1'])
+        self.assertEqual(dict(Tag.objects.values_list('name', 'usage_count')), {'import': 3, 'tag 0': 2, 'tag 1': 1})
+        self.channel.refresh_from_db()
+        self.assertEqual(self.channel.posts_count, 3)
+
+    def test_should_publish_single_event_and_touch_feed_once_per_import(self):
+        # given
+        broker = mock.Mock()
+        # when
+        with patch('pigeon.realtime.events.get_broker', return_value=broker), \
+                patch('pigeon.blog.posts.utils.FeedVersion.touch') as touch, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'{self.url}?channel={self.channel.id}', data={'posts': self.make_posts(3)},
+                                        format='json')
+        # then
+        self.assertEqual(response.status_code, 201)
+        touch.assert_called_once_with([self.channel.id])
+        broker.publish.assert_called_once_with(f'feed:channel:{self.channel.id}', {
+            'type': 'posts.imported',
+            'data': {'channel_id': self.channel.id, 'author_id': self.user.id, 'ids': response.data['ids']}})
+
+    def test_should_create_posts_in_constant_number_of_queries(self):
+        # given
+        baker.make('pigeon.Tag', name='import')
+        baker.make('pigeon.Tag', name='tag 0')
+        baker.make('pigeon.Tag', name='tag 1')
+        with CaptureQueriesContext(connection) as few:
+            self.client.post(self.url, data={'posts': self.make_posts(2)}, format='json')
+        # when
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.post(self.url, data={'posts': self.make_posts(50)}, format='json')
+        # then
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Post.objects.filter(channel=None).count(), 52)
+        self.assertEqual(len(many), len(few))
+
+    def test_should_throw_400_and_create_nothing_when_any_post_invalid(self):
+        # given
+        posts = self.make_posts(2) + [{'title': 'title'}]
+        # when
+        response = self.client.post(self.url, data={'posts': posts}, format='json')
+        # then
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Post.objects.count(), 0)
+
+    @override_settings(POSTS_BULK_MAX_SIZE=2)
+    def test_should_throw_400_when_too_many_posts(self):
+        # when
+        response = self.client.post(self.url, data={'posts': self.make_posts(3)}, format='json')
+        # then
+        self.assertEqual(response.status_code, 400)
+
+    def test_should_throw_400_when_user_not_part_of_channel(self):
+        # given
+        channel = baker.make('pigeon.Channel')
+        # when
+        response = self.client.post(f'{self.url}?channel={channel.id}', data={'posts': self.make_posts(1)},
+                                    format='json')
+        # then
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Post.objects.count(), 0)
+
+    @override_settings(JOBS_EAGER=False)
+    def test_should_queue_jobs_of_post_images_with_single_insert(self):
+        # given
+        images = [SimpleUploadedFile(f'photo{i}.jpg', make_jpeg(10, 10), content_type='image/jpeg') for i in range(3)]
+        # when
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('posts-list'), data={'title': 'title', 'body': 'body',
+                                                                     'images': images}, format='multipart')
+        # then
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Job.objects.filter(name='process_image').count(), 3)
+        self.assertEqual(len([query for query in queries if query['sql'].startswith('INSERT INTO "pigeon_job"')]), 1)
+        self.assertEqual(len([query for query in queries
+                              if query['sql'].startswith('INSERT INTO "pigeon_postimage"')]), 1)
+        self.assertEqual(sorted(job.payload['id'] for job in Job.objects.filter(name='process_image')),
+                         list(PostImage.objects.order_by('id').values_list('id', flat=True)))
+
+    def test_should_not_leave_post_when_staging_images_fails(self):
+        # given
+        image = SimpleUploadedFile('photo.jpg', make_jpeg(10, 10), content_type='image/jpeg')
+        # when
+        with patch('pigeon.blog.images.utils.enqueue_many', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.client.post(reverse('posts-list'), data={'title': 'title', 'body': 'body', 'images': [image]},
+                                 format='multipart')
+        # then
+        self.assertEqual(Post.objects.count(), 0)
+        self.assertEqual(PostImage.objects.count(), 0)
+
+
+@override_settings(ASYNC_READ_VIEWS=True)
+class TestAsyncPostViews(TransactionTestCase):
+    def setUp(self) -> None:
+        self.user = baker.make('User')
+        self.factory = APIRequestFactory()
+
+    def test_should_serve_feed_from_coroutine_view_in_thread_pool(self):
+        # given
+        baker.make('pigeon.Post', _quantity=2)
+        view = PostViewSet.as_view({'get': 'list', 'post': 'create'})
+        request = self.factory.get(reverse('posts-list'))
+        force_authenticate(request, self.user)
+        # when
+        response = async_to_sync(view)(request)
+        # then
+        self.assertTrue(asyncio.iscoroutinefunction(view))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(json.loads(response.content)['results']), 2)
+
+    def test_should_keep_sync_view_for_writes_only_routes(self):
+        # when
+        view = PostViewSet.as_view({'post': 'like'})
+        # then
+        self.assertFalse(asyncio.iscoroutinefunction(view))
+
+
+class TestPostLikeConcurrency(TransactionTestCase):
+    threads = 8
+
+    def like_concurrently(self, post: Post, users: list):
+        barrier = threading.Barrier(len(users))
+
+        def like(user):
+            client = APIClient()
+            client.force_authenticate(user)
+            barrier.wait()
+            try:
+                return client.post(reverse('posts-like', args=[post.id])).status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=len(users)) as executor:
+            return list(executor.map(like, users))
+
+    def test_concurrent_likes_of_different_users_should_all_be_counted(self):
+        # given
+        users = baker.make('User', _quantity=self.threads)
+        post = baker.make('pigeon.Post')
+        # when
+        statuses = self.like_concurrently(post, users)
+        post.refresh_from_db()
+        # then
+        self.assertEqual(statuses, [200] * self.threads)
+        self.assertEqual(Like.objects.filter(post=post).count(), self.threads)
+        self.assertEqual(post.likes_count, self.threads)
+
+    def test_concurrent_taps_of_same_user_should_not_duplicate_like(self):
+        # given
+        user = baker.make('User')
+        post = baker.make('pigeon.Post')
+        # when
+        self.like_concurrently(post, [user] * self.threads)
+        post.refresh_from_db()
+        # then
+        self.assertLessEqual(Like.objects.filter(post=post).count(), 1)
+        self.assertEqual(post.likes_count, Like.objects.filter(post=post).count())
@@ -0,0 +1,46 @@
+from typing import List, Optional
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import F, Max
+
+from pigeon.blog.tags.utils import TagUtils
+from pigeon.blog.utils.conditional import FeedVersion
+from pigeon.models import Channel, Post
+from pigeon.realtime.events import publish_event
+
+
+class PostUtils:
+    @staticmethod
+    def bulk_create_posts(author: User, channel: Optional[Channel], posts_data: list) -> List[Post]:
+        """
+        Insert posts with their tags in constant number of queries regardless of posts count, has to run in transaction.
+        bulk_create does not send post_save, so posts count of channel, feed version and realtime event
+        are updated here instead of signal receivers, subscribers get single posts.imported event with ids of posts
+        :param author: author of all posts
+        :param channel: channel of all posts, None for global feed
+        :param posts_data: validated data of BulkPostSerializer, dicts with title, body and tags
+        :return: created posts in order of posts_data
+        """
+        channel_id = channel.id if channel is not None else None
+        posts = [Post(author=author, channel_id=channel_id, title=post_data['title'], body=post_data['body'])
+                 for post_data in posts_data]
+        if connection.features.can_return_rows_from_bulk_insert:
+            Post.objects.bulk_create(posts, batch_size=settings.POSTS_BULK_BATCH_SIZE)
+        else:
+            # without INSERT ... RETURNING (SQLite) ids are read back, transaction holds write lock of database,
+            # so posts of author newer than last id before insert are exactly inserted ones
+            last_id = Post.objects.aggregate(last_id=Max('id'))['last_id'] or 0
+            Post.objects.bulk_create(posts, batch_size=settings.POSTS_BULK_BATCH_SIZE)
+            ids = Post.objects.filter(id__gt=last_id, author=author).order_by('id').values_list('id', flat=True)
+            for post, post_id in zip(posts, ids):
+                post.id = post_id
+        TagUtils.bulk_link_tags(posts, 'post', [[tag['name'] for tag in post_data.get('tags', [])]
+                                                for post_data in posts_data])
+        if channel_id is not None:
+            Channel.objects.filter(id=channel_id).update(posts_count=F('posts_count') + len(posts))
+        FeedVersion.touch([channel_id])
+        publish_event(channel_id, 'posts.imported', {'channel_id': channel_id, 'author_id': author.id,
+                                                     'ids': [post.id for post in posts]})
+        return posts
@@ -1,22 +1,33 @@
+from django.conf import settings
+from django.db import transaction
 from rest_framework import viewsets
 from rest_framework.decorators import action
-from rest_framework.exceptions import ValidationError
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import ValidationError, NotFound
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.status import *
 
+from pigeon.blog.channels.membership import ChannelMembership
 from pigeon.blog.channels.serializers import ChannelSerializer
+from pigeon.blog.images.uploads import BoundedUploadMixin
+from pigeon.blog.images.utils import ImageUtils
+from pigeon.blog.posts.cache import GlobalFeedCache
 from pigeon.blog.posts.pagination import PostPagination
-from pigeon.blog.posts.serializers import PostSerializer, GlobalPostSerializer
+from pigeon.blog.posts.serializers import PostSerializer, GlobalPostSerializer, BulkPostSerializer
+from pigeon.blog.posts.utils import PostUtils
+from pigeon.blog.tags.utils import TagUtils
+from pigeon.blog.utils.asynchronous import AsyncReadMixin
+from pigeon.blog.utils.conditional import ConditionalGetMixin, FeedVersion
 from pigeon.models import Post, Channel, Image, Like, PostImage
 
 
-class PostViewSet(viewsets.ModelViewSet):
+class PostViewSet(AsyncReadMixin, BoundedUploadMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """
     View for posts
     """
     permission_classes = [IsAuthenticated]
+    async_actions = ('list',)
     pagination_class = PostPagination
 
     def get_serializer_class(self):
@@ -24,42 +35,103 @@ class PostViewSet(viewsets.ModelViewSet):
             return PostSerializer
         return GlobalPostSerializer
 
+    def get_channel(self):
+        """
+        Channel of feed from ?channel= query param, loaded once per request
+        """
+        if not hasattr(self, '_channel'):
+            channel_id = self.request.query_params.get('channel')
+            self._channel = Channel.objects.get(id=channel_id) if channel_id else None
+        return self._channel
+
     def get_queryset(self):
         if self.get_serializer_class() == PostSerializer:
             channel_serializer = ChannelSerializer(context={'request': self.request})
-            channel = Channel.objects.get(id=self.request.query_params.get('channel'))
+            channel = self.get_channel()
             has_access = channel_serializer.get_has_access(channel)
             if not has_access:
                 raise ValidationError(
                     detail={"message": f'User {self.request.user} not part of channel with id {channel.id}'},
                     code=403)
-            return Post.objects.filter(channel_id=self.request.query_params.get('channel')).order_by('created_at')
-        return Post.objects.filter(channel_id=None).order_by('created_at')
+            posts = Post.objects.feed().filter(channel_id=channel.id)
+        else:
+            posts = Post.objects.feed().filter(channel_id=None)
+        return TagUtils.filter_by_request(posts, 'post', self.request).order_by('created_at')
 
     def list(self, request, *args, **kwargs):
         """
-        Get all posts
+        Get all posts, 304 when feed did not change since version client has,
+        pages of global feed are served from GlobalFeedCache
         """
         posts = self.get_queryset()
+        channel = self.get_channel()
+        last_modified = channel.modified_at if channel is not None else FeedVersion.get_global()
+        not_modified = self.get_not_modified_response(request, last_modified)
+        if not_modified is not None:
+            return not_modified
+        cache_key = GlobalFeedCache.get_cache_key(request, last_modified) if channel is None else None
+        if cache_key is not None:
+            data = GlobalFeedCache.get(cache_key)
+            if data is not None:
+                return Response(data, headers={'X-Cache': 'HIT'})
         page = self.paginate_queryset(posts)
         serializer = self.get_serializer(page, many=True,
                                          context={
                                              'request': request})
         if page is not None:
-            return self.get_paginated_response(serializer.data)
-        return Response(serializer.data)
+            response = self.get_paginated_response(serializer.data)
+        else:
+            response = Response(serializer.data)
+        if cache_key is not None:
+            GlobalFeedCache.set(cache_key, response.data)
+            response['X-Cache'] = 'MISS'
+        return response
 
+    @action(detail=False, methods=['get'], url_path='cache-stats', permission_classes=[IsAdminUser])
+    def cache_stats(self, request, *args, **kwargs) -> Response:
+        """
+        Get hits and misses of global feed cache
+        """
+        return Response(data=GlobalFeedCache.get_stats())
+
+    @transaction.atomic
     def create(self, request: Request, *args, **kwargs):
+        """
+        Create post with its tags and images in one transaction, failure of any part leaves no rows behind
+        """
         serializer = self.get_serializer(data=request.data, context={
             'request': request})
         serializer.is_valid(raise_exception=True)
         serializer.save()
         images = request.FILES.getlist('images')
-        for image in images:
-            photo = PostImage.objects.create(image=image, post=serializer.instance)
-            photo.save()
+        if images:
+            ImageUtils.stage_images(PostImage, images, post=serializer.instance)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['post'])
+    @transaction.atomic
+    def bulk(self, request: Request, *args, **kwargs) -> Response:
+        """
+        Import many posts in one request, body in format {"posts": [{"title": str, "body": str,
+        "tags": [{"name": str}]}]}. Posts go to channel from ?channel= query param, to global feed without it
+        :return: ids of created posts in order of request
+        """
+        posts_data = request.data.get('posts')
+        if not isinstance(posts_data, list) or not posts_data:
+            raise ValidationError(detail={"message": 'Request has to contain non empty list of posts'})
+        if len(posts_data) > settings.POSTS_BULK_MAX_SIZE:
+            raise ValidationError(detail={"message": f'Request can have at most {settings.POSTS_BULK_MAX_SIZE} posts'})
+        channel = self.get_channel()
+        if channel is not None and request.user != channel.owner \
+                and not ChannelMembership.is_member(request.user, channel.id, request):
+            raise ValidationError(detail={"message": f'User {request.user} not part of channel with id {channel.id}'},
+                                  code=403)
+        serializer = BulkPostSerializer(data=posts_data, many=True)
+        serializer.is_valid(raise_exception=True)
+        posts = PostUtils.bulk_create_posts(request.user, channel, serializer.validated_data)
+        return Response(data={'ids': [post.id for post in posts]}, status=HTTP_201_CREATED)
+
+    @transaction.atomic
     def destroy(self, request: Request, *args, **kwargs):
         post = Post.objects.get(id=kwargs.get('pk'))
         serializer = self.get_serializer(post)
@@ -67,13 +139,15 @@ class PostViewSet(viewsets.ModelViewSet):
         return Response(status=HTTP_200_OK)
 
     @action(detail=True, methods=['post'])
+    @transaction.atomic
     def like(self, request, *args, **kwargs) -> Response:
-        user = self.request.user
-        post = Post.objects.get(id=kwargs.get('pk'))
-        like = Like.objects.filter(user=user, post=post).first()
-        if not like:
-            like = Like.objects.create(post=post, user=user)
-            like.save()
-            return Response(status=HTTP_200_OK)
-        like.delete()
-        return Response(status=HTTP_204_NO_CONTENT)
+        """
+        Toggle like of post
+        :return: like state of user and likes count of post after toggle
+        """
+        post_id = kwargs.get('pk')
+        liked = Like.objects.toggle(self.request.user, post_id)
+        likes_count = Post.objects.filter(id=post_id).values_list('likes_count', flat=True).first()
+        if likes_count is None:
+            raise NotFound(detail={"message": f'Post not found with id {post_id}'})
+        return Response(data={'liked': liked, 'likes_count': likes_count}, status=HTTP_200_OK)
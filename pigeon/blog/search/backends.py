@@ -0,0 +1,118 @@
+from django.db import connection
+
+"""
+Ranked full text lookups over index created by migration 0024_search_index,
+every lookup returns list of (id, rank) pairs ordered from most relevant, rank is higher for better match
+"""
+
+
+class SearchBackend:
+    def search(self, sql: str, params: list) -> list:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def search_posts(self, query: str, channel_ids: list, user_id: int, limit: int) -> list:
+        """
+        Search posts from global feed, channels with given ids and channels owned by user
+        """
+        raise NotImplementedError
+
+    def search_comments(self, query: str, channel_ids: list, user_id: int, limit: int) -> list:
+        """
+        Search comments of posts user has access to, same rules as for posts
+        """
+        raise NotImplementedError
+
+    def search_channels(self, query: str, limit: int) -> list:
+        raise NotImplementedError
+
+
+class PostgresSearchBackend(SearchBackend):
+    """
+    Lookups over generated tsvector columns with GIN indexes
+    """
+    query_sql = "websearch_to_tsquery('simple', %s)"
+
+    def search_posts(self, query: str, channel_ids: list, user_id: int, limit: int) -> list:
+        return self.search(f"""
+            SELECT post.id, ts_rank(post.search_vector, query) AS rank
+            FROM pigeon_post post, {self.query_sql} query
+            WHERE post.search_vector @@ query
+              AND (post.channel_id IS NULL OR post.channel_id = ANY(%s)
+                   OR post.channel_id IN (SELECT id FROM pigeon_channel WHERE owner_id = %s))
+            ORDER BY rank DESC, post.id DESC
+            LIMIT %s""", [query, list(channel_ids), user_id, limit])
+
+    def search_comments(self, query: str, channel_ids: list, user_id: int, limit: int) -> list:
+        return self.search(f"""
+            SELECT comment.id, ts_rank(comment.search_vector, query) AS rank
+            FROM pigeon_comment comment
+            JOIN pigeon_post post ON post.id = comment.post_id, {self.query_sql} query
+            WHERE comment.search_vector @@ query
+              AND (post.channel_id IS NULL OR post.channel_id = ANY(%s)
+                   OR post.channel_id IN (SELECT id FROM pigeon_channel WHERE owner_id = %s))
+            ORDER BY rank DESC, comment.id DESC
+            LIMIT %s""", [query, list(channel_ids), user_id, limit])
+
+    def search_channels(self, query: str, limit: int) -> list:
+        return self.search(f"""
+            SELECT channel.id, ts_rank(channel.search_vector, query) AS rank
+            FROM pigeon_channel channel, {self.query_sql} query
+            WHERE channel.search_vector @@ query
+            ORDER BY rank DESC, channel.id DESC
+            LIMIT %s""", [query, limit])
+
+
+class SqliteSearchBackend(SearchBackend):
+    """
+    Lookups over FTS5 tables, used by test runs, bm25() is negated so that higher rank means better match
+    """
+
+    def to_match_expression(self, query: str) -> str:
+        """
+        Quote every word of query, so user input can not be parsed as FTS5 query syntax
+        """
+        words = query.split()
+        return ' '.join('"{}"'.format(word.replace('"', '""')) for word in words)
+
+    def get_access_filter(self, channel_ids: list) -> str:
+        placeholders = ', '.join(['%s'] * len(channel_ids))
+        return f"""(post.channel_id IS NULL OR post.channel_id IN ({placeholders or 'NULL'})
+                   OR post.channel_id IN (SELECT id FROM pigeon_channel WHERE owner_id = %s))"""
+
+    def search_posts(self, query: str, channel_ids: list, user_id: int, limit: int) -> list:
+        return self.search(f"""
+            SELECT post.id, -bm25(pigeon_post_fts, 10.0, 1.0) AS rank
+            FROM pigeon_post_fts
+            JOIN pigeon_post post ON post.id = pigeon_post_fts.rowid
+            WHERE pigeon_post_fts MATCH %s AND {self.get_access_filter(channel_ids)}
+            ORDER BY rank DESC, post.id DESC
+            LIMIT %s""", [self.to_match_expression(query), *channel_ids, user_id, limit])
+
+    def search_comments(self, query: str, channel_ids: list, user_id: int, limit: int) -> list:
+        return self.search(f"""
+            SELECT comment.id, -bm25(pigeon_comment_fts) AS rank
+            FROM pigeon_comment_fts
+            JOIN pigeon_comment comment ON comment.id = pigeon_comment_fts.rowid
+            JOIN pigeon_post post ON post.id = comment.post_id
+            WHERE pigeon_comment_fts MATCH %s AND {self.get_access_filter(channel_ids)}
+            ORDER BY rank DESC, comment.id DESC
+            LIMIT %s""", [self.to_match_expression(query), *channel_ids, user_id, limit])
+
+    def search_channels(self, query: str, limit: int) -> list:
+        return self.search("""
+            SELECT channel.id, -bm25(pigeon_channel_fts) AS rank
+            FROM pigeon_channel_fts
+            JOIN pigeon_channel channel ON channel.id = pigeon_channel_fts.rowid
+            WHERE pigeon_channel_fts MATCH %s
+            ORDER BY rank DESC, channel.id DESC
+            LIMIT %s""", [self.to_match_expression(query), limit])
+
+
+def get_search_backend():
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend()
+    if connection.vendor == 'sqlite':
+        return SqliteSearchBackend()
+    raise NotImplementedError(f'Full text search is not supported on {connection.vendor}')
@@ -0,0 +1,31 @@
+from rest_framework import serializers
+
+from pigeon.auth.serializers import UserSerializer
+from pigeon.blog.channels.serializers import ChannelSerializer
+from pigeon.blog.posts.serializers import GlobalPostSerializer
+from pigeon.instrumentation.serializers import TimedSerializerMixin
+from pigeon.models import Post, Comment
+
+
+class PostSearchSerializer(GlobalPostSerializer):
+    """
+    class for serializing found posts, access to them is checked by search query
+    """
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = Post
+        fields = GlobalPostSerializer.Meta.fields + ["channel", "rank"]
+
+
+class CommentSearchSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    user = UserSerializer(many=False, read_only=True)
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = Comment
+        fields = ["id", "body", "created_at", "post", "user", "rank"]
+
+
+class ChannelSearchSerializer(ChannelSerializer):
+    rank = serializers.FloatField(read_only=True)
@@ -0,0 +1,94 @@
+from django.contrib.auth.models import User
+from model_bakery import baker
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient, APITestCase
+
+
+class TestSearchView(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user_data = {
+            'email': 'some_email',
+            'username': 'some_username1',
+            'password': 'some_password'
+        }
+        cls.user = User.objects.create_user(**cls.user_data)
+        cls.search_url = reverse('search')
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_should_find_global_posts_ranked_by_relevance(self):
+        # given
+        body_match = baker.make('pigeon.Post', title='weekend', body='racing pigeons in spring')
+        title_match = baker.make('pigeon.Post', title='racing pigeons', body='results of weekend')
+        baker.make('pigeon.Post', title='other', body='nothing interesting')
+        # when
+        response = self.client.get(f'{self.search_url}?q=racing pigeons')
+        # then
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([post['id'] for post in response.data['posts']], [title_match.id, body_match.id])
+
+    def test_should_not_find_posts_from_channels_without_access(self):
+        # given
+        channel = baker.make('pigeon.Channel')
+        baker.make('pigeon.Post', title='secret', channel=channel)
+        # when
+        response = self.client.get(f'{self.search_url}?q=secret')
+        # then
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['posts'], [])
+
+    def test_should_find_posts_and_comments_from_joined_and_owned_channels(self):
+        # given
+        joined = baker.make('pigeon.Channel', channel_access=[self.user])
+        owned = baker.make('pigeon.Channel', owner=self.user)
+        joined_post = baker.make('pigeon.Post', title='loft', channel=joined)
+        owned_post = baker.make('pigeon.Post', title='loft', channel=owned)
+        comment = baker.make('pigeon.Comment', body='nice loft', post=joined_post)
+        # when
+        response = self.client.get(f'{self.search_url}?q=loft')
+        # then
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(post['id'] for post in response.data['posts']), [joined_post.id, owned_post.id])
+        self.assertEqual([found['id'] for found in response.data['comments']], [comment.id])
+
+    def test_should_find_channels_by_name(self):
+        # given
+        channel = baker.make('pigeon.Channel', name='Homing pigeons')
+        baker.make('pigeon.Channel', name='Fancy pigeons')
+        # when
+        response = self.client.get(f'{self.search_url}?q=homing&type=channels')
+        # then
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([found['id'] for found in response.data['channels']], [channel.id])
+        self.assertNotIn('posts', response.data)
+
+    def test_should_reflect_updated_and_deleted_posts(self):
+        # given
+        post = baker.make('pigeon.Post', title='before')
+        removed = baker.make('pigeon.Post', title='after')
+        post.title = 'after'
+        post.save()
+        removed.delete()
+        # when
+        response = self.client.get(f'{self.search_url}?q=after')
+        empty_response = self.client.get(f'{self.search_url}?q=before')
+        # then
+        self.assertEqual([found['id'] for found in response.data['posts']], [post.id])
+        self.assertEqual(empty_response.data['posts'], [])
+
+    def test_should_treat_query_syntax_as_words(self):
+        # given
+        baker.make('pigeon.Post', title='pigeon')
+        # when
+        response = self.client.get(f'{self.search_url}?q=pigeon" OR (')
+        # then
+        self.assertEqual(response.status_code, 200)
+
+    def test_should_throw_400_when_query_is_empty(self):
+        # when
+        response = self.client.get(self.search_url)
+        # then
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,10 @@
+from django.urls import path
+
+from pigeon.blog.search.views import SearchView
+
+"""
+Urls for search
+"""
+urlpatterns = [
+    path('', SearchView.as_view(), name='search'),
+]
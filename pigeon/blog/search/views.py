@@ -0,0 +1,65 @@
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.status import HTTP_400_BAD_REQUEST
+from rest_framework.views import APIView
+
+from pigeon.blog.channels.membership import ChannelMembership
+from pigeon.blog.search.backends import get_search_backend
+from pigeon.blog.search.serializers import PostSearchSerializer, CommentSearchSerializer, ChannelSearchSerializer
+from pigeon.models import Post, Comment, Channel
+
+
+class SearchView(APIView):
+    """
+    View for full text search over posts, comments and channels
+    """
+    permission_classes = [IsAuthenticated]
+    default_limit = 10
+    max_limit = 50
+    types = ('posts', 'comments', 'channels')
+
+    def get_limit(self, request: Request) -> int:
+        try:
+            limit = int(request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            return self.default_limit
+        return max(1, min(limit, self.max_limit))
+
+    def get_ranked(self, queryset, ranked_ids: list) -> list:
+        """
+        Load objects found by search, in order of relevance, with rank assigned
+        """
+        objects = queryset.in_bulk([id for id, rank in ranked_ids])
+        found = []
+        for id, rank in ranked_ids:
+            if id in objects:
+                objects[id].rank = rank
+                found.append(objects[id])
+        return found
+
+    def get(self, request: Request) -> Response:
+        """
+        Search by q query parameter, ?type=posts,comments limits searched types, ?limit= number of results per type
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response(data={'message': 'Query parameter q is required'}, status=HTTP_400_BAD_REQUEST)
+        types = request.query_params.get('type', ','.join(self.types)).split(',')
+        limit = self.get_limit(request)
+        backend = get_search_backend()
+        channel_ids = list(ChannelMembership.get_channel_ids(request.user, request))
+        context = {'request': request}
+        data = {}
+        if 'posts' in types:
+            posts = self.get_ranked(Post.objects.feed(),
+                                    backend.search_posts(query, channel_ids, request.user.id, limit))
+            data['posts'] = PostSearchSerializer(posts, many=True, context=context).data
+        if 'comments' in types:
+            comments = self.get_ranked(Comment.objects.select_related('user'),
+                                       backend.search_comments(query, channel_ids, request.user.id, limit))
+            data['comments'] = CommentSearchSerializer(comments, many=True, context=context).data
+        if 'channels' in types:
+            channels = self.get_ranked(Channel.objects.directory(), backend.search_channels(query, limit))
+            data['channels'] = ChannelSearchSerializer(channels, many=True, context=context).data
+        return Response(data=data)
@@ -1,22 +1,31 @@
 from drf_writable_nested import WritableNestedModelSerializer
+from rest_framework import serializers
 from rest_framework.relations import PrimaryKeyRelatedField
 
+from pigeon.instrumentation.serializers import TimedSerializerMixin
 from pigeon.models import Tag, Post, Channel
 
 
-class PostTagSerializer(WritableNestedModelSerializer):
+class PostTagSerializer(TimedSerializerMixin, WritableNestedModelSerializer):
     post = PrimaryKeyRelatedField(many=True, queryset=Post.objects.all(), write_only=True)
 
     class Meta:
         model = Tag
-        exclude = ['channel', ]
+        exclude = ['channel', 'usage_count']
         read_only_fields = ('id',)
 
 
-class ChannelTagSerializer(WritableNestedModelSerializer):
+class ChannelTagSerializer(TimedSerializerMixin, WritableNestedModelSerializer):
     channel  = PrimaryKeyRelatedField(many=True, queryset=Channel.objects.all(), write_only=True)
 
     class Meta:
         model = Tag
-        exclude = ['post', ]
+        exclude = ['post', 'usage_count']
         read_only_fields = ('id',)
+
+
+class PopularTagSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Tag
+        fields = ('id', 'name', 'usage_count')
+        read_only_fields = fields
@@ -0,0 +1,125 @@
+from django.test import TestCase
+from model_bakery import baker
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from pigeon.blog.tags.utils import TagUtils
+from pigeon.models import Post, Tag
+
+
+class TestTagUtils(TestCase):
+    def test_should_link_new_and_existing_tags_in_constant_queries(self):
+        # given
+        post = baker.make('pigeon.Post')
+        baker.make('pigeon.Tag', name='existing')
+        names = ['existing'] + [f'tag_{i}' for i in range(20)]
+        # when
+        with self.assertNumQueries(7):
+            TagUtils.link_tags(post, 'post', names)
+        # then
+        self.assertEqual(Tag.objects.count(), 21)
+        self.assertEqual(sorted(post.tag_set.values_list('name', flat=True)), sorted(names))
+
+    def test_should_remove_stale_tags(self):
+        # given
+        channel = baker.make('pigeon.Channel')
+        TagUtils.link_tags(channel, 'channel', ['first', 'second'])
+        # when
+        with self.assertNumQueries(9):
+            TagUtils.link_tags(channel, 'channel', ['second', 'third'], remove_stale=True)
+        # then
+        self.assertEqual(sorted(channel.tag_set.values_list('name', flat=True)), ['second', 'third'])
+        self.assertTrue(Tag.objects.filter(name='first').exists())
+
+    def test_should_not_duplicate_links_when_tag_repeated(self):
+        # given
+        post = baker.make('pigeon.Post')
+        # when
+        TagUtils.link_tags(post, 'post', ['same', 'same'])
+        TagUtils.link_tags(post, 'post', ['same'])
+        # then
+        self.assertEqual(post.tag_set.count(), 1)
+
+
+class TestTagUsageCount(TestCase):
+    def test_should_count_links_created_by_tag_utils(self):
+        # given
+        post = baker.make('pigeon.Post')
+        channel = baker.make('pigeon.Channel')
+        # when
+        TagUtils.link_tags(post, 'post', ['first', 'second'])
+        TagUtils.link_tags(channel, 'channel', ['first'])
+        TagUtils.link_tags(post, 'post', ['first'])
+        # then
+        self.assertEqual(dict(Tag.objects.values_list('name', 'usage_count')), {'first': 2, 'second': 1})
+
+    def test_should_decrement_usage_count_of_stale_tags(self):
+        # given
+        post = baker.make('pigeon.Post')
+        TagUtils.link_tags(post, 'post', ['first', 'second'])
+        # when
+        TagUtils.link_tags(post, 'post', ['second'], remove_stale=True)
+        # then
+        self.assertEqual(dict(Tag.objects.values_list('name', 'usage_count')), {'first': 0, 'second': 1})
+
+    def test_should_count_links_changed_by_orm(self):
+        # given
+        posts = baker.make('pigeon.Post', _quantity=3)
+        tag = baker.make('pigeon.Tag', post=posts)
+        # when
+        posts[0].tag_set.remove(tag)
+        posts[1].delete()
+        tag.refresh_from_db()
+        # then
+        self.assertEqual(tag.usage_count, 1)
+
+
+class TestTagFilter(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.both = baker.make('pigeon.Post')
+        cls.first_only = baker.make('pigeon.Post')
+        cls.untagged = baker.make('pigeon.Post')
+        TagUtils.link_tags(cls.both, 'post', ['first', 'second'])
+        TagUtils.link_tags(cls.first_only, 'post', ['first'])
+
+    def test_should_match_all_tags(self):
+        # when
+        posts = TagUtils.filter_by_tags(Post.objects.all(), 'post', ['first', 'second'])
+        # then
+        self.assertEqual(list(posts), [self.both])
+
+    def test_should_match_any_tag(self):
+        # when
+        posts = TagUtils.filter_by_tags(Post.objects.order_by('id'), 'post', ['first', 'second'], match_all=False)
+        # then
+        self.assertEqual(list(posts), [self.both, self.first_only])
+
+    def test_should_return_nothing_when_tag_does_not_exist(self):
+        # when
+        posts = TagUtils.filter_by_tags(Post.objects.all(), 'post', ['first', 'missing'])
+        # then
+        self.assertFalse(posts.exists())
+
+
+class TestPopularTagsView(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = baker.make('User')
+        cls.url = reverse('tags-popular')
+
+    def setUp(self) -> None:
+        self.client.force_authenticate(self.user)
+
+    def test_should_return_most_used_tags(self):
+        # given
+        posts = baker.make('pigeon.Post', _quantity=3)
+        baker.make('pigeon.Tag', name='rare', post=posts[:1])
+        baker.make('pigeon.Tag', name='popular', post=posts)
+        baker.make('pigeon.Tag', name='unused')
+        # when
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {'limit': 5})
+        # then
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(tag['name'], tag['usage_count']) for tag in response.data], [('popular', 3), ('rare', 1)])
@@ -0,0 +1,11 @@
+from rest_framework_nested import routers
+
+from pigeon.blog.tags.views import TagViewSet
+
+"""
+Urls for tags
+"""
+tag_router = routers.SimpleRouter()
+tag_router.register(r'', TagViewSet, basename='tags')
+
+urlpatterns = tag_router.urls
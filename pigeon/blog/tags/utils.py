@@ -0,0 +1,112 @@
+from collections import Counter
+
+from django.db.models import Case, Count, F, IntegerField, Value, When
+from rest_framework.exceptions import ValidationError
+
+from pigeon.blog.utils.conditional import FeedVersion
+from pigeon.models import Tag
+
+
+class TagUtils:
+    """
+    Tag reconciliation shared by posts and channels, costs constant number of queries regardless of tags count
+    """
+
+    @staticmethod
+    def get_or_create_tags(names: list) -> dict:
+        """
+        Get tags by names, creating missing ones
+        :return: dict in format {name: tag}
+        """
+        tags = {tag.name: tag for tag in Tag.objects.filter(name__in=names)}
+        missing_names = [name for name in dict.fromkeys(names) if name not in tags]
+        if missing_names:
+            Tag.objects.bulk_create([Tag(name=name) for name in missing_names], ignore_conflicts=True)
+            tags.update({tag.name: tag for tag in Tag.objects.filter(name__in=missing_names)})
+        return tags
+
+    @staticmethod
+    def link_tags(instance, relation: str, names: list, remove_stale: bool = False) -> dict:
+        """
+        Link tags with given names to post or channel
+        :param instance: Post or Channel object
+        :param relation: name of Tag many to many field pointing to instance, 'post' or 'channel'
+        :param names: names of tags, missing tags are created
+        :param remove_stale: unlink tags of instance which are not in names
+        :return: dict in format {name: tag} of linked tags
+        """
+        through = getattr(Tag, relation).through
+        instance_field = f'{relation}_id'
+        links = through.objects.filter(**{instance_field: instance.id})
+        tags = TagUtils.get_or_create_tags(names)
+        tag_ids = {tag.id for tag in tags.values()}
+        linked_ids = set(links.values_list('tag_id', flat=True))
+        stale_ids = linked_ids - tag_ids if remove_stale else set()
+        new_ids = tag_ids - linked_ids
+        if stale_ids:
+            links.filter(tag_id__in=stale_ids).delete()
+            Tag.objects.filter(id__in=stale_ids).update(usage_count=F('usage_count') - 1)
+        if new_ids:
+            through.objects.bulk_create([through(tag_id=tag_id, **{instance_field: instance.id}) for tag_id in new_ids],
+                                        ignore_conflicts=True)
+            Tag.objects.filter(id__in=new_ids).update(usage_count=F('usage_count') + 1)
+        if stale_ids or new_ids:
+            FeedVersion.touch([instance.channel_id if relation == 'post' else instance.id])
+        return tags
+
+    @staticmethod
+    def bulk_link_tags(instances: list, relation: str, names: list) -> dict:
+        """
+        Link tags to many new posts or channels at once, used by bulk import, which touches feed versions itself
+        :param instances: saved Post or Channel objects without tags
+        :param relation: name of Tag many to many field pointing to instances, 'post' or 'channel'
+        :param names: list of tag names of every instance, in order of instances
+        :return: dict in format {name: tag} of linked tags
+        """
+        through = getattr(Tag, relation).through
+        instance_field = f'{relation}_id'
+        tags = TagUtils.get_or_create_tags([name for instance_names in names for name in instance_names])
+        links = {(tags[name].id, instance.id) for instance, instance_names in zip(instances, names)
+                 for name in instance_names}
+        if not links:
+            return tags
+        through.objects.bulk_create([through(tag_id=tag_id, **{instance_field: instance_id})
+                                     for tag_id, instance_id in links], ignore_conflicts=True)
+        usage = Counter(tag_id for tag_id, _ in links)
+        Tag.objects.filter(id__in=usage).update(usage_count=F('usage_count') + Case(
+            *[When(id=tag_id, then=Value(count)) for tag_id, count in usage.items()], output_field=IntegerField()))
+        return tags
+
+    @staticmethod
+    def filter_by_tags(queryset, relation: str, names: list, match_all: bool = True):
+        """
+        Filter posts or channels by linked tags using unique index of through table (tag_id, post_id/channel_id),
+        ids of tagged objects are intersected with GROUP BY/HAVING instead of joining through table per tag
+        :param queryset: queryset of Post or Channel
+        :param relation: name of Tag many to many field pointing to queryset model, 'post' or 'channel'
+        :param names: names of tags
+        :param match_all: when True object must have all tags, otherwise any of them
+        :return: filtered queryset
+        """
+        through = getattr(Tag, relation).through
+        instance_field = f'{relation}_id'
+        tag_ids = list(Tag.objects.filter(name__in=set(names)).values_list('id', flat=True))
+        if not tag_ids or (match_all and len(tag_ids) < len(set(names))):
+            return queryset.none()
+        links = through.objects.filter(tag_id__in=tag_ids)
+        if match_all and len(tag_ids) > 1:
+            links = links.values(instance_field).annotate(matched=Count('tag_id')).filter(matched=len(tag_ids))
+        return queryset.filter(id__in=links.values(instance_field))
+
+    @staticmethod
+    def filter_by_request(queryset, relation: str, request):
+        """
+        Apply filter from query params: ?tags=first,second&tags_mode=all|any, all is default
+        """
+        names = [name.strip() for name in request.query_params.get('tags', '').split(',') if name.strip()]
+        if not names:
+            return queryset
+        mode = request.query_params.get('tags_mode', 'all')
+        if mode not in ('all', 'any'):
+            raise ValidationError(detail={"message": f'Unknown tags mode {mode}, use all or any'})
+        return TagUtils.filter_by_tags(queryset, relation, names, match_all=mode == 'all')
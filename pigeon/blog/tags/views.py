@@ -0,0 +1,37 @@
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from pigeon.blog.tags.serializers import PopularTagSerializer
+from pigeon.models import Tag
+
+
+class TagViewSet(viewsets.GenericViewSet):
+    """
+    View for tags
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = PopularTagSerializer
+    default_limit = 10
+    max_limit = 50
+
+    def get_queryset(self):
+        return Tag.objects.filter(usage_count__gt=0).order_by('-usage_count', 'name')
+
+    def get_limit(self, request: Request) -> int:
+        try:
+            limit = int(request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            return self.default_limit
+        return max(1, min(limit, self.max_limit))
+
+    @action(detail=False, methods=['get'])
+    def popular(self, request, *args, **kwargs) -> Response:
+        """
+        Get most used tags, ordered by precomputed usage count
+        :return: list of tags with usage count, size limited by ?limit=
+        """
+        serializer = self.get_serializer(self.get_queryset()[:self.get_limit(request)], many=True)
+        return Response(serializer.data)
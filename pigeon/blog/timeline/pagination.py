@@ -0,0 +1,51 @@
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+
+from pigeon.blog.timeline.utils import TimelineUtils
+
+
+class TimelinePagination(CursorPagination):
+    """
+    Keyset pagination of timeline, cursor holds (created_at, id) of last post of page,
+    timeline is merged from many channels, so DRF positions with offsets can not be used
+    """
+    page_size = 12
+    page_size_query_param = 'post_size'
+    max_page_size = 24
+    ordering = TimelineUtils.ordering
+
+    def paginate_timeline(self, channel_ids, request) -> list:
+        """
+        :param channel_ids: ids of channels user has access to
+        :return: posts of page
+        """
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        posts = TimelineUtils.get_posts(channel_ids, self.get_before(cursor), self.page_size + 1)
+        self.has_next = len(posts) > self.page_size
+        self.page = posts[:self.page_size]
+        return self.page
+
+    def get_before(self, cursor: Cursor):
+        if cursor is None:
+            return None
+        try:
+            created_at, post_id = cursor.position.rsplit('|', 1)
+            before = (parse_datetime(created_at), int(post_id))
+        except (AttributeError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if before[0] is None:
+            raise NotFound(self.invalid_cursor_message)
+        return before
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=f'{last.created_at.isoformat()}|{last.id}'))
+
+    def get_previous_link(self):
+        return None
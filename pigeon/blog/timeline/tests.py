@@ -0,0 +1,87 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from model_bakery import baker
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from pigeon.models import Post
+
+
+class TestTimelineView(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = baker.make('User')
+        cls.joined = baker.make('pigeon.Channel', channel_access=[cls.user, ])
+        cls.owned = baker.make('pigeon.Channel', owner=cls.user)
+        cls.other = baker.make('pigeon.Channel')
+        cls.url = reverse('timeline')
+
+    def setUp(self) -> None:
+        self.client.force_authenticate(self.user)
+
+    def make_post(self, channel, minutes_ago: int) -> Post:
+        post = baker.make('pigeon.Post', channel=channel)
+        Post.objects.filter(id=post.id).update(created_at=timezone.now() - timedelta(minutes=minutes_ago))
+        return post
+
+    def test_should_merge_joined_owned_and_global_posts_newest_first(self):
+        # given
+        joined = self.make_post(self.joined, 3)
+        owned = self.make_post(self.owned, 1)
+        global_post = self.make_post(None, 2)
+        self.make_post(self.other, 0)
+        # when
+        response = self.client.get(self.url)
+        # then
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([post['id'] for post in response.data['results']], [owned.id, global_post.id, joined.id])
+        self.assertEqual(response.data['results'][0]['channel'], self.owned.id)
+        self.assertIsNone(response.data['next'])
+
+    def test_should_follow_cursor_through_all_posts(self):
+        # given
+        posts = [self.make_post(channel, minutes_ago)
+                 for minutes_ago, channel in enumerate([self.joined, None, self.owned] * 3)]
+        # posts created at same time are ordered by id
+        Post.objects.filter(id__in=[posts[0].id, posts[1].id]).update(created_at=posts[0].created_at)
+        url = f'{self.url}?post_size=2'
+        seen = []
+        # when
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen += [post['id'] for post in response.data['results']]
+            url = response.data['next']
+        # then
+        self.assertEqual(seen, [posts[1].id, posts[0].id] + [post.id for post in posts[2:]])
+
+    def test_should_load_page_in_constant_number_of_queries(self):
+        # given
+        self.make_post(self.joined, 0)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(self.url)
+        for channel in baker.make('pigeon.Channel', channel_access=[self.user, ], _quantity=5):
+            self.make_post(channel, 0)
+        # when
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(self.url)
+        # then
+        self.assertEqual(len(response.data['results']), 6)
+        self.assertEqual(len(many), len(few))
+
+    def test_should_throw_404_when_cursor_invalid(self):
+        # when
+        response = self.client.get(self.url, {'cursor': 'cD1ub3RoaW5n'})
+        # then
+        self.assertEqual(response.status_code, 404)
+
+    def test_should_throw_401_when_not_authenticated(self):
+        # given
+        self.client.force_authenticate(None)
+        # when
+        response = self.client.get(self.url)
+        # then
+        self.assertEqual(response.status_code, 401)
@@ -0,0 +1,10 @@
+from django.urls import path
+
+from pigeon.blog.timeline.views import TimelineView
+
+"""
+Urls for timeline
+"""
+urlpatterns = [
+    path('', TimelineView.as_view(), name='timeline'),
+]
@@ -0,0 +1,55 @@
+from datetime import datetime
+from functools import reduce
+from operator import or_
+from typing import List, Optional, Tuple
+
+from django.db import connection
+from django.db.models import Q
+
+from pigeon.blog.channels.membership import ChannelMembership
+from pigeon.models import Channel, Post
+
+
+class TimelineUtils:
+    """
+    Home timeline of user: posts of channels user owns or is member of and posts of global feed, newest first.
+    Posts are not copied per user on write, page is merged on read from index (channel, created_at, id)
+    """
+    ordering = ('-created_at', '-id')
+
+    @staticmethod
+    def get_channel_ids(user, request=None) -> set:
+        """
+        Get ids of channels user has access to, same as ChannelSerializer.get_has_access
+        """
+        owned_ids = Channel.objects.filter(owner=user.id).values_list('id', flat=True)
+        return set(ChannelMembership.get_channel_ids(user, request)) | set(owned_ids)
+
+    @staticmethod
+    def get_posts(channel_ids, before: Optional[Tuple[datetime, int]], limit: int,
+                  merge: Optional[bool] = None) -> List[Post]:
+        """
+        Get posts of channels and global feed older than cursor.
+        With merge ids are taken from UNION ALL of per channel queries, each limited to page size (k-way merge),
+        so every channel costs one index scan reading at most limit entries, regardless of how many posts it has.
+        Without merge single query with channel_id IN (...) sorts all posts of channels older than cursor
+        :param channel_ids: ids of channels, posts of global feed are always included
+        :param before: (created_at, id) of last post of previous page, None for first page
+        :param limit: number of posts
+        :param merge: use k-way merge, by default when database supports LIMIT in UNION branches (PostgreSQL)
+        :return: posts with everything serializers need loaded, newest first
+        """
+        if merge is None:
+            merge = connection.features.supports_slicing_ordering_in_compound
+        branches = [Q(channel_id=channel_id) for channel_id in sorted(channel_ids)] + [Q(channel_id=None)]
+        position = Q() if before is None else Q(created_at__lt=before[0]) | Q(created_at=before[0], id__lt=before[1])
+        if merge and len(branches) > 1:
+            first, *rest = [Post.objects.filter(branch, position).order_by(*TimelineUtils.ordering)
+                            .values('id', 'created_at')[:limit] for branch in branches]
+            rows = first.union(*rest, all=True).order_by(*TimelineUtils.ordering)[:limit]
+        else:
+            rows = Post.objects.filter(reduce(or_, branches), position).order_by(*TimelineUtils.ordering) \
+                       .values('id', 'created_at')[:limit]
+        ids = [row['id'] for row in rows]
+        posts = Post.objects.feed().in_bulk(ids)
+        return [posts[post_id] for post_id in ids if post_id in posts]
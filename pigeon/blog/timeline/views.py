@@ -0,0 +1,26 @@
+from rest_framework.generics import GenericAPIView
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from pigeon.blog.posts.serializers import TimelinePostSerializer
+from pigeon.blog.timeline.pagination import TimelinePagination
+from pigeon.blog.timeline.utils import TimelineUtils
+
+
+class TimelineView(GenericAPIView):
+    """
+    View for home timeline of user, posts of all channels user has access to and of global feed
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = TimelinePostSerializer
+    pagination_class = TimelinePagination
+
+    def get(self, request: Request) -> Response:
+        """
+        Get newest posts, next link leads to older ones, ?post_size= sets page size
+        """
+        channel_ids = TimelineUtils.get_channel_ids(request.user, request)
+        posts = self.paginator.paginate_timeline(channel_ids, request)
+        serializer = self.get_serializer(posts, many=True)
+        return self.get_paginated_response(serializer.data)
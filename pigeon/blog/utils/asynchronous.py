@@ -0,0 +1,64 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    :return: thread pool of process running read views, size bounds number of database connections it opens
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.ASYNC_VIEW_THREADS, thread_name_prefix='async-view')
+        return _executor
+
+
+def run_view(view, request, *args, **kwargs):
+    """
+    Run sync view in thread of pool, connection of thread is checked like at start and end of Django request
+    """
+    close_old_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+class AsyncReadMixin:
+    """
+    Serves GET of async_actions from coroutine view, which runs viewset in bounded thread pool,
+    so under ASGI server reads of many connections wait for database concurrently in one worker.
+    Writes keep default path of Django (single thread per worker), so transactions and on_commit hooks
+    behave same as under WSGI. Enabled by ASYNC_READ_VIEWS setting, under WSGI sync view is cheaper
+    """
+    async_actions = ('list', 'retrieve')
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        if not settings.ASYNC_READ_VIEWS or (actions or {}).get('get') not in cls.async_actions:
+            return view
+
+        async def async_view(request, *args, **kwargs):
+            if request.method in ('GET', 'HEAD'):
+                loop = asyncio.get_running_loop()
+                # run_in_executor does not copy context, timings of request live in context variable
+                context = contextvars.copy_context()
+                return await loop.run_in_executor(get_executor(), functools.partial(
+                    context.run, run_view, view, request, *args, **kwargs))
+            return await sync_to_async(view)(request, *args, **kwargs)
+
+        return functools.update_wrapper(async_view, view)
@@ -0,0 +1,77 @@
+import hashlib
+from datetime import datetime
+from typing import Optional
+
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import quote_etag
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.status import HTTP_304_NOT_MODIFIED
+
+from pigeon.models import Channel, GlobalFeed
+
+
+class FeedVersion:
+    """
+    Last modification time of channel or of global feed, bumped on every write changing them.
+    Version of channel is stored in Channel.modified_at, version of global feed in single GlobalFeed row,
+    both are updated in transaction of write, so no process can pair new version with old data
+    """
+    global_feed_id = 1
+
+    @staticmethod
+    def get_global() -> datetime:
+        version = GlobalFeed.objects.filter(id=FeedVersion.global_feed_id).values_list('modified_at', flat=True).first()
+        if version is None:
+            version = GlobalFeed.objects.get_or_create(id=FeedVersion.global_feed_id)[0].modified_at
+        return version
+
+    @staticmethod
+    def touch(channel_ids):
+        """
+        Bump versions of channels, None stands for global feed
+        """
+        channel_ids = set(channel_ids)
+        now = timezone.now()
+        if None in channel_ids:
+            if not GlobalFeed.objects.filter(id=FeedVersion.global_feed_id).update(modified_at=now):
+                GlobalFeed.objects.update_or_create(id=FeedVersion.global_feed_id, defaults={'modified_at': now})
+            channel_ids.discard(None)
+        if channel_ids:
+            Channel.objects.filter(id__in=channel_ids).update(modified_at=now)
+
+
+class ConditionalGetMixin:
+    """
+    Answers GET with 304 Not Modified when If-None-Match still matches version of resource,
+    before queryset is evaluated and serialized. Last-Modified is not sent, its second resolution
+    would answer 304 to client which read resource in same second as later write.
+    Representation depends on user (access, membership), so ETag is computed per user and path
+    """
+
+    def get_etag(self, request: Request, last_modified: datetime) -> str:
+        key = f'{request.user.id}:{request.get_full_path()}:{last_modified.timestamp()}'
+        return quote_etag(hashlib.md5(key.encode()).hexdigest())
+
+    def get_not_modified_response(self, request: Request, last_modified: Optional[datetime]) -> Optional[Response]:
+        """
+        :param last_modified: version of resource, None when unknown, then resource is always served
+        :return: 304 response when client has current version, None otherwise
+        """
+        if request.method not in ('GET', 'HEAD') or last_modified is None:
+            return None
+        self.validators = {'ETag': self.get_etag(request, last_modified)}
+        response = get_conditional_response(request, etag=self.validators['ETag'])
+        if response is not None and response.status_code == HTTP_304_NOT_MODIFIED:
+            return Response(status=HTTP_304_NOT_MODIFIED)
+        return None
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        validators = getattr(self, 'validators', None)
+        if validators and response.status_code in (200, HTTP_304_NOT_MODIFIED):
+            for header, value in validators.items():
+                response[header] = value
+            patch_vary_headers(response, ('Authorization',))
+        return response
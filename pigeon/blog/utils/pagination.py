@@ -0,0 +1,34 @@
+from rest_framework.pagination import PageNumberPagination
+
+
+class SelectablePagination(PageNumberPagination):
+    """
+    Page number pagination which switches to keyset (cursor) pagination when client asks for it
+    with ?pagination=cursor query parameter or follows link containing cursor.
+    Cursor pagination does not count rows and does not use OFFSET, so deep pages cost same as first one
+    """
+    cursor_pagination_class = None
+    pagination_query_param = 'pagination'
+
+    def use_cursor(self, request) -> bool:
+        cursor_query_param = self.cursor_pagination_class.cursor_query_param
+        return request.query_params.get(self.pagination_query_param) == 'cursor' \
+            or cursor_query_param in request.query_params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.use_cursor(request):
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        return super(SelectablePagination, self).paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super(SelectablePagination, self).get_paginated_response(data)
+
+    def get_html_context(self):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_html_context()
+        return super(SelectablePagination, self).get_html_context()
+
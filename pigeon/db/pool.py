@@ -0,0 +1,106 @@
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+from django.db.utils import OperationalError
+
+
+class ConnectionPool:
+    """
+    Bounded pool of database connections shared by threads of process. Idle connections are reused newest first,
+    so connections which stay idle longest can time out on server without being handed out again soon
+    """
+
+    def __init__(self, max_size: int, timeout: float):
+        """
+        :param max_size: maximum number of open connections, idle and in use
+        :param timeout: seconds to wait for connection when all are in use
+        """
+        self.max_size = max_size
+        self.timeout = timeout
+        # default isolation level of connections, read by backend from first connection of pool
+        self.isolation_level = None
+        self._idle = deque()
+        self._size = 0
+        self._condition = threading.Condition()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def idle_count(self) -> int:
+        return len(self._idle)
+
+    def acquire(self, connect: Callable, check: Optional[Callable] = None):
+        """
+        Get idle connection or open new one when pool is not full, wait for released connection otherwise
+        :param connect: function opening new connection
+        :param check: function telling if idle connection is still usable, unusable ones are closed and dropped
+        """
+        deadline = time.monotonic() + self.timeout
+        while True:
+            with self._condition:
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise OperationalError(f'No database connection available in {self.timeout} seconds, '
+                                               f'all {self.max_size} connections of pool are in use')
+                    self._condition.wait(remaining)
+                connection = self._idle.pop() if self._idle else None
+                if connection is None:
+                    self._size += 1
+            if connection is None:
+                try:
+                    return connect()
+                except Exception:
+                    self._discard()
+                    raise
+            if check is None or check(connection):
+                return connection
+            self.release(connection, discard=True)
+
+    def release(self, connection, discard: bool = False):
+        """
+        Return connection to pool, discarded connection is closed and frees its place for new one
+        """
+        if discard:
+            try:
+                connection.close()
+            except Exception:
+                pass
+            self._discard()
+            return
+        with self._condition:
+            self._idle.append(connection)
+            self._condition.notify()
+
+    def close_idle(self):
+        """
+        Close all idle connections, connections in use are closed when released with discard
+        """
+        with self._condition:
+            connections = list(self._idle)
+            self._idle.clear()
+        for connection in connections:
+            self.release(connection, discard=True)
+
+    def _discard(self):
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias: str, options: dict) -> ConnectionPool:
+    """
+    Get pool of database alias, created on first use with MAX_SIZE and TIMEOUT from options
+    """
+    with _pools_lock:
+        if alias not in _pools:
+            _pools[alias] = ConnectionPool(max_size=options.get('MAX_SIZE', 10), timeout=options.get('TIMEOUT', 10))
+        return _pools[alias]
@@ -0,0 +1,82 @@
+"""
+PostgreSQL backend with connection management configured in DATABASES:
+CONN_HEALTH_CHECKS: reused persistent connection is checked with SELECT 1 before first query of request,
+  connection dropped by server or proxy is replaced instead of failing request
+POOL: {'MAX_SIZE': int, 'TIMEOUT': seconds}, connections are borrowed from pool shared by threads of process
+  when Django connects and returned to it when Django closes them
+"""
+from django.db.backends.postgresql import base
+from psycopg2 import extensions
+
+from pigeon.db.pool import get_pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def __init__(self, *args, **kwargs):
+        super(DatabaseWrapper, self).__init__(*args, **kwargs)
+        self.health_check_enabled = self.settings_dict.get('CONN_HEALTH_CHECKS', False)
+        # connection is checked once per request, new connections need no check
+        self.health_check_done = False
+
+    def get_pool(self):
+        options = self.settings_dict.get('POOL')
+        return get_pool(self.alias, options) if options else None
+
+    def connect(self):
+        # new connection needs no check, initializing it (time zone) must not start transaction by checking it
+        self.health_check_done = True
+        super(DatabaseWrapper, self).connect()
+
+    def ensure_connection(self):
+        if self.connection is not None and self.health_check_enabled and not self.health_check_done:
+            self.health_check_done = True
+            if not self.in_atomic_block and not self.is_usable():
+                self.close()
+        super(DatabaseWrapper, self).ensure_connection()
+
+    def close_if_unusable_or_obsolete(self):
+        """
+        Called at start and end of request, connection kept for next request is checked again before its first query
+        """
+        super(DatabaseWrapper, self).close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def get_new_connection(self, conn_params):
+        pool = self.get_pool()
+        if pool is None:
+            return super(DatabaseWrapper, self).get_new_connection(conn_params)
+
+        def connect():
+            connection = super(DatabaseWrapper, self).get_new_connection(conn_params)
+            pool.isolation_level = self.isolation_level
+            return connection
+
+        connection = pool.acquire(connect, self.check_pooled_connection)
+        self.isolation_level = pool.isolation_level
+        return connection
+
+    def check_pooled_connection(self, connection) -> bool:
+        if connection.closed:
+            return False
+        if not self.health_check_enabled:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except base.Database.Error:
+            return False
+        return True
+
+    def _close(self):
+        pool = self.get_pool()
+        if pool is None or self.connection is None:
+            return super(DatabaseWrapper, self)._close()
+        connection = self.connection
+        # connection goes back to pool without transaction left open by request
+        discard = bool(connection.closed)
+        if not discard and connection.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                connection.rollback()
+            except base.Database.Error:
+                discard = True
+        pool.release(connection, discard=discard or self.errors_occurred)
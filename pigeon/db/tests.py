@@ -0,0 +1,125 @@
+import copy
+import threading
+from unittest import mock
+
+from django.db import connection as default_connection
+from django.db.utils import OperationalError
+from django.test import SimpleTestCase
+from psycopg2 import extensions
+
+from pigeon.db.pool import ConnectionPool
+from pigeon.db.postgresql.base import DatabaseWrapper
+
+
+def get_new_connection(wrapper, conn_params):
+    wrapper.isolation_level = extensions.ISOLATION_LEVEL_READ_COMMITTED
+    raw_connection = mock.MagicMock(closed=0)
+    raw_connection.get_transaction_status.return_value = extensions.TRANSACTION_STATUS_IDLE
+    return raw_connection
+
+
+class TestConnectionPool(SimpleTestCase):
+    def test_should_reuse_released_connection(self):
+        # given
+        pool = ConnectionPool(max_size=2, timeout=1)
+        connect = mock.Mock(side_effect=lambda: object())
+        first = pool.acquire(connect)
+        pool.release(first)
+        # when
+        second = pool.acquire(connect)
+        # then
+        self.assertIs(second, first)
+        self.assertEqual(connect.call_count, 1)
+        self.assertEqual(pool.size, 1)
+
+    def test_should_replace_connection_failing_check(self):
+        # given
+        pool = ConnectionPool(max_size=1, timeout=1)
+        broken = mock.Mock()
+        pool.release(pool.acquire(lambda: broken))
+        # when
+        connection = pool.acquire(lambda: 'new', check=lambda checked: checked is not broken)
+        # then
+        self.assertEqual(connection, 'new')
+        broken.close.assert_called_once()
+        self.assertEqual((pool.size, pool.idle_count), (1, 0))
+
+    def test_should_wait_for_connection_released_by_other_thread(self):
+        # given
+        pool = ConnectionPool(max_size=1, timeout=5)
+        connection = pool.acquire(object)
+        timer = threading.Timer(0.05, pool.release, args=[connection])
+        # when
+        timer.start()
+        acquired = pool.acquire(object)
+        # then
+        self.assertIs(acquired, connection)
+
+    def test_should_throw_operational_error_when_pool_exhausted(self):
+        # given
+        pool = ConnectionPool(max_size=1, timeout=0.01)
+        pool.acquire(object)
+        # then
+        with self.assertRaises(OperationalError):
+            pool.acquire(object)
+
+    def test_should_free_place_when_connect_fails(self):
+        # given
+        pool = ConnectionPool(max_size=1, timeout=0.01)
+        # when
+        with self.assertRaises(RuntimeError):
+            pool.acquire(mock.Mock(side_effect=RuntimeError))
+        # then
+        self.assertEqual(pool.size, 0)
+        self.assertIsNotNone(pool.acquire(object))
+
+
+@mock.patch('django.db.backends.postgresql.base.DatabaseWrapper.get_new_connection', autospec=True,
+            side_effect=get_new_connection)
+class TestDatabaseWrapper(SimpleTestCase):
+    def make_wrapper(self, alias: str, **settings) -> DatabaseWrapper:
+        settings_dict = copy.deepcopy(default_connection.settings_dict)
+        settings_dict.update(settings)
+        return DatabaseWrapper(settings_dict, alias)
+
+    def test_should_replace_unusable_persistent_connection_before_first_query_of_request(self, get_new_connection):
+        # given
+        wrapper = self.make_wrapper('health_checks', CONN_MAX_AGE=None, CONN_HEALTH_CHECKS=True)
+        wrapper.ensure_connection()
+        dropped = wrapper.connection
+        # when
+        wrapper.close_if_unusable_or_obsolete()
+        with mock.patch.object(wrapper, 'is_usable', return_value=False) as is_usable:
+            wrapper.ensure_connection()
+            wrapper.ensure_connection()
+        # then
+        self.assertIsNot(wrapper.connection, dropped)
+        self.assertEqual(is_usable.call_count, 1)
+        self.assertEqual(get_new_connection.call_count, 2)
+
+    def test_should_not_check_connection_while_initializing_it(self, get_new_connection):
+        # given
+        wrapper = self.make_wrapper('initializing', CONN_MAX_AGE=None, CONN_HEALTH_CHECKS=True)
+        # when
+        with mock.patch.object(wrapper, 'is_usable') as is_usable, \
+                mock.patch.object(wrapper, 'init_connection_state', side_effect=wrapper.ensure_connection):
+            wrapper.ensure_connection()
+        # then
+        is_usable.assert_not_called()
+        self.assertEqual(get_new_connection.call_count, 1)
+
+    def test_should_return_connection_to_pool_at_end_of_request(self, get_new_connection):
+        # given
+        pool_options = {'MAX_SIZE': 1, 'TIMEOUT': 1}
+        first = self.make_wrapper('pooled', CONN_MAX_AGE=0, POOL=pool_options)
+        second = self.make_wrapper('pooled', CONN_MAX_AGE=0, POOL=pool_options)
+        first.ensure_connection()
+        raw_connection = first.connection
+        # when
+        first.close_if_unusable_or_obsolete()
+        second.ensure_connection()
+        # then
+        self.assertIs(second.connection, raw_connection)
+        raw_connection.close.assert_not_called()
+        self.assertEqual(get_new_connection.call_count, 1)
+        second.close()
@@ -0,0 +1,161 @@
+import bisect
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from django.conf import settings
+from django.core.cache import BaseCache, cache
+from django.http import Http404, HttpRequest, HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+from pigeon.instrumentation.timings import RequestTimings
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERIES_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SUM_SCALE = 1_000_000
+
+logger = logging.getLogger(__name__)
+# pid of process whose flushing thread runs, forked workers start their own
+flusher_pid = None
+flusher_lock = threading.Lock()
+
+
+class Histogram:
+    """
+    Prometheus histogram with labels route and method. Observations are buffered in process and added to shared
+    cache by flush, so histograms rendered by any worker count requests of all workers. Sum is kept in millionths,
+    cache increments only integers
+    """
+    label_names = ('route', 'method')
+
+    def __init__(self, name: str, description: str, buckets: tuple):
+        self.name = name
+        self.description = description
+        self.buckets = buckets
+        # labels -> [counts of buckets..., count of +Inf bucket, sum, count], buckets are not cumulative
+        self.pending: Dict[Tuple[str, ...], list] = {}
+        self.lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], value: float):
+        with self.lock:
+            sample = self.pending.setdefault(labels, [0] * (len(self.buckets) + 3))
+            sample[bisect.bisect_left(self.buckets, value)] += 1
+            sample[-2] += round(value * SUM_SCALE)
+            sample[-1] += 1
+
+    def get_labels_key(self) -> str:
+        return f'metrics:{self.name}:labels'
+
+    def get_key(self, labels: Tuple[str, ...], index: int) -> str:
+        return f'metrics:{self.name}:{":".join(labels)}:{index}'
+
+    def flush(self, cache: BaseCache):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        if not pending:
+            return
+        # labels added concurrently by other worker can be lost, they are added again by its next flush
+        known_labels = cache.get(self.get_labels_key(), [])
+        new_labels = [labels for labels in pending if labels not in known_labels]
+        if new_labels:
+            cache.set(self.get_labels_key(), known_labels + new_labels, None)
+        for labels, sample in pending.items():
+            for index, delta in enumerate(sample):
+                if delta:
+                    self.increment(cache, self.get_key(labels, index), delta)
+
+    def increment(self, cache: BaseCache, key: str, delta: int):
+        cache.add(key, 0, None)
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            # evicted between add and incr
+            cache.set(key, delta, None)
+
+    def render(self, cache: BaseCache) -> List[str]:
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} histogram']
+        labels_list = [tuple(labels) for labels in cache.get(self.get_labels_key(), [])]
+        size = len(self.buckets) + 3
+        values = cache.get_many([self.get_key(labels, index) for labels in labels_list for index in range(size)])
+        for labels in sorted(labels_list):
+            sample = [values.get(self.get_key(labels, index), 0) for index in range(size)]
+            label_pairs = ','.join(f'{name}="{value}"' for name, value in zip(self.label_names, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets, sample):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label_pairs},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{label_pairs},le="+Inf"}} {sample[-1]}')
+            lines.append(f'{self.name}_sum{{{label_pairs}}} {sample[-2] / SUM_SCALE}')
+            lines.append(f'{self.name}_count{{{label_pairs}}} {sample[-1]}')
+        return lines
+
+    def clear(self):
+        with self.lock:
+            self.pending.clear()
+
+
+request_seconds = Histogram('pigeon_request_seconds', 'Total time of request', SECONDS_BUCKETS)
+db_queries = Histogram('pigeon_request_db_queries', 'Number of SQL queries of request', QUERIES_BUCKETS)
+db_seconds = Histogram('pigeon_request_db_seconds', 'Time of request in SQL queries', SECONDS_BUCKETS)
+serialize_seconds = Histogram('pigeon_request_serialize_seconds', 'Time of request in serializers', SECONDS_BUCKETS)
+storage_seconds = Histogram('pigeon_request_storage_seconds', 'Time of request in file storage (Cloudinary)',
+                            SECONDS_BUCKETS)
+HISTOGRAMS = (request_seconds, db_queries, db_seconds, serialize_seconds, storage_seconds)
+
+
+def observe(route: str, method: str, timings: RequestTimings):
+    labels = (route, method)
+    request_seconds.observe(labels, timings.total)
+    db_queries.observe(labels, timings.queries)
+    db_seconds.observe(labels, timings.seconds['db'])
+    serialize_seconds.observe(labels, timings.seconds['serialize'])
+    storage_seconds.observe(labels, timings.seconds['storage'])
+    start_flusher()
+
+
+def flush_metrics():
+    for histogram in HISTOGRAMS:
+        histogram.flush(cache)
+
+
+def start_flusher():
+    """
+    Flush observations of process every METRICS_FLUSH_INTERVAL seconds in background, outside of requests
+    """
+    global flusher_pid
+    if flusher_pid == os.getpid():
+        return
+    with flusher_lock:
+        if flusher_pid == os.getpid():
+            return
+        flusher_pid = os.getpid()
+        threading.Thread(target=run_flusher, name='metrics-flusher', daemon=True).start()
+
+
+def run_flusher():
+    while True:
+        time.sleep(settings.METRICS_FLUSH_INTERVAL)
+        try:
+            flush_metrics()
+        except Exception:
+            logger.exception('Metrics were not flushed to cache')
+
+
+def render_metrics() -> str:
+    flush_metrics()
+    return '\n'.join(line for histogram in HISTOGRAMS for line in histogram.render(cache)) + '\n'
+
+
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    """
+    Metrics of all workers sharing cache in Prometheus text format, observations of other workers show up
+    after their next flush, with METRICS_TOKEN set scraper has to send it as bearer token
+    """
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    if settings.METRICS_TOKEN and not constant_time_compare(request.headers.get('Authorization', ''),
+                                                            f'Bearer {settings.METRICS_TOKEN}'):
+        return HttpResponseForbidden()
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
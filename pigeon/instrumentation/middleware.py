@@ -0,0 +1,77 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from pigeon.instrumentation import metrics
+from pigeon.instrumentation.profiling import SampledProfiler
+from pigeon.instrumentation.timings import RequestTimings, current_timings
+
+
+class InstrumentationMiddleware:
+    """
+    Record SQL queries count and time spent in database, serializers, storage and in total per request.
+    Timings are sent in Server-Timing header with SERVER_TIMING_ENABLED, observed in /metrics histograms
+    with METRICS_ENABLED and sampled requests are profiled with PROFILE_SAMPLE_RATE
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not self.is_enabled():
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        # under ASGI handler chain stays async, sync middleware would run every request in one thread
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def is_enabled(self) -> bool:
+        return settings.SERVER_TIMING_ENABLED or settings.METRICS_ENABLED or settings.PROFILE_SAMPLE_RATE > 0
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        timings, token, profiler = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+            timings.stop()
+        return self.finish(request, response, timings, profiler)
+
+    async def __acall__(self, request):
+        timings, token, profiler = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timings.reset(token)
+            timings.stop()
+        return self.finish(request, response, timings, profiler)
+
+    def start(self):
+        """
+        :return: timings of request, token resetting them and profiler, which under ASGI profiles event loop thread
+        """
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        profiler = SampledProfiler()
+        profiler.start()
+        return timings, token, profiler
+
+    def finish(self, request, response, timings: RequestTimings, profiler: SampledProfiler):
+        resolver_match = getattr(request, 'resolver_match', None)
+        # view name keeps labels few, paths with ids would make series per object
+        route = resolver_match.view_name if resolver_match is not None else 'unmatched'
+        profiler.stop(route, request.method, timings.total)
+        if settings.METRICS_ENABLED and route != 'metrics':
+            metrics.observe(route, request.method, timings)
+        if settings.SERVER_TIMING_ENABLED:
+            response['Server-Timing'] = self.get_server_timing(timings)
+        return response
+
+    def get_server_timing(self, timings: RequestTimings) -> str:
+        return ', '.join([f'db;dur={timings.seconds["db"] * 1000:.1f};desc="{timings.queries} queries"',
+                          f'serialize;dur={timings.seconds["serialize"] * 1000:.1f}',
+                          f'storage;dur={timings.seconds["storage"] * 1000:.1f}',
+                          f'total;dur={timings.total * 1000:.1f}'])
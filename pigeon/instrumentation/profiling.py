@@ -0,0 +1,56 @@
+import cProfile
+import logging
+import os
+import random
+import threading
+import time
+from typing import Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# only one profiler can be active in process at once
+_profiler_lock = threading.Lock()
+
+
+class SampledProfiler:
+    """
+    Profile PROFILE_SAMPLE_RATE of requests with cProfile, keep stats of profiled requests
+    slower than PROFILE_SLOW_REQUEST_MS in PROFILE_DIR, open them with pstats or snakeviz
+    """
+
+    def __init__(self):
+        self.profiler: Optional[cProfile.Profile] = None
+
+    def start(self):
+        if settings.PROFILE_SAMPLE_RATE <= 0 or random.random() >= settings.PROFILE_SAMPLE_RATE:
+            return
+        if not _profiler_lock.acquire(blocking=False):
+            return
+        self.profiler = cProfile.Profile()
+        try:
+            self.profiler.enable()
+        except ValueError:
+            # other profiling tool is active, e.g. debugger
+            self.profiler = None
+            _profiler_lock.release()
+
+    def stop(self, route: str, method: str, total: float) -> Optional[str]:
+        """
+        :return: path of dumped stats, None when request was not profiled or was fast
+        """
+        if self.profiler is None:
+            return None
+        try:
+            self.profiler.disable()
+        finally:
+            _profiler_lock.release()
+        if total * 1000 < settings.PROFILE_SLOW_REQUEST_MS:
+            return None
+        os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+        path = os.path.join(settings.PROFILE_DIR, f'{time.strftime("%Y%m%d-%H%M%S")}-{method}-{route}-'
+                                                  f'{int(total * 1000)}ms.prof')
+        self.profiler.dump_stats(path)
+        logger.warning('Slow request %s %s took %.0f ms, profile saved to %s', method, route, total * 1000, path)
+        return path
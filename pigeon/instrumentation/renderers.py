@@ -0,0 +1,21 @@
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+
+from pigeon.instrumentation.timings import timed
+
+
+class TimedRendererMixin:
+    """
+    Record time of rendering response data as serialize timing of current request
+    """
+
+    def render(self, *args, **kwargs):
+        with timed('serialize'):
+            return super().render(*args, **kwargs)
+
+
+class TimedJSONRenderer(TimedRendererMixin, JSONRenderer):
+    pass
+
+
+class TimedBrowsableAPIRenderer(TimedRendererMixin, BrowsableAPIRenderer):
+    pass
@@ -0,0 +1,29 @@
+from rest_framework.serializers import ListSerializer
+
+from pigeon.instrumentation.timings import timed
+
+
+class TimedSerializerMixin:
+    """
+    Record time of building serializer data as serialize timing of current request, it covers
+    to_representation of serializer and its nested fields with lazy queries they run
+    """
+
+    @property
+    def data(self):
+        with timed('serialize'):
+            return super().data
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        """
+        Lists are timed as a whole, queryset of list is evaluated by list serializer, not by child serializer
+        """
+        list_serializer = super().many_init(*args, **kwargs)
+        if type(list_serializer) is ListSerializer:
+            list_serializer.__class__ = TimedListSerializer
+        return list_serializer
+
+
+class TimedListSerializer(TimedSerializerMixin, ListSerializer):
+    pass
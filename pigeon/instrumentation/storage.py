@@ -0,0 +1,41 @@
+from cloudinary_storage.storage import MediaCloudinaryStorage, RawMediaCloudinaryStorage
+
+from pigeon.instrumentation.timings import timed
+
+
+class TimedStorageMixin:
+    """
+    Record time of storage calls as storage timing of current request
+    """
+
+    def _open(self, *args, **kwargs):
+        with timed('storage'):
+            return super()._open(*args, **kwargs)
+
+    def _save(self, *args, **kwargs):
+        with timed('storage'):
+            return super()._save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with timed('storage'):
+            return super().delete(*args, **kwargs)
+
+    def exists(self, *args, **kwargs):
+        with timed('storage'):
+            return super().exists(*args, **kwargs)
+
+    def size(self, *args, **kwargs):
+        with timed('storage'):
+            return super().size(*args, **kwargs)
+
+    def url(self, *args, **kwargs):
+        with timed('storage'):
+            return super().url(*args, **kwargs)
+
+
+class TimedMediaCloudinaryStorage(TimedStorageMixin, MediaCloudinaryStorage):
+    pass
+
+
+class TimedRawMediaCloudinaryStorage(TimedStorageMixin, RawMediaCloudinaryStorage):
+    pass
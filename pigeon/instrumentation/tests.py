@@ -0,0 +1,209 @@
+import os
+import tempfile
+import time
+
+from asgiref.sync import SyncToAsync
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.handlers.asgi import ASGIHandler
+from django.test import AsyncClient, SimpleTestCase, TestCase, override_settings
+from model_bakery import baker
+from rest_framework import serializers
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from pigeon.instrumentation import metrics
+from pigeon.instrumentation.renderers import TimedJSONRenderer
+from pigeon.instrumentation.serializers import TimedSerializerMixin
+from pigeon.instrumentation.storage import TimedStorageMixin
+from pigeon.instrumentation.timings import RequestTimings, current_timings
+
+
+class TimedFileSystemStorage(TimedStorageMixin, FileSystemStorage):
+    pass
+
+
+class SlowSerializer(TimedSerializerMixin, serializers.Serializer):
+    id = serializers.IntegerField()
+
+    def to_representation(self, instance):
+        time.sleep(0.01)
+        return super().to_representation(instance)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                                      'LOCATION': 'metrics'}})
+class TestInstrumentationMiddleware(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = baker.make('User')
+        baker.make('pigeon.Post', _quantity=3)
+
+    def setUp(self) -> None:
+        self.client.force_authenticate(self.user)
+        for histogram in metrics.HISTOGRAMS:
+            histogram.clear()
+        cache.clear()
+
+    @override_settings(SERVER_TIMING_ENABLED=True)
+    def test_should_send_server_timing_header(self):
+        # when
+        response = self.client.get(reverse('posts-list'))
+        # then
+        self.assertEqual(response.status_code, 200)
+        names = [metric.split(';')[0] for metric in response['Server-Timing'].split(', ')]
+        self.assertEqual(names, ['db', 'serialize', 'storage', 'total'])
+        self.assertRegex(response['Server-Timing'], r'desc="[1-9]\d* queries"')
+
+    @override_settings(SERVER_TIMING_ENABLED=False)
+    def test_should_not_send_server_timing_header_when_disabled(self):
+        # when
+        response = self.client.get(reverse('posts-list'))
+        # then
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(METRICS_ENABLED=True)
+    def test_should_expose_route_histograms(self):
+        # given
+        self.client.get(reverse('posts-list'))
+        self.client.get(reverse('posts-list'))
+        # when
+        response = self.client.get(reverse('metrics'))
+        # then
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('# TYPE pigeon_request_seconds histogram', body)
+        self.assertIn('pigeon_request_seconds_count{route="posts-list",method="GET"} 2', body)
+        self.assertIn('pigeon_request_db_queries_bucket{route="posts-list",method="GET",le="+Inf"} 2', body)
+        self.assertNotIn('route="metrics"', body)
+
+    @override_settings(METRICS_ENABLED=True, METRICS_TOKEN='secret')
+    def test_should_throw_403_when_metrics_token_wrong(self):
+        # when
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer other')
+        # then
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_should_throw_404_when_metrics_disabled(self):
+        # when
+        response = self.client.get(reverse('metrics'))
+        # then
+        self.assertEqual(response.status_code, 404)
+
+    def test_should_dump_profile_of_slow_sampled_request(self):
+        # given
+        profile_dir = tempfile.mkdtemp()
+        # when
+        with override_settings(PROFILE_SAMPLE_RATE=1, PROFILE_SLOW_REQUEST_MS=0, PROFILE_DIR=profile_dir), \
+                self.assertLogs('pigeon.instrumentation.profiling', 'WARNING'):
+            response = self.client.get(reverse('posts-list'))
+        # then
+        self.assertEqual(response.status_code, 200)
+        profiles = os.listdir(profile_dir)
+        self.assertEqual(len(profiles), 1)
+        self.assertIn('GET-posts-list', profiles[0])
+
+
+@override_settings(SERVER_TIMING_ENABLED=True)
+class TestAsyncInstrumentationMiddleware(SimpleTestCase):
+    def test_should_keep_asgi_handler_chain_async(self):
+        # when
+        handler = ASGIHandler()
+        # then
+        self.assertNotIsInstance(handler._middleware_chain, SyncToAsync)
+
+    async def test_should_send_server_timing_header_of_async_request(self):
+        # when
+        response = await AsyncClient().get(reverse('posts-list'))
+        # then
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('total;dur=', response['Server-Timing'])
+
+
+class TestTimings(TestCase):
+    def test_should_record_storage_time_of_current_request(self):
+        # given
+        storage = TimedFileSystemStorage(location=tempfile.mkdtemp())
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        # when
+        try:
+            storage.save('file.txt', ContentFile(b'content'))
+        finally:
+            current_timings.reset(token)
+        # then
+        self.assertGreater(timings.seconds['storage'], 0)
+        self.assertEqual(timings.queries, 0)
+
+    def test_should_record_serialize_time_of_rendered_response(self):
+        # given
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        # when
+        try:
+            TimedJSONRenderer().render([{'id': i} for i in range(100)])
+        finally:
+            current_timings.reset(token)
+        # then
+        self.assertGreater(timings.seconds['serialize'], 0)
+
+    def test_should_record_serialize_time_of_serializer_data(self):
+        # given
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        # when
+        try:
+            data = SlowSerializer([{'id': i} for i in range(5)], many=True).data
+        finally:
+            current_timings.reset(token)
+        # then
+        self.assertEqual(len(data), 5)
+        self.assertGreaterEqual(timings.seconds['serialize'], 0.05)
+
+    def test_should_record_serialize_time_of_single_object(self):
+        # given
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        # when
+        try:
+            data = SlowSerializer({'id': 1}).data
+        finally:
+            current_timings.reset(token)
+        # then
+        self.assertEqual(data, {'id': 1})
+        self.assertGreaterEqual(timings.seconds['serialize'], 0.01)
+
+    def test_should_histogram_count_value_in_every_bucket_above_it(self):
+        # given
+        histogram = metrics.Histogram('test', 'test', (1, 5))
+        shared_cache = LocMemCache('histogram-buckets', {})
+        # when
+        histogram.observe(('route', 'GET'), 3)
+        histogram.flush(shared_cache)
+        # then
+        self.assertEqual(histogram.render(shared_cache)[2:5], ['test_bucket{route="route",method="GET",le="1"} 0',
+                                                               'test_bucket{route="route",method="GET",le="5"} 1',
+                                                               'test_bucket{route="route",method="GET",le="+Inf"} 1'])
+
+    def test_should_aggregate_histograms_of_workers_sharing_cache(self):
+        # given
+        workers = [metrics.Histogram('test', 'test', (1, 5)) for _ in range(2)]
+        shared_cache = LocMemCache('histogram-workers', {})
+        # when
+        for value, worker in zip((0.5, 3), workers):
+            worker.observe(('route', 'GET'), value)
+            worker.flush(shared_cache)
+        workers[0].observe(('other', 'POST'), 10)
+        workers[0].flush(shared_cache)
+        # then
+        lines = workers[1].render(shared_cache)
+        self.assertIn('test_bucket{route="route",method="GET",le="1"} 1', lines)
+        self.assertIn('test_bucket{route="route",method="GET",le="5"} 2', lines)
+        self.assertIn('test_sum{route="route",method="GET"} 3.5', lines)
+        self.assertIn('test_count{route="route",method="GET"} 2', lines)
+        self.assertIn('test_bucket{route="other",method="POST",le="5"} 0', lines)
+        self.assertIn('test_count{route="other",method="POST"} 1', lines)
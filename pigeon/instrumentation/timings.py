@@ -0,0 +1,64 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+current_timings: ContextVar[Optional['RequestTimings']] = ContextVar('current_timings', default=None)
+
+
+class RequestTimings:
+    """
+    Time request spent in database, serializing response and file storage, recorded by query hook below
+    and by timed storage, serializer and renderer classes
+    """
+    names = ('db', 'serialize', 'storage')
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.total = None
+        self.queries = 0
+        self.seconds = dict.fromkeys(self.names, 0.0)
+        self.active = set()
+
+    def stop(self) -> float:
+        self.total = time.perf_counter() - self.started_at
+        return self.total
+
+
+@contextmanager
+def timed(name: str):
+    """
+    Add time of block to timings of current request, nested blocks of same name are counted once
+    """
+    timings = current_timings.get()
+    if timings is None or name in timings.active:
+        yield
+        return
+    timings.active.add(name)
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.seconds[name] += time.perf_counter() - started_at
+        timings.active.discard(name)
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Execute wrapper of database connections, counts queries of current request and their time
+    """
+    timings = current_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    timings.queries += 1
+    with timed('db'):
+        return execute(sql, params, many, context)
+
+
+def add_query_recorder(sender, connection, **kwargs):
+    """
+    connection_created receiver, wrapper stays on connection object when it reconnects
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
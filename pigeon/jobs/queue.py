@@ -0,0 +1,108 @@
+import logging
+import random
+import traceback
+from datetime import timedelta
+from typing import List
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from pigeon.jobs.registry import get_job
+from pigeon.models import Job
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(name: str, payload: dict, delay: int = 0):
+    """
+    Store job in queue, row is part of current transaction, so job exists only when request commits.
+    With JOBS_EAGER job runs in process right away, for tests and development without worker
+    :param name: name of registered job
+    :param payload: JSON serializable arguments of job
+    :param delay: seconds to wait before first run
+    :return: created Job, None when run eagerly
+    """
+    definition = get_job(name)
+    if settings.JOBS_EAGER:
+        definition(payload)
+        return None
+    return Job.objects.create(name=name, payload=payload, max_attempts=definition.max_attempts,
+                              run_at=timezone.now() + timedelta(seconds=delay))
+
+
+def enqueue_many(name: str, payloads: List[dict]) -> List[Job]:
+    """
+    Store many jobs of same name with single INSERT, see enqueue
+    :return: created jobs, empty list when run eagerly
+    """
+    definition = get_job(name)
+    if settings.JOBS_EAGER:
+        for payload in payloads:
+            definition(payload)
+        return []
+    now = timezone.now()
+    return Job.objects.bulk_create([Job(name=name, payload=payload, max_attempts=definition.max_attempts, run_at=now)
+                                    for payload in payloads])
+
+
+def get_backoff(attempts: int) -> timedelta:
+    """
+    Exponential backoff with jitter, so jobs failing on same outage do not retry at once
+    """
+    delay = min(settings.JOBS_RETRY_MAX_DELAY, settings.JOBS_RETRY_BASE_DELAY * 2 ** (attempts - 1))
+    return timedelta(seconds=delay * random.uniform(0.5, 1))
+
+
+def claim(batch_size: int) -> List[Job]:
+    """
+    Mark due jobs as running, jobs running longer than JOBS_LOCK_TIMEOUT are claimed again as their worker died.
+    On PostgreSQL rows locked by other workers are skipped, so many workers can claim concurrently
+    """
+    now = timezone.now()
+    due = Job.objects.filter(status=Job.PENDING, run_at__lte=now) | Job.objects.filter(
+        status=Job.RUNNING, locked_at__lte=now - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT))
+    with transaction.atomic():
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        jobs = list(due.order_by('run_at')[:batch_size])
+        Job.objects.filter(id__in=[job.id for job in jobs]).update(status=Job.RUNNING, locked_at=now)
+    return jobs
+
+
+def run(job: Job) -> bool:
+    """
+    Run claimed job, failed job is scheduled again with backoff until it runs out of attempts.
+    Succeeded job is deleted, so queue table holds only pending, running and failed jobs
+    :return: True if job succeeded
+    """
+    definition = get_job(job.name)
+    job.attempts += 1
+    try:
+        definition(job.payload)
+    except Exception as exception:
+        logger.warning('Job %s %s failed on attempt %s', job.id, job.name, job.attempts, exc_info=True)
+        job.last_error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            job.status = Job.FAILED
+            if definition.on_failure is not None:
+                definition.on_failure(job.payload, exception)
+        else:
+            job.status = Job.PENDING
+            job.run_at = timezone.now() + get_backoff(job.attempts)
+        job.locked_at = None
+        job.save(update_fields=['attempts', 'status', 'run_at', 'locked_at', 'last_error'])
+        return False
+    job.delete()
+    return True
+
+
+def run_pending(batch_size: int = 10) -> int:
+    """
+    Claim and run one batch of due jobs
+    :return: number of jobs run
+    """
+    jobs = claim(batch_size)
+    for job in jobs:
+        run(job)
+    return len(jobs)
@@ -0,0 +1,42 @@
+from typing import Callable, Optional
+
+
+class JobDefinition:
+    """
+    Function run by worker for job of given name
+    """
+
+    def __init__(self, name: str, func: Callable, max_attempts: int, on_failure: Optional[Callable] = None):
+        self.name = name
+        self.func = func
+        self.max_attempts = max_attempts
+        self.on_failure = on_failure
+
+    def __call__(self, payload: dict):
+        return self.func(payload)
+
+
+_registry = {}
+
+
+def job(name: str, max_attempts: int = 5, on_failure: Optional[Callable] = None):
+    """
+    Register decorated function as job, function gets payload dict and raises to be retried.
+    Job can run more than once (retry after worker died), so it has to be idempotent
+    :param name: name jobs are enqueued with
+    :param max_attempts: number of runs before job is marked failed
+    :param on_failure: called with payload and last exception when all attempts failed
+    """
+
+    def register(func: Callable) -> Callable:
+        _registry[name] = JobDefinition(name, func, max_attempts, on_failure)
+        return func
+
+    return register
+
+
+def get_job(name: str) -> JobDefinition:
+    try:
+        return _registry[name]
+    except KeyError:
+        raise LookupError(f'Job {name} is not registered')
@@ -0,0 +1,119 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from pigeon.jobs.queue import enqueue, run_pending
+from pigeon.jobs.registry import job
+from pigeon.models import Job
+
+calls = []
+failures = []
+
+
+@job('test_record')
+def record(payload: dict):
+    calls.append(payload)
+
+
+@job('test_fail', max_attempts=2, on_failure=lambda payload, exception: failures.append(str(exception)))
+def fail(payload: dict):
+    raise ConnectionError('service unavailable')
+
+
+@override_settings(JOBS_EAGER=False)
+class TestJobQueue(TestCase):
+    def setUp(self) -> None:
+        calls.clear()
+        failures.clear()
+
+    def test_should_store_job_and_run_it_by_worker(self):
+        # given
+        enqueue('test_record', {'value': 1})
+        # when
+        count = run_pending()
+        # then
+        self.assertEqual(count, 1)
+        self.assertEqual(calls, [{'value': 1}])
+        self.assertFalse(Job.objects.exists())
+
+    def test_should_delete_job_when_it_succeeds_on_retry(self):
+        # given
+        job = enqueue('test_record', {'value': 1})
+        Job.objects.update(attempts=1, last_error='service unavailable')
+        # when
+        run_pending()
+        # then
+        self.assertFalse(Job.objects.filter(id=job.id).exists())
+
+    def test_should_not_run_delayed_job_before_time(self):
+        # given
+        enqueue('test_record', {}, delay=60)
+        # when
+        count = run_pending()
+        # then
+        self.assertEqual(count, 0)
+        self.assertEqual(calls, [])
+
+    @override_settings(JOBS_RETRY_BASE_DELAY=10)
+    def test_should_retry_failed_job_with_backoff(self):
+        # given
+        job = enqueue('test_fail', {})
+        # when
+        with self.assertLogs('pigeon.jobs.queue', 'WARNING'):
+            run_pending()
+        job.refresh_from_db()
+        # then
+        self.assertEqual(job.status, Job.PENDING)
+        self.assertIn('service unavailable', job.last_error)
+        self.assertGreaterEqual(job.run_at, timezone.now() + timedelta(seconds=4))
+        self.assertEqual(failures, [])
+
+    def test_should_mark_job_failed_when_out_of_attempts(self):
+        # given
+        job = enqueue('test_fail', {})
+        # when
+        with self.assertLogs('pigeon.jobs.queue', 'WARNING'):
+            run_pending()
+            Job.objects.update(run_at=timezone.now())
+            run_pending()
+        job.refresh_from_db()
+        # then
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertEqual(failures, ['service unavailable'])
+
+    @override_settings(JOBS_LOCK_TIMEOUT=60)
+    def test_should_reclaim_job_of_dead_worker(self):
+        # given
+        job = enqueue('test_record', {})
+        Job.objects.update(status=Job.RUNNING, locked_at=timezone.now() - timedelta(minutes=5))
+        # when
+        run_pending()
+        # then
+        self.assertEqual(calls, [{}])
+        self.assertFalse(Job.objects.filter(id=job.id).exists())
+
+    def test_run_jobs_command_should_drain_queue(self):
+        # given
+        for value in range(3):
+            enqueue('test_record', {'value': value})
+        # when
+        with mock.patch('time.sleep') as sleep:
+            call_command('run_jobs', '--once', '--batch-size', '2', stdout=StringIO())
+        # then
+        self.assertEqual(len(calls), 3)
+        sleep.assert_not_called()
+        self.assertFalse(Job.objects.exists())
+
+    @override_settings(JOBS_EAGER=True)
+    def test_should_run_job_in_process_when_eager(self):
+        # when
+        job = enqueue('test_record', {'value': 1})
+        # then
+        self.assertIsNone(job)
+        self.assertEqual(calls, [{'value': 1}])
+        self.assertFalse(Job.objects.exists())
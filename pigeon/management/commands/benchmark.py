@@ -0,0 +1,76 @@
+import json
+import subprocess
+import sys
+
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from pigeon.benchmarks.runner import Runner, compare
+from pigeon.benchmarks.scenarios import SCENARIOS, BenchmarkData
+from pigeon.models import Channel, Comment, Like, Post
+
+
+class Command(BaseCommand):
+    """
+    Run benchmark scenarios against current database (seed it with seed_data first) and write JSON results,
+    which can be compared with results of other commit. Scenarios writing data (likes, comments, registrations)
+    change database, run them on database dedicated to benchmarks
+    """
+    help = 'Measure latency percentiles, queries per request and throughput of API scenarios'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenarios', nargs='+', choices=sorted(SCENARIOS), default=list(SCENARIOS))
+        parser.add_argument('--requests', type=int, default=200, help='Requests per scenario')
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--warmup', type=int, default=20)
+        parser.add_argument('--users', type=int, default=1000, help='Number of most active users making requests')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='File of JSON results, stdout by default')
+        parser.add_argument('--compare', help='JSON results of baseline run')
+        parser.add_argument('--max-regression', type=float, default=10,
+                            help='Fail when p95 latency or queries per request grow by more percent than baseline')
+
+    def handle(self, *args, **options):
+        data = BenchmarkData(users=options['users'])
+        runner = Runner(requests=options['requests'], concurrency=options['concurrency'], warmup=options['warmup'],
+                        seed=options['seed'])
+        results = {'meta': self.get_meta(options), 'scenarios': {}}
+        for name in options['scenarios']:
+            scenario = SCENARIOS[name](data)
+            if not scenario.is_ready():
+                self.stderr.write(f'Skipping {name}, database has no data for it, run seed_data')
+                continue
+            results['scenarios'][name] = result = runner.run(scenario)
+            latency = result['latency_ms']
+            self.stderr.write(f"{name:<16} p50 {latency['p50']:>8} ms  p95 {latency['p95']:>8} ms"
+                              f"  p99 {latency['p99']:>8} ms  {result['queries_per_request']['mean']:>6}"
+                              f" queries  {result['throughput_rps']:>8} rps  {result['errors']} errors")
+        output = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output)
+        else:
+            self.stdout.write(output)
+        if options['compare']:
+            with open(options['compare']) as file:
+                regressions = compare(json.load(file), results, options['max_regression'])
+            if regressions:
+                raise CommandError('Regressions against baseline:\n' + '\n'.join(regressions))
+            self.stderr.write(self.style.SUCCESS('No regressions against baseline'))
+
+    def get_meta(self, options) -> dict:
+        try:
+            commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                    check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            'commit': commit,
+            'created_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'python': sys.version.split()[0],
+            'requests': options['requests'],
+            'concurrency': options['concurrency'],
+            'rows': {model._meta.model_name: model.objects.count() for model in (Post, Channel, Comment, Like)},
+        }
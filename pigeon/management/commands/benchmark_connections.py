@@ -0,0 +1,88 @@
+import copy
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management import BaseCommand, CommandError
+from django.db import connections
+
+from pigeon.benchmarks.runner import percentile
+from pigeon.db.pool import get_pool
+from pigeon.db.postgresql.base import DatabaseWrapper
+
+CONNECTION_MODES = ('direct', 'persistent', 'pool', 'pgbouncer')
+
+
+class Command(BaseCommand):
+    """
+    Simulate requests against configured PostgreSQL in every connection mode: connection is checked at start
+    and end of request like Django does, request runs its queries in between.
+    For pgbouncer mode point DB_HOST and DB_PORT to pgbouncer
+    """
+    help = 'Measure database latency per request of direct, persistent and pooled connections'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', default='direct,persistent,pool', help='Comma separated connection modes')
+        parser.add_argument('--requests', type=int, default=500, help='Requests per thread and mode')
+        parser.add_argument('--threads', type=int, default=4, help='Concurrent threads, also size of pool')
+        parser.add_argument('--queries', type=int, default=1, help='Queries per request')
+        parser.add_argument('--no-health-checks', action='store_true', help='Do not check reused connections')
+
+    def handle(self, *args, **options):
+        modes = options['modes'].split(',')
+        if not set(modes) <= set(CONNECTION_MODES):
+            raise CommandError(f'Unknown connection mode in {modes}, use {CONNECTION_MODES}')
+        if connections['default'].vendor != 'postgresql':
+            raise CommandError('Connection benchmark needs PostgreSQL database')
+        self.stdout.write(f"{'mode':<12}{'p50 ms':>10}{'p99 ms':>10}{'mean ms':>10}{'saved ms':>10}")
+        direct_mean = None
+        for mode in modes:
+            latencies = self.measure(mode, options)
+            mean = sum(latencies) / len(latencies)
+            if mode == 'direct':
+                direct_mean = mean
+            saved = f'{direct_mean - mean:>10.2f}' if direct_mean is not None else f"{'-':>10}"
+            self.stdout.write(f'{mode:<12}{percentile(latencies, 0.5):>10.2f}{percentile(latencies, 0.99):>10.2f}'
+                              f'{mean:>10.2f}{saved}')
+
+    def get_settings(self, mode: str, options) -> dict:
+        settings_dict = copy.deepcopy(connections['default'].settings_dict)
+        settings_dict.update({
+            'CONN_MAX_AGE': 600 if mode in ('persistent', 'pgbouncer') else 0,
+            'CONN_HEALTH_CHECKS': not options['no_health_checks'],
+            'DISABLE_SERVER_SIDE_CURSORS': mode == 'pgbouncer',
+            'POOL': {'MAX_SIZE': options['threads'], 'TIMEOUT': 30} if mode == 'pool' else None,
+        })
+        return settings_dict
+
+    def measure(self, mode: str, options) -> list:
+        """
+        :return: latencies of all requests in milliseconds
+        """
+        alias = f'benchmark_{mode}'
+        settings_dict = self.get_settings(mode, options)
+        latencies = []
+        lock = threading.Lock()
+
+        def client():
+            connection = DatabaseWrapper(settings_dict, alias)
+            try:
+                for _ in range(options['requests']):
+                    start = time.perf_counter()
+                    connection.close_if_unusable_or_obsolete()
+                    with connection.cursor() as cursor:
+                        for _ in range(options['queries']):
+                            cursor.execute('SELECT 1')
+                            cursor.fetchone()
+                    connection.close_if_unusable_or_obsolete()
+                    with lock:
+                        latencies.append((time.perf_counter() - start) * 1000)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+            for future in [executor.submit(client) for _ in range(options['threads'])]:
+                future.result()
+        if settings_dict['POOL']:
+            get_pool(alias, settings_dict['POOL']).close_idle()
+        return latencies
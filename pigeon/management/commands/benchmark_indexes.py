@@ -0,0 +1,117 @@
+import random
+
+from django.contrib.auth.models import User
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import Max
+
+from pigeon.models import Channel, Post, Comment, Like, Tag
+
+# indexes and constraints backing explained queries, dropped to explain plans without them
+BENCHMARKED_INDEXES = {
+    Post: ['post_channel_created_idx'],
+    Comment: ['comment_post_created_idx', 'comment_post_thread_idx'],
+    Like: ['like_user_post_unique'],
+}
+
+
+class Command(BaseCommand):
+    """
+    Seed PostgreSQL database with big amount of posts and print query plans of hot read paths,
+    optionally without benchmarked indexes. Indexes are dropped in transaction which is rolled back,
+    so schema and data stay untouched, but tables are locked until plans are explained
+    """
+    help = 'Print PostgreSQL query plans of feed, comment, like and tag lookups, with and without indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', action='store_true', help='Seed database before explaining')
+        parser.add_argument('--posts', type=int, default=1_000_000)
+        parser.add_argument('--channels', type=int, default=1_000)
+        parser.add_argument('--users', type=int, default=10_000)
+        parser.add_argument('--tags', type=int, default=10_000)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--compare', action='store_true',
+                            help='Explain plans without benchmarked indexes first, then with them')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Query plans are only meaningful on PostgreSQL')
+        executor = MigrationExecutor(connection)
+        if executor.migration_plan(executor.loader.graph.leaf_nodes()):
+            raise CommandError('Database has unapplied migrations, run migrate first')
+        if options['seed']:
+            self.seed(options)
+        if options['compare']:
+            with transaction.atomic():
+                self.drop_indexes()
+                self.explain('before')
+                transaction.set_rollback(True)
+        self.explain('after' if options['compare'] else 'current')
+
+    def drop_indexes(self):
+        with connection.schema_editor(atomic=False) as schema_editor:
+            for model, names in BENCHMARKED_INDEXES.items():
+                for index in model._meta.indexes:
+                    if index.name in names:
+                        schema_editor.remove_index(model, index)
+                for constraint in model._meta.constraints:
+                    if constraint.name in names:
+                        schema_editor.remove_constraint(model, constraint)
+            # tag names are looked up by unique index of field
+            unique_name = Tag._meta.get_field('name')
+            name, path, args, kwargs = unique_name.deconstruct()
+            plain_name = unique_name.__class__(*args, **{**kwargs, 'unique': False})
+            plain_name.set_attributes_from_name(name)
+            plain_name.model = Tag
+            schema_editor.alter_field(Tag, unique_name, plain_name)
+
+    def seed(self, options):
+        """
+        Add rows on top of existing ones, names continue from last user id, so seeding can be repeated
+        """
+        batch_size = options['batch_size']
+        offset = User.objects.aggregate(last_id=Max('id'))['last_id'] or 0
+        users = User.objects.bulk_create(
+            [User(username=f'benchmark_{offset + i}', email=f'benchmark_{offset + i}@pigeon.app')
+             for i in range(options['users'])],
+            batch_size=batch_size)
+        channels = Channel.objects.bulk_create(
+            [Channel(name=f'channel {i}', is_private=False, owner=random.choice(users))
+             for i in range(options['channels'])],
+            batch_size=batch_size)
+        post_channels = channels + [None]
+        Tag.objects.bulk_create([Tag(name=f'tag_{i}') for i in range(options['tags'])],
+                                batch_size=batch_size, ignore_conflicts=True)
+        for start in range(0, options['posts'], batch_size):
+            count = min(batch_size, options['posts'] - start)
+            posts = Post.objects.bulk_create(
+                [Post(title=f'post {start + i}', body='lorem ipsum', author=random.choice(users),
+                      channel=random.choice(post_channels)) for i in range(count)])
+            Comment.objects.bulk_create(
+                [Comment(body='dolor sit amet', post=post, user=random.choice(users)) for post in posts])
+            likes = {(random.choice(users).id, post.id) for post in posts for _ in range(2)}
+            Like.objects.bulk_create([Like(user_id=user_id, post_id=post_id) for user_id, post_id in likes],
+                                     ignore_conflicts=True)
+            self.stdout.write(f'Seeded {start + count} posts')
+        # bulk inserts send no signals, counters are recounted from rows
+        with transaction.atomic():
+            Post.objects.rebuild_counters()
+            Channel.objects.rebuild_counters()
+            Tag.objects.rebuild_counters()
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def explain(self, label: str):
+        channel_id = Post.objects.exclude(channel=None).values_list('channel_id', flat=True).first()
+        like = Like.objects.values('user_id', 'post_id').first()
+        tag_names = list(Tag.objects.values_list('name', flat=True)[:5])
+        queries = {
+            'channel feed': Post.objects.filter(channel_id=channel_id).order_by('created_at')[:12],
+            'comment list': Comment.objects.filter(post=like['post_id']).order_by('created_at')[:10],
+            'like lookup': Like.objects.filter(user=like['user_id'], post=like['post_id']),
+            'tag lookup': Tag.objects.filter(name__in=tag_names),
+        }
+        for name, queryset in queries.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f'[{label}] {name}'))
+            self.stdout.write(queryset.explain(analyze=True, buffers=True))
@@ -0,0 +1,113 @@
+import http.client
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from pigeon.models import Channel
+
+SERVER_MODES = ('wsgi', 'asgi')
+
+
+class Command(BaseCommand):
+    """
+    Start gunicorn in WSGI and ASGI mode against configured database and compare requests per second
+    and latency percentiles of read endpoints under high concurrency
+    """
+    help = 'Compare throughput and p99 latency of feed and channel reads served by WSGI and ASGI workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', default=','.join(SERVER_MODES), help='Comma separated server modes')
+        parser.add_argument('--concurrency', type=int, default=64, help='Number of concurrent connections')
+        parser.add_argument('--requests', type=int, default=2000, help='Requests per endpoint and mode')
+        parser.add_argument('--workers', type=int, default=2, help='Gunicorn workers')
+        parser.add_argument('--port', type=int, default=8765)
+
+    def handle(self, *args, **options):
+        modes = options['modes'].split(',')
+        if not set(modes) <= set(SERVER_MODES):
+            raise CommandError(f'Unknown server mode in {modes}, use {SERVER_MODES}')
+        user, _ = User.objects.get_or_create(username='benchmark', defaults={'email': 'benchmark@pigeon.app'})
+        channel = Channel.objects.filter(owner=user).first() or Channel.objects.create(
+            name='benchmark', is_private=False, owner=user)
+        token = str(AccessToken.for_user(user))
+        paths = ['/posts/', f'/posts/?channel={channel.id}', '/channels/', f'/channels/{channel.id}/',
+                 '/posts/1/comments/']
+        self.stdout.write(f"{'mode':<6}{'path':<28}{'rps':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+        for mode in modes:
+            server = self.start_server(mode, options)
+            try:
+                for path in paths:
+                    result = self.load(path, token, options)
+                    self.stdout.write(f"{mode:<6}{path:<28}{result['rps']:>10.1f}{result['p50']:>10.1f}"
+                                      f"{result['p99']:>10.1f}{result['errors']:>8}")
+            finally:
+                server.terminate()
+                server.wait()
+
+    def start_server(self, mode: str, options) -> subprocess.Popen:
+        env = dict(os.environ, SERVER_MODE=mode, PORT=str(options['port']), WEB_CONCURRENCY=str(options['workers']))
+        server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py'],
+                                  cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            try:
+                connection = http.client.HTTPConnection('127.0.0.1', options['port'], timeout=1)
+                connection.request('GET', '/')
+                connection.getresponse().read()
+                return server
+            except OSError:
+                if server.poll() is not None:
+                    break
+                time.sleep(0.2)
+        server.terminate()
+        raise CommandError(f'Gunicorn in {mode} mode did not start, is {"uvicorn" if mode == "asgi" else "gunicorn"} '
+                           f'installed?')
+
+    def load(self, path: str, token: str, options) -> dict:
+        """
+        Send requests over keep-alive connections from concurrency threads
+        :return: dict in format {'rps': float, 'p50': float, 'p99': float, 'errors': int}
+        """
+        latencies = []
+        errors = []
+        lock = threading.Lock()
+        per_connection = max(1, options['requests'] // options['concurrency'])
+        headers = {'Authorization': f'Bearer {token}'}
+
+        def client():
+            connection = http.client.HTTPConnection('127.0.0.1', options['port'], timeout=30)
+            for _ in range(per_connection):
+                start = time.perf_counter()
+                try:
+                    connection.request('GET', path, headers=headers)
+                    response = connection.getresponse()
+                    response.read()
+                    failed = response.status >= 500
+                except OSError:
+                    connection.close()
+                    connection = http.client.HTTPConnection('127.0.0.1', options['port'], timeout=30)
+                    failed = True
+                with lock:
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    if failed:
+                        errors.append(path)
+            connection.close()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            for _ in range(options['concurrency']):
+                executor.submit(client)
+        elapsed = time.perf_counter() - start
+        latencies.sort()
+        return {'rps': len(latencies) / elapsed,
+                'p50': latencies[len(latencies) // 2],
+                'p99': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+                'errors': len(errors)}
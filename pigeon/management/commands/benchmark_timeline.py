@@ -0,0 +1,79 @@
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management import BaseCommand
+from django.db import connection
+
+from pigeon.blog.timeline.utils import TimelineUtils
+from pigeon.models import Channel, Post
+
+PAGE_SIZE = 13
+
+
+class Command(BaseCommand):
+    """
+    Time first and deep page of timeline of users in 1, 50 and 500 channels,
+    with k-way merge (PostgreSQL) and with single IN query
+    """
+    help = 'Measure timeline query time by number of channels of user'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--channels', type=int, nargs='+', default=[1, 50, 500])
+        parser.add_argument('--posts-per-channel', type=int, default=200)
+        parser.add_argument('--pages', type=int, default=20, help='Depth of deep page')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        strategies = [('in', False)]
+        if connection.features.supports_slicing_ordering_in_compound:
+            strategies.insert(0, ('merge', True))
+        channels = self.seed(max(options['channels']), options['posts_per_channel'])
+        self.stdout.write(f"{'channels':>10}{'strategy':>10}{'first page ms':>16}{'deep page ms':>16}")
+        try:
+            for count in options['channels']:
+                channel_ids = {channel.id for channel in channels[:count]}
+                for name, merge in strategies:
+                    first = self.measure(channel_ids, None, merge, options['repeat'])
+                    before = self.get_deep_position(channel_ids, options['pages'], merge)
+                    deep = self.measure(channel_ids, before, merge, options['repeat'])
+                    self.stdout.write(f'{count:>10}{name:>10}{first:>16.2f}{deep:>16.2f}')
+        finally:
+            Post.objects.filter(channel__in=channels).delete()
+            Channel.objects.filter(id__in=[channel.id for channel in channels]).delete()
+
+    def seed(self, channels_count: int, posts_per_channel: int) -> list:
+        owner, _ = User.objects.get_or_create(username='benchmark', defaults={'email': 'benchmark@pigeon.app'})
+        channels = Channel.objects.bulk_create(
+            [Channel(name=f'timeline {i}', is_private=False, owner=owner) for i in range(channels_count)])
+        if channels[0].id is None:
+            channels = list(Channel.objects.filter(owner=owner, name__startswith='timeline ').order_by('-id')
+                            [:channels_count])
+        posts = [Post(title='timeline', body='lorem ipsum', author=owner, channel=channel)
+                 for channel in channels for _ in range(posts_per_channel)]
+        random.shuffle(posts)
+        Post.objects.bulk_create(posts, batch_size=10_000)
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE pigeon_post')
+        return channels
+
+    def get_deep_position(self, channel_ids: set, pages: int, merge: bool):
+        before = None
+        for _ in range(pages):
+            posts = TimelineUtils.get_posts(channel_ids, before, PAGE_SIZE, merge)
+            if not posts:
+                break
+            before = (posts[-1].created_at, posts[-1].id)
+        return before
+
+    def measure(self, channel_ids: set, before, merge: bool, repeat: int) -> float:
+        """
+        :return: best time of loading page in milliseconds
+        """
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            TimelineUtils.get_posts(channel_ids, before, PAGE_SIZE, merge)
+            timings.append((time.perf_counter() - start) * 1000)
+        return min(timings)
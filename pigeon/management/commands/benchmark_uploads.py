@@ -0,0 +1,110 @@
+import io
+import resource
+import threading
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import BaseCommand
+from django.db import connection
+from django.test import override_settings
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from PIL import Image as PillowImage
+from rest_framework_simplejwt.tokens import AccessToken
+
+from pigeon.benchmarks.runner import benchmark_settings
+from pigeon.blog.images.uploads import BoundedUploadMixin
+from pigeon.models import Post
+
+UPLOAD_HANDLERS = ('bounded', 'default')
+
+
+class Command(BaseCommand):
+    """
+    Post concurrent multipart uploads through in-process request handler and report peak memory,
+    with bounded upload handler or default Django upload handlers. Max RSS of process never goes down,
+    so handlers are compared by running command once per handlers
+    """
+    help = 'Measure peak memory of concurrent post image uploads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--requests', type=int, default=64)
+        # default handlers keep requests up to FILE_UPLOAD_MAX_MEMORY_SIZE (2.5 MB) in memory, bigger ones on disk
+        parser.add_argument('--images', type=int, default=1, help='Images per request')
+        parser.add_argument('--size-kb', type=int, default=2400, help='Size of every image')
+        parser.add_argument('--handlers', default='bounded', choices=UPLOAD_HANDLERS,
+                            help='Upload handlers, run in separate processes to compare max RSS')
+
+    def handle(self, *args, **options):
+        user, _ = User.objects.get_or_create(username='benchmark', defaults={'email': 'benchmark@pigeon.app'})
+        token = str(AccessToken.for_user(user))
+        image = self.make_image(options['size_kb'] * 1024)
+        name = options['handlers']
+        patch = None
+        if name == 'default':
+            # no-op initialize_request leaves Django default handlers
+            patch = mock.patch.object(BoundedUploadMixin, 'initialize_request',
+                                      lambda view, request, *a, **kw: super(BoundedUploadMixin, view)
+                                      .initialize_request(request, *a, **kw))
+        self.stdout.write(f"{'handlers':<10}{'requests':>10}{'peak traced MB':>16}{'max RSS MB':>12}")
+        try:
+            with benchmark_settings(), override_settings(
+                    IMAGE_UPLOAD_MAX_COUNT=options['images'], IMAGE_UPLOAD_MAX_FILE_SIZE=len(image) + 1,
+                    IMAGE_UPLOAD_MAX_REQUEST_SIZE=(len(image) + 1024) * options['images']):
+                if patch is not None:
+                    patch.start()
+                try:
+                    peak, statuses = self.load(token, image, options)
+                finally:
+                    if patch is not None:
+                        patch.stop()
+            max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+            self.stdout.write(f"{name:<10}{statuses.count(200):>10}{peak / 2 ** 20:>16.1f}{max_rss:>12.1f}")
+        finally:
+            Post.objects.filter(author=user).delete()
+
+    def make_image(self, size: int) -> bytes:
+        """
+        Small JPEG padded to requested size, handler only reads signature and pipeline is not run
+        """
+        output = io.BytesIO()
+        PillowImage.new('RGB', (64, 64)).save(output, format='JPEG')
+        return output.getvalue() + b'\0' * max(0, size - output.tell())
+
+    def load(self, token: str, image: bytes, options):
+        """
+        Requests share one encoded body and go straight to WSGI handler, test client would copy
+        and keep body of every request, which hides memory used by upload handlers
+        """
+        statuses = []
+        lock = threading.Lock()
+        files = [io.BytesIO(image) for _ in range(options['images'])]
+        for index, file in enumerate(files):
+            file.name = f'image_{index}.jpg'
+        body = encode_multipart(BOUNDARY, {'title': 'benchmark', 'body': 'benchmark', 'images': files})
+        handler = WSGIHandler()
+
+        def upload(_):
+            environ = {'REQUEST_METHOD': 'POST', 'PATH_INFO': '/posts/', 'SCRIPT_NAME': '', 'QUERY_STRING': '',
+                       'SERVER_NAME': 'testserver', 'SERVER_PORT': '80', 'wsgi.url_scheme': 'http',
+                       'CONTENT_TYPE': MULTIPART_CONTENT, 'CONTENT_LENGTH': str(len(body)),
+                       'HTTP_AUTHORIZATION': f'Bearer {token}', 'wsgi.input': io.BytesIO(body)}
+            try:
+                response = handler(environ, lambda status, headers: None)
+                response.close()
+                with lock:
+                    statuses.append(response.status_code)
+            finally:
+                connection.close()
+
+        tracemalloc.start()
+        try:
+            with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+                list(executor.map(upload, range(options['requests'])))
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return peak, statuses
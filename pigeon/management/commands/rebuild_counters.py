@@ -0,0 +1,21 @@
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from pigeon.models import Channel, Comment, Post, Tag
+
+
+class Command(BaseCommand):
+    """
+    Recount denormalized counters of posts, comments and channels from rows
+    """
+    help = ('Rebuild likes/comments counters of posts, members/posts counters of channels, '
+            'usage counters of tags and replies counters of comments')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            posts = Post.objects.rebuild_counters()
+            channels = Channel.objects.rebuild_counters()
+            tags = Tag.objects.rebuild_counters()
+            comments = Comment.objects.rebuild_counters()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt counters of {posts} posts, {channels} channels, {tags} tags '
+                                             f'and {comments} comments'))
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management import BaseCommand
+
+from pigeon.jobs.queue import run_pending
+
+
+class Command(BaseCommand):
+    """
+    Worker running background jobs from database queue, many workers can run side by side
+    """
+    help = 'Run queued background jobs (emails, image processing)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run until no job is due, then exit')
+        parser.add_argument('--batch-size', type=int, default=10, help='Number of jobs claimed at once')
+        parser.add_argument('--sleep', type=float, default=1.0, help='Seconds to wait when queue is empty')
+
+    def handle(self, *args, **options):
+        while True:
+            count = run_pending(options['batch_size'])
+            if options['once'] and not count:
+                return
+            if not count:
+                time.sleep(options['sleep'])
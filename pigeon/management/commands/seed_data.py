@@ -0,0 +1,40 @@
+from django.core.management import BaseCommand, CommandError
+
+from pigeon.benchmarks.seed import Seeder
+
+
+class Command(BaseCommand):
+    """
+    Seed database with skewed synthetic data for benchmarks, counts not given are derived from --posts
+    """
+    help = 'Seed users, channels, memberships, posts, comments, likes and tags with power law popularity'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=10_000, help='10^4 to 10^7')
+        parser.add_argument('--users', type=int, help='Default posts / 10')
+        parser.add_argument('--channels', type=int, help='Default posts / 1000')
+        parser.add_argument('--tags', type=int, help='Default posts / 100')
+        parser.add_argument('--memberships-per-user', type=float, default=5)
+        parser.add_argument('--comments-per-post', type=float, default=3)
+        parser.add_argument('--likes-per-post', type=float, default=5)
+        parser.add_argument('--skew', type=float, default=1.1, help='Exponent of Zipf law of popularity')
+        parser.add_argument('--days', type=int, default=365, help='Posts are spread over this many last days')
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--seed', type=int, default=0, help='Same seed gives same data, seed is part of names')
+
+    def handle(self, *args, **options):
+        posts = options['posts']
+        seeder = Seeder(users=options['users'] or max(10, posts // 10),
+                        channels=options['channels'] or max(5, posts // 1000),
+                        posts=posts,
+                        tags=options['tags'] or max(10, posts // 100),
+                        memberships_per_user=options['memberships_per_user'],
+                        comments_per_post=options['comments_per_post'],
+                        likes_per_post=options['likes_per_post'],
+                        skew=options['skew'], days=options['days'], batch_size=options['batch_size'],
+                        seed=options['seed'], log=self.stdout.write)
+        if seeder.channels < 1 or seeder.users < 1:
+            raise CommandError('At least one user and one channel are needed')
+        counts = seeder.run()
+        summary = ', '.join(f'{count} {name}' for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Seeded {summary}'))
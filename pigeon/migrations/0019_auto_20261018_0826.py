@@ -0,0 +1,27 @@
+# Generated by Django 3.2 on 2026-10-18 08:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pigeon', '0018_auto_20210614_0650'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='postimage',
+            name='post',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='post_images', to='pigeon.post'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'created_at', 'id'], name='comment_post_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['channel', 'created_at', 'id'], name='post_channel_created_idx'),
+        ),
+    ]
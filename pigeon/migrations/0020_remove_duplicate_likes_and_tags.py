@@ -0,0 +1,41 @@
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def remove_duplicate_likes(apps, schema_editor):
+    """
+    Keep oldest like of every (user, post) pair, so unique constraint can be created
+    """
+    Like = apps.get_model('pigeon', 'Like')
+    duplicates = Like.objects.values('user', 'post').annotate(first_id=Min('id'), likes=Count('id')).filter(likes__gt=1)
+    for duplicate in duplicates:
+        Like.objects.filter(user=duplicate['user'], post=duplicate['post']) \
+            .exclude(id=duplicate['first_id']) \
+            .delete()
+
+
+def merge_duplicate_tags(apps, schema_editor):
+    """
+    Merge tags with same name into oldest one, moving their post and channel links, so name can be unique
+    """
+    Tag = apps.get_model('pigeon', 'Tag')
+    duplicates = Tag.objects.values('name').annotate(first_id=Min('id'), tags=Count('id')).filter(tags__gt=1)
+    for duplicate in duplicates:
+        tag = Tag.objects.get(id=duplicate['first_id'])
+        others = Tag.objects.filter(name=duplicate['name']).exclude(id=tag.id)
+        for other in others:
+            tag.post.add(*other.post.all())
+            tag.channel.add(*other.channel.all())
+        others.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pigeon', '0019_auto_20261018_0826'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_likes, migrations.RunPython.noop),
+        migrations.RunPython(merge_duplicate_tags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 3.2 on 2026-10-18 08:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pigeon', '0021_auto_20261018_0827'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='channel',
+            name='members_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='channel',
+            name='posts_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='comments_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='likes_count',
+            field=models.IntegerField(default=0),
+        ),
+    ]
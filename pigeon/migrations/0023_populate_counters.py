@@ -0,0 +1,31 @@
+from django.db import migrations
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_of(queryset, field: str):
+    counted = queryset.order_by().values(field).annotate(count=Count('id')).values('count')
+    return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
+
+
+def populate_counters(apps, schema_editor):
+    Channel = apps.get_model('pigeon', 'Channel')
+    Post = apps.get_model('pigeon', 'Post')
+    Comment = apps.get_model('pigeon', 'Comment')
+    Like = apps.get_model('pigeon', 'Like')
+    members = Channel.channel_access.through.objects
+    Channel.objects.update(members_count=count_of(members.filter(channel=OuterRef('pk')), 'channel'),
+                           posts_count=count_of(Post.objects.filter(channel=OuterRef('pk')), 'channel'))
+    Post.objects.update(comments_count=count_of(Comment.objects.filter(post=OuterRef('pk')), 'post'),
+                        likes_count=count_of(Like.objects.filter(post=OuterRef('pk')), 'post'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pigeon', '0022_auto_20261018_0828'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,94 @@
+from django.db import migrations
+
+"""
+Full text search index, which is not expressible with model fields because it differs per database:
+PostgreSQL gets generated tsvector columns with GIN indexes, SQLite gets FTS5 external content tables kept in sync
+by triggers. Both are maintained by database on every insert, update and delete.
+SQLite migrations rebuilding pigeon_post, pigeon_comment or pigeon_channel drop triggers of rebuilt table,
+such migrations have to create triggers of that table again, as 0026 and 0029 do
+"""
+
+POSTGRES_SQL = [
+    "ALTER TABLE pigeon_post ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(body, '')), 'B')) STORED",
+    'CREATE INDEX pigeon_post_search_idx ON pigeon_post USING gin (search_vector)',
+    "ALTER TABLE pigeon_comment ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+    "to_tsvector('simple', coalesce(body, ''))) STORED",
+    'CREATE INDEX pigeon_comment_search_idx ON pigeon_comment USING gin (search_vector)',
+    "ALTER TABLE pigeon_channel ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+    "to_tsvector('simple', coalesce(name, ''))) STORED",
+    'CREATE INDEX pigeon_channel_search_idx ON pigeon_channel USING gin (search_vector)',
+]
+
+POSTGRES_REVERSE_SQL = [
+    'ALTER TABLE pigeon_post DROP COLUMN search_vector',
+    'ALTER TABLE pigeon_comment DROP COLUMN search_vector',
+    'ALTER TABLE pigeon_channel DROP COLUMN search_vector',
+]
+
+SQLITE_SQL = [
+    "CREATE VIRTUAL TABLE pigeon_post_fts USING fts5(title, body, content='pigeon_post', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS pigeon_post_fts_insert AFTER INSERT ON pigeon_post BEGIN "
+    "INSERT INTO pigeon_post_fts(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+    "CREATE TRIGGER IF NOT EXISTS pigeon_post_fts_delete AFTER DELETE ON pigeon_post BEGIN "
+    "INSERT INTO pigeon_post_fts(pigeon_post_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS pigeon_post_fts_update AFTER UPDATE ON pigeon_post BEGIN "
+    "INSERT INTO pigeon_post_fts(pigeon_post_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body); "
+    "INSERT INTO pigeon_post_fts(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+    "INSERT INTO pigeon_post_fts(pigeon_post_fts) VALUES ('rebuild')",
+    "CREATE VIRTUAL TABLE pigeon_comment_fts USING fts5(body, content='pigeon_comment', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS pigeon_comment_fts_insert AFTER INSERT ON pigeon_comment BEGIN "
+    "INSERT INTO pigeon_comment_fts(rowid, body) VALUES (new.id, new.body); END",
+    "CREATE TRIGGER IF NOT EXISTS pigeon_comment_fts_delete AFTER DELETE ON pigeon_comment BEGIN "
+    "INSERT INTO pigeon_comment_fts(pigeon_comment_fts, rowid, body) VALUES ('delete', old.id, old.body); END",
+    "CREATE TRIGGER IF NOT EXISTS pigeon_comment_fts_update AFTER UPDATE ON pigeon_comment BEGIN "
+    "INSERT INTO pigeon_comment_fts(pigeon_comment_fts, rowid, body) VALUES ('delete', old.id, old.body); "
+    "INSERT INTO pigeon_comment_fts(rowid, body) VALUES (new.id, new.body); END",
+    "INSERT INTO pigeon_comment_fts(pigeon_comment_fts) VALUES ('rebuild')",
+    "CREATE VIRTUAL TABLE pigeon_channel_fts USING fts5(name, content='pigeon_channel', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS pigeon_channel_fts_insert AFTER INSERT ON pigeon_channel BEGIN "
+    "INSERT INTO pigeon_channel_fts(rowid, name) VALUES (new.id, new.name); END",
+    "CREATE TRIGGER IF NOT EXISTS pigeon_channel_fts_delete AFTER DELETE ON pigeon_channel BEGIN "
+    "INSERT INTO pigeon_channel_fts(pigeon_channel_fts, rowid, name) VALUES ('delete', old.id, old.name); END",
+    "CREATE TRIGGER IF NOT EXISTS pigeon_channel_fts_update AFTER UPDATE ON pigeon_channel BEGIN "
+    "INSERT INTO pigeon_channel_fts(pigeon_channel_fts, rowid, name) VALUES ('delete', old.id, old.name); "
+    "INSERT INTO pigeon_channel_fts(rowid, name) VALUES (new.id, new.name); END",
+    "INSERT INTO pigeon_channel_fts(pigeon_channel_fts) VALUES ('rebuild')",
+]
+
+SQLITE_REVERSE_SQL = [
+    'DROP TRIGGER IF EXISTS pigeon_post_fts_insert',
+    'DROP TRIGGER IF EXISTS pigeon_post_fts_delete',
+    'DROP TRIGGER IF EXISTS pigeon_post_fts_update',
+    'DROP TABLE IF EXISTS pigeon_post_fts',
+    'DROP TRIGGER IF EXISTS pigeon_comment_fts_insert',
+    'DROP TRIGGER IF EXISTS pigeon_comment_fts_delete',
+    'DROP TRIGGER IF EXISTS pigeon_comment_fts_update',
+    'DROP TABLE IF EXISTS pigeon_comment_fts',
+    'DROP TRIGGER IF EXISTS pigeon_channel_fts_insert',
+    'DROP TRIGGER IF EXISTS pigeon_channel_fts_delete',
+    'DROP TRIGGER IF EXISTS pigeon_channel_fts_update',
+    'DROP TABLE IF EXISTS pigeon_channel_fts',
+]
+
+
+def run_vendor_sql(postgres_sql: list, sqlite_sql: list):
+    def run(apps, schema_editor):
+        vendor_sql = {'postgresql': postgres_sql, 'sqlite': sqlite_sql}
+        for sql in vendor_sql.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pigeon', '0023_populate_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_vendor_sql(POSTGRES_SQL, SQLITE_SQL),
+                             run_vendor_sql(POSTGRES_REVERSE_SQL, SQLITE_REVERSE_SQL)),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 3.2 on 2026-10-18 08:35
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_of(queryset, field: str):
+    counted = queryset.order_by().values(field).annotate(count=Count('id')).values('count')
+    return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
+
+
+def populate_usage_count(apps, schema_editor):
+    Tag = apps.get_model('pigeon', 'Tag')
+    post_links = Tag.post.through.objects.filter(tag=OuterRef('pk'))
+    channel_links = Tag.channel.through.objects.filter(tag=OuterRef('pk'))
+    Tag.objects.update(usage_count=count_of(post_links, 'tag') + count_of(channel_links, 'tag'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pigeon', '0024_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tag',
+            name='usage_count',
+            field=models.IntegerField(db_index=True, default=0),
+        ),
+        migrations.RunPython(populate_usage_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 3.2 on 2026-10-18 08:38
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+# triggers keeping search index of table in sync, same as created by 0024_search_index
+SQLITE_TRIGGERS_SQL = [
+    "CREATE TRIGGER IF NOT EXISTS pigeon_channel_fts_insert AFTER INSERT ON pigeon_channel BEGIN "
+    "INSERT INTO pigeon_channel_fts(rowid, name) VALUES (new.id, new.name); END",
+    "CREATE TRIGGER IF NOT EXISTS pigeon_channel_fts_delete AFTER DELETE ON pigeon_channel BEGIN "
+    "INSERT INTO pigeon_channel_fts(pigeon_channel_fts, rowid, name) VALUES ('delete', old.id, old.name); END",
+    "CREATE TRIGGER IF NOT EXISTS pigeon_channel_fts_update AFTER UPDATE ON pigeon_channel BEGIN "
+    "INSERT INTO pigeon_channel_fts(pigeon_channel_fts, rowid, name) VALUES ('delete', old.id, old.name); "
+    "INSERT INTO pigeon_channel_fts(rowid, name) VALUES (new.id, new.name); END",
+]
+
+
+def restore_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in SQLITE_TRIGGERS_SQL:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pigeon', '0025_tag_usage_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='channel',
+            name='modified_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        # SQLite rebuilds pigeon_channel to add column with default, which drops its search triggers
+        migrations.RunPython(restore_search_triggers, migrations.RunPython.noop),
+    ]
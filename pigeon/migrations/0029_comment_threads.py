@@ -0,0 +1,58 @@
+# Generated by Django 3.2 on 2026-10-18 09:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# triggers keeping search index of table in sync, same as created by 0024_search_index
+SQLITE_TRIGGERS_SQL = [
+    "CREATE TRIGGER IF NOT EXISTS pigeon_comment_fts_insert AFTER INSERT ON pigeon_comment BEGIN "
+    "INSERT INTO pigeon_comment_fts(rowid, body) VALUES (new.id, new.body); END",
+    "CREATE TRIGGER IF NOT EXISTS pigeon_comment_fts_delete AFTER DELETE ON pigeon_comment BEGIN "
+    "INSERT INTO pigeon_comment_fts(pigeon_comment_fts, rowid, body) VALUES ('delete', old.id, old.body); END",
+    "CREATE TRIGGER IF NOT EXISTS pigeon_comment_fts_update AFTER UPDATE ON pigeon_comment BEGIN "
+    "INSERT INTO pigeon_comment_fts(pigeon_comment_fts, rowid, body) VALUES ('delete', old.id, old.body); "
+    "INSERT INTO pigeon_comment_fts(rowid, body) VALUES (new.id, new.body); END",
+]
+
+
+def restore_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in SQLITE_TRIGGERS_SQL:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pigeon', '0028_image_metadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='pigeon.comment'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='replies_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'depth', 'created_at', 'id'], name='comment_post_thread_idx'),
+        ),
+        # SQLite rebuilds pigeon_comment to add foreign key, which drops its search triggers
+        migrations.RunPython(restore_search_triggers, migrations.RunPython.noop),
+    ]
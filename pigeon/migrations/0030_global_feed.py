@@ -0,0 +1,26 @@
+# Generated by Django 3.2 on 2026-10-18 09:22
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def create_global_feed(apps, schema_editor):
+    apps.get_model('pigeon', 'GlobalFeed').objects.create(id=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pigeon', '0029_comment_threads'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GlobalFeed',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modified_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+            ],
+        ),
+        migrations.RunPython(create_global_feed, migrations.RunPython.noop),
+    ]
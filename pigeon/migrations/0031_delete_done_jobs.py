@@ -0,0 +1,19 @@
+# Generated by Django 3.2 on 2026-10-18 14:05
+
+from django.db import migrations
+
+
+def delete_done_jobs(apps, schema_editor):
+    # succeeded jobs are deleted by worker now, rows kept by previous workers are removed once
+    apps.get_model('pigeon', 'Job').objects.filter(status='done').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pigeon', '0030_global_feed'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_done_jobs, migrations.RunPython.noop),
+    ]
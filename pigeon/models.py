@@ -1,51 +1,229 @@
 from django.contrib.auth.models import AbstractUser
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import CharField, Count, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Cast, Coalesce, Concat, LPad
+from django.utils import timezone
 
 
-class Channel(models.Model):
+def subquery_count(queryset, field: str):
+    """
+    Wrap queryset (already correlated with OuterRef) into scalar COUNT subquery,
+    so counting related rows does not multiply rows of outer query
+    """
+    counted = queryset.order_by().values(field).annotate(count=Count('id')).values('count')
+    return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
+
+
+class CounterModel(models.Model):
+    """
+    Model with denormalized counters, which are changed only by F() updates,
+    save() of loaded instance never writes them back, so stale instance does not overwrite concurrent updates
+    """
+    counter_fields = ()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and not kwargs.get('force_insert') and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [field.name for field in self._meta.concrete_fields
+                                       if not field.primary_key and field.name not in self.counter_fields]
+        return super(CounterModel, self).save(*args, **kwargs)
+
+
+class ChannelQuerySet(models.QuerySet):
+    def directory(self):
+        """
+        Channels with owner, tags and images loaded up front, page costs constant number of queries
+        """
+        return self.select_related('owner').prefetch_related('tag_set', 'channel_image')
+
+    def rebuild_counters(self) -> int:
+        """
+        Recount members and posts of channels, fixes counters which drifted from rows
+        """
+        members = Channel.channel_access.through.objects
+        return self.update(members_count=subquery_count(members.filter(channel=OuterRef('pk')), 'channel'),
+                           posts_count=subquery_count(Post.objects.filter(channel=OuterRef('pk')), 'channel'))
+
+
+class Channel(CounterModel):
     name = models.CharField(max_length=100, null=False, blank=False)
     password = models.CharField(max_length=128, null=True, blank=True)
     is_private = models.BooleanField(null=False)
     channel_access = models.ManyToManyField(User)
     owner = models.ForeignKey(User, null=True, on_delete=models.SET_NULL, related_name='channel_owner')
+    members_count = models.IntegerField(default=0)
+    posts_count = models.IntegerField(default=0)
+    # bumped on writes changing channel or its feed, validator of conditional GET
+    modified_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    objects = ChannelQuerySet.as_manager()
+    counter_fields = ('members_count', 'posts_count')
 
     def __str__(self):
         return f"{self.name}"
 
 
-class Post(models.Model):
+class GlobalFeed(models.Model):
+    """
+    Single row holding version of global feed, stored in database so every process sees writes of the others
+    """
+    # bumped on writes changing global feed, validator of conditional GET and part of GlobalFeedCache keys
+    modified_at = models.DateTimeField(default=timezone.now, editable=False)
+
+
+class PostQuerySet(models.QuerySet):
+    def feed(self):
+        """
+        Posts with everything serializers need loaded up front, page costs constant number of queries
+        """
+        return self.select_related('author', 'channel').prefetch_related('tag_set', 'post_images')
+
+    def rebuild_counters(self) -> int:
+        """
+        Recount comments and likes of posts, fixes counters which drifted from rows
+        """
+        return self.update(comments_count=subquery_count(Comment.objects.filter(post=OuterRef('pk')), 'post'),
+                           likes_count=subquery_count(Like.objects.filter(post=OuterRef('pk')), 'post'))
+
+
+class Post(CounterModel):
     body = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     author = models.ForeignKey(User, null=True, on_delete=models.SET_NULL)
     title = models.CharField(max_length=50)
     channel = models.ForeignKey(Channel, null=True, blank=True, on_delete=models.SET_NULL)
+    comments_count = models.IntegerField(default=0)
+    likes_count = models.IntegerField(default=0)
+
+    objects = PostQuerySet.as_manager()
+    counter_fields = ('comments_count', 'likes_count')
+
+    class Meta:
+        indexes = [
+            # feed and keyset pagination: filter by channel, order by (created_at, id)
+            models.Index(fields=['channel', 'created_at', 'id'], name='post_channel_created_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        post = super(Post, cls).from_db(db, field_names, values)
+        # channel post was loaded with, signals move posts count between channels when update changes it
+        if 'channel_id' in post.__dict__:
+            post.saved_channel_id = post.channel_id
+        return post
 
     def __str__(self):
         return f"{self.id}:{self.title}, {self.author}"
 
 
+class TagQuerySet(models.QuerySet):
+    def rebuild_counters(self) -> int:
+        """
+        Recount posts and channels using tags, fixes counters which drifted from rows
+        """
+        post_links = Tag.post.through.objects.filter(tag=OuterRef('pk'))
+        channel_links = Tag.channel.through.objects.filter(tag=OuterRef('pk'))
+        return self.update(usage_count=subquery_count(post_links, 'tag') + subquery_count(channel_links, 'tag'))
+
+
 class Tag(models.Model):
-    name = models.CharField(max_length=100, null=False)
+    name = models.CharField(max_length=100, null=False, unique=True)
     post = models.ManyToManyField(Post, blank=True)
     channel = models.ManyToManyField(Channel, blank=True)
+    # number of posts and channels linked with tag, for popular tags
+    usage_count = models.IntegerField(default=0, db_index=True)
+
+    objects = TagQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.name}"
 
 
-class Comment(models.Model):
+class CommentQuerySet(models.QuerySet):
+    def subtrees(self, comments: list, depth: int):
+        """
+        Replies of comments at most depth levels below them, whole subtrees are matched by prefix of path in one query
+        """
+        if not comments:
+            return self.none()
+        condition = Q()
+        for comment in comments:
+            condition |= Q(path__startswith=comment.get_subtree_path(), depth__lte=comment.depth + depth)
+        return self.filter(condition)
+
+    def rebuild_counters(self) -> int:
+        """
+        Recount replies of comments, fixes counters which drifted from rows
+        """
+        subtree_path = Concat(OuterRef('path'), LPad(Cast(OuterRef('id'), CharField()), Comment.PATH_DIGITS,
+                                                     Value('0')), Value('/'), output_field=CharField())
+        replies = Comment.objects.filter(post=OuterRef('post'), path__startswith=subtree_path)
+        return self.update(replies_count=subquery_count(replies, 'post'))
+
+
+class Comment(CounterModel):
+    PATH_DIGITS = 10
+
     created_at = models.DateTimeField(auto_now_add=True)
     body = models.TextField()
     post = models.ForeignKey(Post, on_delete=models.CASCADE)
     user = models.ForeignKey(User, null=True, on_delete=models.SET_NULL)
+    parent = models.ForeignKey('self', null=True, blank=True, on_delete=models.CASCADE, related_name='replies')
+    # materialized path, ids of ancestors from top level comment down, each zero padded and followed by '/',
+    # so subtree of comment is matched by path prefix and ancestors are known without recursive queries
+    path = models.CharField(max_length=255, blank=True, default='', editable=False, db_index=True)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+    # number of all replies below comment, for top level comment number of replies in thread
+    replies_count = models.IntegerField(default=0)
+
+    objects = CommentQuerySet.as_manager()
+    counter_fields = ('replies_count',)
+
+    class Meta:
+        indexes = [
+            # comment list and keyset pagination: filter by post, order by (created_at, id)
+            models.Index(fields=['post', 'created_at', 'id'], name='comment_post_created_idx'),
+            # threads: top level comments (depth 0) of post, order by (created_at, id)
+            models.Index(fields=['post', 'depth', 'created_at', 'id'], name='comment_post_thread_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.parent_id is not None and not self.path:
+            self.path = self.parent.get_subtree_path()
+            self.depth = self.parent.depth + 1
+        return super(Comment, self).save(*args, **kwargs)
+
+    def get_subtree_path(self) -> str:
+        """
+        :return: path of replies of comment
+        """
+        return f'{self.path}{self.id:0{self.PATH_DIGITS}d}/'
+
+    def get_ancestor_ids(self) -> list:
+        return [int(comment_id) for comment_id in self.path.split('/') if comment_id]
 
     def __str__(self):
         return f"{self.body[:10]}, {self.user}"
 
 
 class Image(models.Model):
+    PENDING = 'pending'
+    READY = 'ready'
+    FAILED = 'failed'
+    STATUS_CHOICES = ((PENDING, 'Pending'), (READY, 'Ready'), (FAILED, 'Failed'))
+
     image = models.ImageField(upload_to='images/', null=False, blank=False)
+    # uploaded images are staged and moved to storage by process_image job, image is empty until then
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=READY)
+    # filled by process_image job, variants are in format {width: {'webp': storage name, 'jpeg': storage name}}
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    blurhash = models.CharField(max_length=64, blank=True)
+    bytes = models.PositiveIntegerField(null=True, blank=True)
+    variants = models.JSONField(default=dict, blank=True)
 
     class Meta:
         abstract = True
@@ -59,6 +237,60 @@ class ChannelImage(Image):
     channel = models.ForeignKey(Channel, on_delete=models.CASCADE, related_name="channel_image")
 
 
+class LikeQuerySet(models.QuerySet):
+    def toggle(self, user, post_id: int) -> bool:
+        """
+        Like post, or remove like when user already liked it. Insert relies on unique (user, post) constraint
+        instead of checking first, so concurrent toggles can not create duplicated likes
+        :return: True if post is liked after toggle
+        """
+        try:
+            with transaction.atomic():
+                self.create(user=user, post_id=post_id)
+            return True
+        except IntegrityError:
+            self.filter(user=user, post_id=post_id).delete()
+            return False
+
+
 class Like(models.Model):
     user = models.ForeignKey(User, null=False, blank=False, on_delete=models.CASCADE)
     post = models.ForeignKey(Post, null=False, blank=False, on_delete=models.CASCADE)
+
+    objects = LikeQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            # one like per user and post, also serves Like.objects.filter(user=..., post=...)
+            models.UniqueConstraint(fields=['user', 'post'], name='like_user_post_unique'),
+        ]
+
+
+class Job(models.Model):
+    """
+    Background job stored in database, claimed and run by run_jobs command
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = ((PENDING, 'Pending'), (RUNNING, 'Running'), (DONE, 'Done'), (FAILED, 'Failed'))
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # worker claims due jobs: filter by status, order by run_at
+            models.Index(fields=['status', 'run_at'], name='job_status_run_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
@@ -0,0 +1,124 @@
+import asyncio
+import json
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.module_loading import import_string
+
+
+class Subscription:
+    """
+    Messages of one topic received by one websocket connection, iterated inside event loop of connection
+    """
+
+    def __init__(self, broker, topic: str):
+        self.broker = broker
+        self.topic = topic
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+
+    def put(self, message: dict):
+        """
+        Called from any thread, views publish from worker threads of ASGI server
+        """
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, message)
+
+    async def get(self) -> dict:
+        return await self.queue.get()
+
+    async def close(self):
+        await self.broker.unsubscribe(self)
+
+
+class Broker:
+    """
+    Fan out of events from views to websocket connections, backend is chosen by REALTIME_BROKER setting
+    """
+
+    def publish(self, topic: str, message: dict):
+        raise NotImplementedError
+
+    async def subscribe(self, topic: str) -> Subscription:
+        raise NotImplementedError
+
+    async def unsubscribe(self, subscription: Subscription):
+        raise NotImplementedError
+
+
+class InMemoryBroker(Broker):
+    """
+    Delivers events only to connections of same process, for tests and single process deployments
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscriptions = defaultdict(set)
+
+    def publish(self, topic: str, message: dict):
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(topic, ()))
+        for subscription in subscriptions:
+            subscription.put(message)
+
+    async def subscribe(self, topic: str) -> Subscription:
+        subscription = Subscription(self, topic)
+        with self.lock:
+            self.subscriptions[topic].add(subscription)
+        return subscription
+
+    async def unsubscribe(self, subscription: Subscription):
+        with self.lock:
+            self.subscriptions[subscription.topic].discard(subscription)
+            if not self.subscriptions[subscription.topic]:
+                del self.subscriptions[subscription.topic]
+
+
+class RedisBroker(Broker):
+    """
+    Delivers events to connections of all processes through Redis pub/sub on REDIS_URL (requires redis>=4.2)
+    """
+
+    def __init__(self):
+        import redis
+        self.url = settings.REDIS_URL
+        self.client = redis.Redis.from_url(self.url)
+        self.readers = {}
+
+    def publish(self, topic: str, message: dict):
+        self.client.publish(topic, json.dumps(message, cls=DjangoJSONEncoder))
+
+    async def subscribe(self, topic: str) -> Subscription:
+        import redis.asyncio
+        subscription = Subscription(self, topic)
+        pubsub = redis.asyncio.Redis.from_url(self.url).pubsub()
+        await pubsub.subscribe(topic)
+        self.readers[subscription] = (pubsub, asyncio.create_task(self.read(pubsub, subscription)))
+        return subscription
+
+    async def read(self, pubsub, subscription: Subscription):
+        async for message in pubsub.listen():
+            if message['type'] == 'message':
+                subscription.queue.put_nowait(json.loads(message['data']))
+
+    async def unsubscribe(self, subscription: Subscription):
+        pubsub, reader = self.readers.pop(subscription)
+        reader.cancel()
+        await pubsub.unsubscribe(subscription.topic)
+        await pubsub.close()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker() -> Broker:
+    """
+    :return: broker of process, instance of class at REALTIME_BROKER import path
+    """
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = import_string(settings.REALTIME_BROKER)()
+        return _broker
@@ -0,0 +1,50 @@
+import logging
+
+from django.db import transaction
+
+from pigeon.realtime.broker import get_broker
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_TOPIC = 'feed:global'
+
+# fields of rows sent in events, enough for client to update feed without fetching it
+EVENT_FIELDS = {
+    'post': ('id', 'channel_id', 'author_id', 'title', 'body', 'created_at'),
+    'comment': ('id', 'post_id', 'parent_id', 'user_id', 'body', 'created_at'),
+    'like': ('post_id', 'user_id'),
+}
+
+
+def get_topic(channel_id) -> str:
+    """
+    :param channel_id: id of channel, None for global feed
+    """
+    return GLOBAL_TOPIC if channel_id is None else f'feed:channel:{channel_id}'
+
+
+def get_event_data(instance) -> dict:
+    """
+    :param instance: Post, Comment or Like object
+    """
+    return {field: getattr(instance, field) for field in EVENT_FIELDS[instance._meta.model_name]}
+
+
+def publish_event(channel_id, event_type: str, data: dict):
+    """
+    Publish event to subscribers of feed after commit, so clients never fetch rows which are not visible yet.
+    Write is already committed then, so unavailable broker is logged instead of failing request
+    :param channel_id: id of channel of post, None for global feed
+    :param event_type: name of event, e.g. 'post.created'
+    :param data: payload, serializable with DjangoJSONEncoder
+    """
+    message = {'type': event_type, 'data': data}
+    topic = get_topic(channel_id)
+
+    def publish():
+        try:
+            get_broker().publish(topic, message)
+        except Exception:
+            logger.exception('Event %s was not published to %s', event_type, topic)
+
+    transaction.on_commit(publish)
@@ -0,0 +1,131 @@
+import json
+from datetime import timedelta
+from unittest import mock
+
+from asgiref.sync import async_to_sync, sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from django.test import TransactionTestCase, override_settings
+from model_bakery import baker
+from rest_framework_simplejwt.tokens import AccessToken
+
+from pigeon.models import Like, Post
+from pigeon.realtime.websocket import feed_websocket, CLOSE_FORBIDDEN, CLOSE_UNAUTHORIZED
+
+
+@override_settings(REALTIME_ACCESS_CHECK_INTERVAL=0.1)
+class TestFeedWebsocket(TransactionTestCase):
+    def setUp(self) -> None:
+        self.user = baker.make('User')
+        self.channel = baker.make('pigeon.Channel', channel_access=[self.user, ])
+        self.token = str(AccessToken.for_user(self.user))
+
+    def connect(self, path: str, token: str = None) -> ApplicationCommunicator:
+        query_string = f'token={token if token is not None else self.token}'.encode()
+        return ApplicationCommunicator(feed_websocket, {'type': 'websocket', 'path': path,
+                                                        'query_string': query_string})
+
+    async def open(self, communicator: ApplicationCommunicator) -> dict:
+        await communicator.send_input({'type': 'websocket.connect'})
+        return await communicator.receive_output(timeout=1)
+
+    async def close(self, communicator: ApplicationCommunicator):
+        await communicator.send_input({'type': 'websocket.disconnect', 'code': 1000})
+        await communicator.wait(timeout=1)
+
+    @async_to_sync
+    async def test_should_push_post_created_in_channel(self):
+        # given
+        communicator = self.connect(f'/ws/channels/{self.channel.id}/')
+        accepted = await self.open(communicator)
+        # when
+        post = await sync_to_async(baker.make)('pigeon.Post', channel=self.channel, author=self.user)
+        message = json.loads((await communicator.receive_output(timeout=1))['text'])
+        await self.close(communicator)
+        # then
+        self.assertEqual(accepted['type'], 'websocket.accept')
+        self.assertEqual(message['type'], 'post.created')
+        self.assertEqual(message['data']['id'], post.id)
+        self.assertEqual(message['data']['channel_id'], self.channel.id)
+
+    @async_to_sync
+    async def test_should_push_comments_and_likes_of_global_posts(self):
+        # given
+        post = await sync_to_async(baker.make)('pigeon.Post')
+        communicator = self.connect('/ws/feed/')
+        await self.open(communicator)
+        # when
+        await sync_to_async(baker.make)('pigeon.Comment', post=post)
+        await sync_to_async(Like.objects.toggle)(self.user, post.id)
+        events = [json.loads((await communicator.receive_output(timeout=1))['text'])['type'] for _ in range(2)]
+        await self.close(communicator)
+        # then
+        self.assertEqual(events, ['comment.created', 'like.created'])
+
+    @async_to_sync
+    async def test_should_not_push_events_of_other_channels(self):
+        # given
+        other_channel = await sync_to_async(baker.make)('pigeon.Channel', channel_access=[self.user, ])
+        communicator = self.connect(f'/ws/channels/{self.channel.id}/')
+        await self.open(communicator)
+        # when
+        await sync_to_async(baker.make)('pigeon.Post', channel=other_channel)
+        # then
+        self.assertTrue(await communicator.receive_nothing(timeout=0.2))
+        await self.close(communicator)
+
+    @async_to_sync
+    async def test_should_reject_connection_without_valid_token(self):
+        # given
+        communicator = self.connect('/ws/feed/', token='invalid')
+        # when
+        message = await self.open(communicator)
+        # then
+        self.assertEqual(message, {'type': 'websocket.close', 'code': CLOSE_UNAUTHORIZED})
+
+    @async_to_sync
+    async def test_should_reject_connection_to_channel_without_access(self):
+        # given
+        channel = await sync_to_async(baker.make)('pigeon.Channel')
+        communicator = self.connect(f'/ws/channels/{channel.id}/')
+        # when
+        message = await self.open(communicator)
+        # then
+        self.assertEqual(message, {'type': 'websocket.close', 'code': CLOSE_FORBIDDEN})
+
+    @async_to_sync
+    async def test_should_close_connection_when_user_removed_from_channel(self):
+        # given
+        communicator = self.connect(f'/ws/channels/{self.channel.id}/')
+        await self.open(communicator)
+        # when
+        await sync_to_async(self.channel.channel_access.remove)(self.user)
+        message = await communicator.receive_output(timeout=1)
+        # then
+        self.assertEqual(message, {'type': 'websocket.close', 'code': CLOSE_FORBIDDEN})
+
+    @async_to_sync
+    async def test_should_close_connection_when_token_expires(self):
+        # given
+        token = AccessToken.for_user(self.user)
+        token.set_exp(lifetime=timedelta(seconds=1))
+        communicator = self.connect('/ws/feed/', token=str(token))
+        await self.open(communicator)
+        # when
+        message = await communicator.receive_output(timeout=3)
+        # then
+        self.assertEqual(message, {'type': 'websocket.close', 'code': CLOSE_UNAUTHORIZED})
+
+
+class TestPublishEvent(TransactionTestCase):
+    def test_should_keep_committed_post_when_broker_fails(self):
+        # given
+        channel = baker.make('pigeon.Channel')
+        broker = mock.Mock(**{'publish.side_effect': ConnectionError})
+        # when
+        with mock.patch('pigeon.realtime.events.get_broker', return_value=broker), \
+                self.assertLogs('pigeon.realtime.events', 'ERROR') as logs:
+            post = baker.make('pigeon.Post', channel=channel)
+        # then
+        broker.publish.assert_called_once()
+        self.assertTrue(Post.objects.filter(id=post.id).exists())
+        self.assertIn('post.created', logs.output[0])
@@ -0,0 +1,112 @@
+import asyncio
+import json
+import re
+from typing import Optional, Tuple
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+from pigeon.blog.channels.membership import ChannelMembership
+from pigeon.models import Channel
+from pigeon.realtime.broker import get_broker
+from pigeon.realtime.events import get_topic
+
+"""
+WebSocket endpoints streaming feed events, authenticated by access token in ?token= query param:
+/ws/feed/ for global feed, /ws/channels/<id>/ for feed of channel user has access to.
+Token and access are checked again every REALTIME_ACCESS_CHECK_INTERVAL seconds, connection of user
+who left channel or whose token expired is closed
+"""
+GLOBAL_FEED_PATH = re.compile(r'^/ws/feed/?$')
+CHANNEL_FEED_PATH = re.compile(r'^/ws/channels/(?P<channel_id>\d+)/?$')
+
+CLOSE_UNAUTHORIZED = 4401
+CLOSE_FORBIDDEN = 4403
+CLOSE_NOT_FOUND = 4404
+
+
+def authenticate(query_string: bytes):
+    """
+    :return: user of valid access token from query string, None when token is missing or invalid
+    """
+    tokens = parse_qs(query_string.decode()).get('token')
+    if not tokens:
+        return None
+    authentication = JWTAuthentication()
+    try:
+        return authentication.get_user(authentication.get_validated_token(tokens[0]))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+def resolve_topic(scope: dict) -> Tuple[Optional[str], Optional[int]]:
+    """
+    Authenticate connection and check access to requested feed, same rules as posts endpoint
+    :return: tuple in format (topic, None) when connection is allowed, (None, close code) otherwise
+    """
+    close_old_connections()
+    try:
+        global_match = GLOBAL_FEED_PATH.match(scope['path'])
+        channel_match = CHANNEL_FEED_PATH.match(scope['path'])
+        if not global_match and not channel_match:
+            return None, CLOSE_NOT_FOUND
+        user = authenticate(scope.get('query_string', b''))
+        if user is None:
+            return None, CLOSE_UNAUTHORIZED
+        if global_match:
+            return get_topic(None), None
+        channel_id = int(channel_match.group('channel_id'))
+        channel = Channel.objects.filter(id=channel_id).values('owner_id').first()
+        if channel is None:
+            return None, CLOSE_NOT_FOUND
+        if user.id != channel['owner_id'] and not ChannelMembership.is_member(user, channel_id):
+            return None, CLOSE_FORBIDDEN
+        return get_topic(channel_id), None
+    finally:
+        close_old_connections()
+
+
+async def feed_websocket(scope: dict, receive, send):
+    """
+    ASGI application for websocket scope, sends every event of feed as JSON text message until client disconnects
+    or loses access to feed
+    """
+    message = await receive()
+    if message['type'] != 'websocket.connect':
+        return
+    topic, close_code = await sync_to_async(resolve_topic)(scope)
+    if topic is None:
+        await send({'type': 'websocket.close', 'code': close_code})
+        return
+    subscription = await get_broker().subscribe(topic)
+    await send({'type': 'websocket.accept'})
+    receiving = asyncio.ensure_future(receive())
+    getting = asyncio.ensure_future(subscription.get())
+    checking = asyncio.ensure_future(asyncio.sleep(settings.REALTIME_ACCESS_CHECK_INTERVAL))
+    try:
+        while True:
+            done, _ = await asyncio.wait({receiving, getting, checking}, return_when=asyncio.FIRST_COMPLETED)
+            if getting in done:
+                await send({'type': 'websocket.send', 'text': json.dumps(getting.result(), cls=DjangoJSONEncoder)})
+                getting = asyncio.ensure_future(subscription.get())
+            if receiving in done:
+                if receiving.result()['type'] == 'websocket.disconnect':
+                    break
+                # messages from client are ignored, stream is one way
+                receiving = asyncio.ensure_future(receive())
+            if checking in done:
+                topic, close_code = await sync_to_async(resolve_topic)(scope)
+                if topic is None:
+                    await send({'type': 'websocket.close', 'code': close_code})
+                    break
+                checking = asyncio.ensure_future(asyncio.sleep(settings.REALTIME_ACCESS_CHECK_INTERVAL))
+    finally:
+        receiving.cancel()
+        getting.cancel()
+        checking.cancel()
+        await subscription.close()
@@ -0,0 +1,258 @@
+from contextvars import ContextVar
+
+from django.contrib.auth.models import User
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete, m2m_changed, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from pigeon.blog.channels.membership import ChannelMembership
+from pigeon.blog.utils.conditional import FeedVersion
+from pigeon.models import Channel, Post, Comment, Like, Tag, PostImage, ChannelImage
+from pigeon.realtime.events import get_event_data, publish_event
+
+"""
+Receivers keeping denormalized counters of posts, comments and channels in sync with rows,
+every counter is changed with single UPDATE using F() expression, so concurrent writes do not lose updates.
+Links created in bulk by TagUtils do not send signals and update usage count of tags by themselves.
+Receivers at the bottom invalidate cached channel membership of users, bump versions of feeds
+and publish realtime events of posts, comments and likes
+"""
+
+# ids of posts being deleted, comments and likes deleted by their cascade skip counters and events of post
+deleted_post_ids: ContextVar[frozenset] = ContextVar('deleted_post_ids', default=frozenset())
+
+
+@receiver(post_save, sender=Comment)
+def increment_comments_count(sender, instance: Comment, created: bool, **kwargs):
+    if created:
+        Post.objects.filter(id=instance.post_id).update(comments_count=F('comments_count') + 1)
+        if instance.parent_id is not None:
+            Comment.objects.filter(id__in=instance.get_ancestor_ids()).update(replies_count=F('replies_count') + 1)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comments_count(sender, instance: Comment, **kwargs):
+    if instance.post_id in deleted_post_ids.get():
+        return
+    Post.objects.filter(id=instance.post_id).update(comments_count=F('comments_count') - 1)
+    if instance.parent_id is not None:
+        Comment.objects.filter(id__in=instance.get_ancestor_ids()).update(replies_count=F('replies_count') - 1)
+
+
+@receiver(post_save, sender=Like)
+def increment_likes_count(sender, instance: Like, created: bool, **kwargs):
+    if created:
+        Post.objects.filter(id=instance.post_id).update(likes_count=F('likes_count') + 1)
+
+
+@receiver(post_delete, sender=Like)
+def decrement_likes_count(sender, instance: Like, **kwargs):
+    if instance.post_id in deleted_post_ids.get():
+        return
+    Post.objects.filter(id=instance.post_id).update(likes_count=F('likes_count') - 1)
+
+
+@receiver(post_save, sender=Post)
+def increment_posts_count(sender, instance: Post, created: bool, **kwargs):
+    if created and instance.channel_id is not None:
+        Channel.objects.filter(id=instance.channel_id).update(posts_count=F('posts_count') + 1)
+
+
+@receiver(post_delete, sender=Post)
+def decrement_posts_count(sender, instance: Post, **kwargs):
+    if instance.channel_id is not None:
+        Channel.objects.filter(id=instance.channel_id).update(posts_count=F('posts_count') - 1)
+
+
+@receiver(pre_delete, sender=Post)
+def remember_deleted_post(sender, instance: Post, **kwargs):
+    """
+    pre_delete of all collected posts is sent before their comments and likes are deleted
+    """
+    deleted_post_ids.set(deleted_post_ids.get() | {instance.id})
+
+
+@receiver(post_delete, sender=Post)
+def forget_deleted_post(sender, instance: Post, **kwargs):
+    deleted_post_ids.set(deleted_post_ids.get() - {instance.id})
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous_channel(sender, instance: Post, update_fields=None, **kwargs):
+    """
+    Update can move post to other channel, channel post was loaded with is compared with new one,
+    post which was not loaded from database is looked up
+    """
+    if instance._state.adding or (update_fields is not None and 'channel' not in update_fields):
+        instance.previous_channel_id = instance.channel_id
+    elif hasattr(instance, 'saved_channel_id'):
+        instance.previous_channel_id = instance.saved_channel_id
+    else:
+        instance.previous_channel_id = Post.objects.filter(id=instance.id).values_list('channel_id', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+def move_posts_count(sender, instance: Post, created: bool, **kwargs):
+    if not created and instance.previous_channel_id != instance.channel_id:
+        if instance.previous_channel_id is not None:
+            Channel.objects.filter(id=instance.previous_channel_id).update(posts_count=F('posts_count') - 1)
+        if instance.channel_id is not None:
+            Channel.objects.filter(id=instance.channel_id).update(posts_count=F('posts_count') + 1)
+    instance.saved_channel_id = instance.channel_id
+
+
+@receiver(m2m_changed, sender=Channel.channel_access.through)
+def update_members_count(sender, instance, action: str, reverse: bool, pk_set: set, **kwargs):
+    """
+    Django sends only really added ids in pk_set on add, but all requested ids on remove,
+    so removed memberships are counted in pre_remove/pre_clear, in same transaction as delete of rows
+    """
+    if action == 'post_add' and pk_set and reverse:
+        Channel.objects.filter(id__in=pk_set).update(members_count=F('members_count') + 1)
+    elif action == 'post_add' and pk_set:
+        Channel.objects.filter(id=instance.id).update(members_count=F('members_count') + len(pk_set))
+    elif action in ('pre_remove', 'pre_clear'):
+        memberships = sender.objects.filter(user=instance.id) if reverse else sender.objects.filter(channel=instance.id)
+        if pk_set is not None:
+            memberships = memberships.filter(channel__in=pk_set) if reverse else memberships.filter(user__in=pk_set)
+        if reverse:
+            Channel.objects.filter(id__in=memberships.values('channel')).update(members_count=F('members_count') - 1)
+        else:
+            Channel.objects.filter(id=instance.id).update(members_count=F('members_count') - memberships.count())
+
+
+@receiver(pre_delete, sender=User)
+def remove_user_from_members_count(sender, instance: User, **kwargs):
+    """
+    Membership rows of deleted user are removed by cascade, which does not send m2m_changed
+    """
+    Channel.objects.filter(channel_access=instance).update(members_count=F('members_count') - 1)
+
+
+@receiver(m2m_changed, sender=Tag.post.through)
+@receiver(m2m_changed, sender=Tag.channel.through)
+def update_usage_count(sender, instance, action: str, reverse: bool, pk_set: set, **kwargs):
+    """
+    Same as members count, reverse side is post.tag_set/channel.tag_set where pk_set holds tags ids
+    """
+    if action == 'post_add' and pk_set and reverse:
+        Tag.objects.filter(id__in=pk_set).update(usage_count=F('usage_count') + 1)
+    elif action == 'post_add' and pk_set:
+        Tag.objects.filter(id=instance.id).update(usage_count=F('usage_count') + len(pk_set))
+    elif action in ('pre_remove', 'pre_clear'):
+        relation = 'post' if sender is Tag.post.through else 'channel'
+        links = sender.objects.filter(**{relation: instance.id}) if reverse else sender.objects.filter(tag=instance.id)
+        if pk_set is not None:
+            links = links.filter(tag__in=pk_set) if reverse else links.filter(**{f'{relation}__in': pk_set})
+        if reverse:
+            Tag.objects.filter(id__in=links.values('tag')).update(usage_count=F('usage_count') - 1)
+        else:
+            Tag.objects.filter(id=instance.id).update(usage_count=F('usage_count') - links.count())
+
+
+@receiver(pre_delete, sender=Post)
+@receiver(pre_delete, sender=Channel)
+def remove_tags_usage(sender, instance, **kwargs):
+    """
+    Tag links of deleted post or channel are removed by cascade, which does not send m2m_changed
+    """
+    Tag.objects.filter(**{sender.__name__.lower(): instance}).update(usage_count=F('usage_count') - 1)
+
+
+@receiver(m2m_changed, sender=Channel.channel_access.through)
+def invalidate_membership(sender, instance, action: str, reverse: bool, pk_set: set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if reverse:
+        ChannelMembership.invalidate([instance.id])
+    elif action == 'pre_clear':
+        ChannelMembership.invalidate(list(sender.objects.filter(channel=instance.id).values_list('user_id', flat=True)))
+    else:
+        ChannelMembership.invalidate(pk_set)
+
+
+@receiver(post_save, sender=Channel)
+def invalidate_owner_membership(sender, instance: Channel, created: bool, **kwargs):
+    if created and instance.owner_id is not None:
+        ChannelMembership.invalidate([instance.owner_id])
+
+
+@receiver(pre_delete, sender=Channel)
+def invalidate_members_membership(sender, instance: Channel, **kwargs):
+    """
+    Membership rows of deleted channel are removed by cascade, which does not send m2m_changed
+    """
+    members = Channel.channel_access.through.objects.filter(channel=instance.id)
+    ChannelMembership.invalidate(list(members.values_list('user_id', flat=True)))
+
+
+@receiver(pre_save, sender=Channel)
+def touch_channel(sender, instance: Channel, **kwargs):
+    instance.modified_at = timezone.now()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def notify_post_feed(sender, instance: Post, signal, created: bool = False, **kwargs):
+    # post moved by update leaves feed of previous channel
+    previous_channel_id = instance.previous_channel_id if signal is post_save else instance.channel_id
+    FeedVersion.touch({instance.channel_id, previous_channel_id})
+    action = 'deleted' if signal is post_delete else 'created' if created else 'updated'
+    publish_event(instance.channel_id, f'post.{action}', get_event_data(instance))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=Like)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=Like)
+def notify_commented_or_liked_post_feed(sender, instance, signal, created: bool = True, **kwargs):
+    """
+    Feeds show comments and likes counts of posts, comment edits do not change feed.
+    Deleted post notifies feed once by itself instead of once per its comment and like
+    """
+    if not created or instance.post_id in deleted_post_ids.get():
+        return
+    channel_ids = list(Post.objects.filter(id=instance.post_id).values_list('channel_id', flat=True))
+    if not channel_ids:
+        return
+    FeedVersion.touch(channel_ids)
+    action = 'deleted' if signal is post_delete else 'created'
+    publish_event(channel_ids[0], f'{sender._meta.model_name}.{action}', get_event_data(instance))
+
+
+@receiver(m2m_changed, sender=Channel.channel_access.through)
+def touch_members_channel(sender, instance, action: str, reverse: bool, pk_set: set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        FeedVersion.touch([instance.id])
+    elif pk_set:
+        FeedVersion.touch(pk_set)
+
+
+@receiver(m2m_changed, sender=Tag.post.through)
+def touch_tagged_posts_feed(sender, instance, action: str, reverse: bool, pk_set: set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if reverse:
+        FeedVersion.touch([instance.channel_id])
+    elif action == 'pre_clear':
+        FeedVersion.touch(Post.objects.filter(tag=instance).values_list('channel_id', flat=True).distinct())
+    elif pk_set:
+        FeedVersion.touch(Post.objects.filter(id__in=pk_set).values_list('channel_id', flat=True).distinct())
+
+
+@receiver(post_save, sender=PostImage)
+@receiver(post_delete, sender=PostImage)
+def touch_post_image_feed(sender, instance: PostImage, **kwargs):
+    """
+    Images become visible in feed when process_image job finishes, long after post was saved
+    """
+    FeedVersion.touch(Post.objects.filter(id=instance.post_id).values_list('channel_id', flat=True))
+
+
+@receiver(post_save, sender=ChannelImage)
+@receiver(post_delete, sender=ChannelImage)
+def touch_channel_image_channel(sender, instance: ChannelImage, **kwargs):
+    FeedVersion.touch([instance.channel_id])
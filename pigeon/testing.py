@@ -0,0 +1,44 @@
+import functools
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+"""
+Helpers of tests holding code to constant number of queries
+"""
+
+
+def format_queries(queries: list) -> str:
+    return '\n'.join(f'{i}. {query["sql"]}' for i, query in enumerate(queries, start=1))
+
+
+@contextmanager
+def query_budget(budget: int, label: str = 'Block', using: str = DEFAULT_DB_ALIAS):
+    """
+    Fail when block runs more than budget queries, failure lists all queries of block
+    :param budget: allowed number of queries
+    :param label: name of measured code in failure message, e.g. endpoint
+    :return: CaptureQueriesContext with captured queries
+    """
+    with CaptureQueriesContext(connections[using]) as context:
+        yield context
+    if len(context) > budget:
+        raise AssertionError(f'{label} ran {len(context)} queries, budget is {budget}:\n'
+                             f'{format_queries(context.captured_queries)}')
+
+
+def within_query_budget(budget: int, using: str = DEFAULT_DB_ALIAS):
+    """
+    Decorator of test method failing when whole test runs more than budget queries
+    """
+
+    def decorator(test):
+        @functools.wraps(test)
+        def wrapper(self, *args, **kwargs):
+            with query_budget(budget, label=test.__name__, using=using):
+                return test(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -1,8 +1,195 @@
+from io import StringIO
+from urllib.parse import urlencode
+
 from django.contrib.auth.models import User
-from django.test import TestCase
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import URLResolver, get_resolver
+from model_bakery import baker
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from pigeon.models import Channel, Comment, Post, Tag
+from pigeon.testing import query_budget, within_query_budget
+
+
+class TestRebuildCountersCommand(TestCase):
+    def test_should_fix_drifted_counters(self):
+        # given
+        members = baker.make('User', _quantity=2)
+        channel = baker.make('pigeon.Channel', channel_access=members)
+        post = baker.make('pigeon.Post', channel=channel)
+        comments = baker.make('pigeon.Comment', post=post, _quantity=2)
+        baker.make('pigeon.Comment', post=post, parent=comments[0])
+        baker.make('pigeon.Like', post=post, user=members[0])
+        tag = baker.make('pigeon.Tag', post=[post], channel=[channel])
+        Post.objects.update(comments_count=10, likes_count=10)
+        Channel.objects.update(members_count=10, posts_count=10)
+        Tag.objects.update(usage_count=10)
+        Comment.objects.update(replies_count=10)
+        # when
+        call_command('rebuild_counters', stdout=StringIO())
+        post.refresh_from_db()
+        channel.refresh_from_db()
+        tag.refresh_from_db()
+        # then
+        self.assertEqual(post.comments_count, 3)
+        self.assertEqual(post.likes_count, 1)
+        self.assertEqual(channel.members_count, 2)
+        self.assertEqual(channel.posts_count, 1)
+        self.assertEqual(tag.usage_count, 2)
+        self.assertEqual(list(Comment.objects.order_by('id').values_list('replies_count', flat=True)), [1, 0, 0])
+
+
+class TestQueryBudget(TestCase):
+    def test_should_print_queries_when_budget_exceeded(self):
+        # when
+        with self.assertRaises(AssertionError) as raised:
+            with query_budget(1, label='Two counts'):
+                Post.objects.count()
+                Channel.objects.count()
+        # then
+        self.assertIn('Two counts ran 2 queries, budget is 1', str(raised.exception))
+        self.assertIn('2. SELECT COUNT(*) AS "__count" FROM "pigeon_channel"', str(raised.exception))
+
+    @within_query_budget(1)
+    def test_should_pass_within_budget(self):
+        # then
+        self.assertEqual(Post.objects.count(), 0)
+
+
+class Endpoint:
+    """
+    Request of query budget suite, callables get test case with fixtures and, if paginated, page size
+    """
+
+    def __init__(self, name: str, method: str, budget: int, label: str = '', args=None, params=None, data=None,
+                 page_sizes=(None,), user: str = 'user', settings: dict = None):
+        self.name = name
+        self.method = method
+        self.budget = budget
+        self.label = f'{method} {name}{label}'
+        self.args = args or (lambda case: [])
+        self.params = params or (lambda case, size: {})
+        self.data = data or (lambda case, size: None)
+        self.page_sizes = page_sizes
+        self.user = user
+        self.settings = settings or {}
+
+
+# Most queries every endpoint may run, at smallest and largest page size, so cost does not grow with page.
+# Every url of pigeon/urls.py has to be listed, new endpoint fails test_should_declare_budget_of_every_endpoint
+QUERY_BUDGETS = [
+    Endpoint('register', 'post', 11, user='',
+             data=lambda case, size: {'username': 'new', 'email': 'new@pigeon.app', 'password': 'password'}),
+    Endpoint('login', 'post', 8, user='',
+             data=lambda case, size: {'username': case.user.username, 'password': 'password'}),
+    Endpoint('toke_refresh', 'post', 7, user='',
+             data=lambda case, size: {'refresh': str(RefreshToken.for_user(case.user))}),
+    Endpoint('email-verify', 'get', 8, user='',
+             params=lambda case, size: {'token': str(RefreshToken.for_user(case.user).access_token)}),
+    Endpoint('posts-list', 'get', 5, label=' global', page_sizes=(1, 24),
+             params=lambda case, size: {'post_size': size}),
+    Endpoint('posts-list', 'get', 5, label=' channel', page_sizes=(1, 24),
+             params=lambda case, size: {'channel': case.channel.id, 'post_size': size}),
+    Endpoint('posts-list', 'post', 17, params=lambda case, size: {'channel': case.channel.id},
+             data=lambda case, size: {'title': 'title', 'body': 'body', 'tags': [{'name': 'new'}, {'name': 'tag_0'}]}),
+    Endpoint('posts-bulk', 'post', 13, page_sizes=(1, 100), params=lambda case, size: {'channel': case.channel.id},
+             data=lambda case, size: {
+                 'posts': [{'title': 'title', 'body': 'body', 'tags': [{'name': 'tag_0'}]}] * size}),
+    Endpoint('posts-cache-stats', 'get', 0, user='admin'),
+    Endpoint('posts-detail', 'get', 4, args=lambda case: [case.posts[0].id],
+             params=lambda case, size: {'channel': case.channel.id}),
+    Endpoint('posts-detail', 'put', 17, args=lambda case: [case.posts[0].id],
+             params=lambda case, size: {'channel': case.channel.id},
+             data=lambda case, size: {'title': 'title', 'body': 'body', 'tags': [{'name': 'tag_1'}]}),
+    Endpoint('posts-detail', 'delete', 17, args=lambda case: [case.posts[29].id],
+             params=lambda case, size: {'channel': case.channel.id}),
+    Endpoint('posts-like', 'post', 9, args=lambda case: [case.posts[0].id]),
+    Endpoint('post-comments-list', 'get', 4, page_sizes=(1, 20), args=lambda case: [case.posts[0].id],
+             params=lambda case, size: {'comment_size': size}),
+    Endpoint('post-comments-list', 'post', 7, args=lambda case: [case.posts[0].id],
+             data=lambda case, size: {'body': 'body'}),
+    Endpoint('post-comments-detail', 'get', 3, args=lambda case: [case.posts[0].id, case.comments[0].id]),
+    Endpoint('post-comments-detail', 'delete', 9, args=lambda case: [case.posts[0].id, case.comments[-1].id]),
+    Endpoint('channels-list', 'get', 4, page_sizes=(1, 12), params=lambda case, size: {'channel_size': size}),
+    Endpoint('channels-list', 'post', 16,
+             data=lambda case, size: {'name': 'new', 'is_private': False, 'tags': [{'name': 'tag_0'}]}),
+    Endpoint('channels-detail', 'get', 4, args=lambda case: [case.channel.id]),
+    Endpoint('channels-detail', 'delete', 10, args=lambda case: [case.channels[-1].id]),
+    Endpoint('channels-authenticate', 'post', 8, args=lambda case: [case.channels[0].id]),
+    Endpoint('channels-unauthenticate', 'post', 8, args=lambda case: [case.channel.id]),
+    Endpoint('channels-password', 'get', 2, args=lambda case: [case.channel.id]),
+    Endpoint('search', 'get', 7, page_sizes=(1, 50), params=lambda case, size: {'q': 'title', 'limit': size}),
+    Endpoint('tags-popular', 'get', 1, page_sizes=(1, 50), params=lambda case, size: {'limit': size}),
+    Endpoint('timeline', 'get', 6, page_sizes=(1, 24), params=lambda case, size: {'post_size': size}),
+    Endpoint('metrics', 'get', 0, settings={'METRICS_ENABLED': True}),
+]
+
 
-# Create your tests here.
+class TestQueryBudgets(APITestCase):
+    """
+    Every endpoint at smallest and largest page size stays within its budget from QUERY_BUDGETS,
+    failure prints SQL of offending request
+    """
 
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='budget', email='budget@pigeon.app', password='password')
+        cls.admin = baker.make('User', is_staff=True)
+        members = baker.make('User', _quantity=5)
+        tags = [baker.make('pigeon.Tag', name=f'tag_{i}') for i in range(3)]
+        cls.channel = baker.make('pigeon.Channel', owner=cls.user, channel_access=[cls.user, *members], tag_set=tags,
+                                 is_private=False)
+        baker.make('pigeon.ChannelImage', channel=cls.channel, image='images/channel.jpeg')
+        cls.channels = baker.make('pigeon.Channel', owner=cls.user, channel_access=members, tag_set=tags,
+                                  is_private=False, _quantity=14)
+        cls.posts = []
+        for channel in (cls.channel, None):
+            posts = baker.make('pigeon.Post', title='title', author=cls.user, channel=channel, tag_set=tags,
+                               _quantity=30)
+            for post in posts:
+                baker.make('pigeon.PostImage', post=post, image='images/post.jpeg')
+            cls.posts += posts
+        commenters = [cls.user, *members]
+        cls.comments = [baker.make('pigeon.Comment', post=cls.posts[0], user=commenters[i % len(commenters)])
+                        for i in range(25)]
+        for member in members:
+            baker.make('pigeon.Like', post=cls.posts[0], user=member)
 
+    def request(self, endpoint: Endpoint, size):
+        user = getattr(self, endpoint.user, None) if endpoint.user else None
+        self.client.force_authenticate(user)
+        url = reverse(endpoint.name, args=endpoint.args(self))
+        params = {key: value for key, value in endpoint.params(self, size).items() if value is not None}
+        if params:
+            url = f'{url}?{urlencode(params)}'
+        data = endpoint.data(self, size)
+        return getattr(self.client, endpoint.method)(url, data=data, format='json' if data is not None else None)
 
+    def test_should_stay_within_query_budget(self):
+        for endpoint in QUERY_BUDGETS:
+            for size in endpoint.page_sizes:
+                with self.subTest(endpoint=endpoint.label, size=size), override_settings(**endpoint.settings), \
+                        transaction.atomic():
+                    with query_budget(endpoint.budget, label=f'{endpoint.label} at page size {size}'):
+                        response = self.request(endpoint, size)
+                    self.assertLess(response.status_code, 400, f'{endpoint.label}: {response.content[:500]}')
+                    transaction.set_rollback(True)
 
+    def test_should_declare_budget_of_every_endpoint(self):
+        # given
+        declared = {endpoint.name for endpoint in QUERY_BUDGETS}
+        # when
+        names = set()
+        patterns = list(get_resolver('pigeon.urls').url_patterns)
+        while patterns:
+            pattern = patterns.pop()
+            if isinstance(pattern, URLResolver):
+                patterns += pattern.url_patterns
+            else:
+                names.add(pattern.name)
+        # then
+        self.assertEqual(names - declared, set())
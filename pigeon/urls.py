@@ -1,5 +1,7 @@
 from django.urls import path, include
 
+from pigeon.instrumentation.metrics import metrics_view
+
 """
 Urls for pigeon app
 """
@@ -7,4 +9,8 @@ urlpatterns = [
     path('auth/', include('pigeon.auth.urls')),
     path('posts/', include('pigeon.blog.posts.urls')),
     path('channels/', include('pigeon.blog.channels.urls')),
+    path('search/', include('pigeon.blog.search.urls')),
+    path('tags/', include('pigeon.blog.tags.urls')),
+    path('timeline/', include('pigeon.blog.timeline.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]
@@ -2,6 +2,7 @@
 ASGI config for pigeon_app project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP is served by Django, websocket connections by realtime feed of pigeon app.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
@@ -13,4 +14,12 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pigeon_app.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from pigeon.realtime.websocket import feed_websocket  # noqa: E402 apps have to be loaded first
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'websocket':
+        return await feed_websocket(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -1,8 +1,10 @@
 import os
 import sys
+import tempfile
 from pathlib import Path
 
 import cloudinary
+from django.core.exceptions import ImproperlyConfigured
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -34,6 +36,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'pigeon.instrumentation.middleware.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -66,23 +69,142 @@ TEMPLATES = [
 WSGI_APPLICATION = 'pigeon_app.wsgi.application'
 
 # DB CONFIG
+# DB_CONNECTION_MODE:
+# direct: new connection for every request
+# persistent: thread keeps its connection for DB_CONN_MAX_AGE seconds
+# pool: threads of process share at most DB_POOL_MAX_SIZE connections, returned to pool after every request
+# pgbouncer: persistent connections to pgbouncer in transaction pooling mode, server side cursors are off
+#   and database has to use UTC time zone, so connections carry no session state
+# reused connections are checked with SELECT 1 before first query of request unless DB_CONN_HEALTH_CHECKS=False
+DB_CONNECTION_MODES = ('direct', 'persistent', 'pool', 'pgbouncer')
+DB_CONNECTION_MODE = os.environ.get('DB_CONNECTION_MODE', 'persistent')
+if DB_CONNECTION_MODE not in DB_CONNECTION_MODES:
+    raise ImproperlyConfigured(f'DB_CONNECTION_MODE has to be one of {DB_CONNECTION_MODES}, got {DB_CONNECTION_MODE}')
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql_psycopg2',
+        'ENGINE': 'pigeon.db.postgresql',
         'NAME': os.environ.get('DB_NAME', ''),
         'USER': os.environ.get('DB_USERNAME', ''),
         'PASSWORD': os.environ.get('DB_PASSWORD', ''),
         'HOST': os.environ.get('DB_HOST', ''),
+        'PORT': os.environ.get('DB_PORT', ''),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 600))
+        if DB_CONNECTION_MODE in ('persistent', 'pgbouncer') else 0,
+        'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
+        'DISABLE_SERVER_SIDE_CURSORS': DB_CONNECTION_MODE == 'pgbouncer',
+        'POOL': {
+            'MAX_SIZE': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            'TIMEOUT': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        } if DB_CONNECTION_MODE == 'pool' else None,
     }
 }
+# Heroku Postgres passes credentials in DATABASE_URL (requires dj-database-url), connection mode still applies
+DATABASE_URL = os.environ.get('DATABASE_URL')
+if DATABASE_URL:
+    import dj_database_url
+
+    url_config = dj_database_url.parse(DATABASE_URL, ssl_require=True)
+    DATABASES['default'].update({key: value for key, value in url_config.items()
+                                 if key in ('NAME', 'USER', 'PASSWORD', 'HOST', 'PORT', 'OPTIONS')})
+
+# CACHE CONFIG
+# local memory by default, Redis-compatible server when REDIS_URL is set (requires django-redis)
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+# membership guards private channels, invalidation has to reach every worker, so it is cached only in shared cache
+CHANNEL_MEMBERSHIP_CACHE_TIMEOUT = int(os.environ.get('CHANNEL_MEMBERSHIP_CACHE_TIMEOUT', 60 * 60)) if REDIS_URL else 0
+GLOBAL_FEED_CACHE_TIMEOUT = int(os.environ.get('GLOBAL_FEED_CACHE_TIMEOUT', 60))
+
+# ASYNC CONFIG
+# SERVER_MODE=asgi runs gunicorn with uvicorn workers (see gunicorn.conf.py) and serves read views from thread pool
+SERVER_MODE = os.environ.get('SERVER_MODE', 'wsgi')
+ASYNC_READ_VIEWS = SERVER_MODE == 'asgi'
+ASYNC_VIEW_THREADS = int(os.environ.get('ASYNC_VIEW_THREADS', 16))
+
+# JOBS CONFIG
+# jobs are stored in database and run by run_jobs command, JOBS_EAGER runs them in process instead
+JOBS_EAGER = os.environ.get('JOBS_EAGER', 'False') == 'True'
+JOBS_RETRY_BASE_DELAY = int(os.environ.get('JOBS_RETRY_BASE_DELAY', 10))
+JOBS_RETRY_MAX_DELAY = int(os.environ.get('JOBS_RETRY_MAX_DELAY', 60 * 60))
+JOBS_LOCK_TIMEOUT = int(os.environ.get('JOBS_LOCK_TIMEOUT', 10 * 60))
+
+# IMAGE PIPELINE CONFIG
+# uploaded images are limited to IMAGE_MAX_WIDTH and get WebP and JPEG variants of narrower widths
+IMAGE_MAX_WIDTH = 2048
+IMAGE_VARIANT_WIDTHS = (320, 640, 1280)
+IMAGE_QUALITY = 80
+# uploads of posts and channels are streamed to disk and rejected when exceeding limits
+IMAGE_UPLOAD_MAX_COUNT = int(os.environ.get('IMAGE_UPLOAD_MAX_COUNT', 10))
+IMAGE_UPLOAD_MAX_FILE_SIZE = int(os.environ.get('IMAGE_UPLOAD_MAX_FILE_SIZE', 10 * 1024 * 1024))
+IMAGE_UPLOAD_MAX_REQUEST_SIZE = int(os.environ.get('IMAGE_UPLOAD_MAX_REQUEST_SIZE', 40 * 1024 * 1024))
+
+# BULK IMPORT CONFIG
+# POST /posts/bulk/ accepts at most POSTS_BULK_MAX_SIZE posts, inserted in batches of POSTS_BULK_BATCH_SIZE rows
+POSTS_BULK_MAX_SIZE = int(os.environ.get('POSTS_BULK_MAX_SIZE', 5000))
+POSTS_BULK_BATCH_SIZE = int(os.environ.get('POSTS_BULK_BATCH_SIZE', 500))
+
+# COMMENTS CONFIG
+# threads show replies COMMENTS_REPLY_DEPTH levels below comment unless client asks for ?depth=,
+# replies can be nested at most COMMENTS_MAX_DEPTH levels (bounded by length of materialized path)
+COMMENTS_REPLY_DEPTH = int(os.environ.get('COMMENTS_REPLY_DEPTH', 2))
+COMMENTS_MAX_DEPTH = int(os.environ.get('COMMENTS_MAX_DEPTH', 20))
+# path of comment has at most 255 characters (Comment.path), each level takes 10 digits of id and '/'
+COMMENTS_MAX_DEPTH_LIMIT = 255 // 11
+if not 0 <= COMMENTS_MAX_DEPTH <= COMMENTS_MAX_DEPTH_LIMIT:
+    raise ImproperlyConfigured(f'COMMENTS_MAX_DEPTH has to be between 0 and {COMMENTS_MAX_DEPTH_LIMIT}, '
+                               f'got {COMMENTS_MAX_DEPTH}')
+
+# INSTRUMENTATION CONFIG
+# Server-Timing header with database, serializer, storage and total time of request
+SERVER_TIMING_ENABLED = os.environ.get('SERVER_TIMING_ENABLED', str(DEBUG)) == 'True'
+# per route histograms at /metrics, with METRICS_TOKEN scraper has to send it
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'False') == 'True'
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+# workers add their observations to cache every METRICS_FLUSH_INTERVAL seconds, metrics of all workers
+# are aggregated only in shared cache (REDIS_URL)
+METRICS_FLUSH_INTERVAL = int(os.environ.get('METRICS_FLUSH_INTERVAL', 10))
+# share of requests profiled with cProfile, profiles of requests slower than threshold are saved to PROFILE_DIR
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+PROFILE_SLOW_REQUEST_MS = int(os.environ.get('PROFILE_SLOW_REQUEST_MS', 1000))
+PROFILE_DIR = os.environ.get('PROFILE_DIR', BASE_DIR / 'profiles')
+
+# REALTIME CONFIG
+# broker fanning out websocket events, in memory works only within single process (requires redis otherwise)
+REALTIME_BROKER = os.environ.get('REALTIME_BROKER', 'pigeon.realtime.broker.RedisBroker' if REDIS_URL
+                                 else 'pigeon.realtime.broker.InMemoryBroker')
+# open websockets re-check token and channel access every REALTIME_ACCESS_CHECK_INTERVAL seconds
+REALTIME_ACCESS_CHECK_INTERVAL = int(os.environ.get('REALTIME_ACCESS_CHECK_INTERVAL', 30))
 
 # TEST DB CONFIG
 if 'test' in sys.argv:
     DATABASES['default'] = {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': 'mydatabase'
+        'NAME': 'mydatabase',
+        # file database instead of shared in-memory one, so concurrency tests can write from many threads
+        'TEST': {'NAME': 'test_mydatabase'}
     }
+    # rolled back test data would leave stale entries in shared cache, tests needing cache override it
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+        }
+    }
+    REALTIME_BROKER = 'pigeon.realtime.broker.InMemoryBroker'
+    # jobs run in process, emails go to locmem outbox set up by test runner
+    JOBS_EAGER = True
 
 # PASSWORD VALIDATORS CONFIG
 
@@ -128,6 +250,11 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    # renderers record time of serializing response in request timings
+    'DEFAULT_RENDERER_CLASSES': [
+        'pigeon.instrumentation.renderers.TimedJSONRenderer',
+        'pigeon.instrumentation.renderers.TimedBrowsableAPIRenderer',
+    ],
     'TEST_REQUEST_DEFAULT_FORMAT': 'json'
 }
 
@@ -135,7 +262,8 @@ REST_FRAMEWORK = {
 if '/app' in os.environ.get('HOME', ''):
     import django_heroku
 
-    django_heroku.settings(locals())
+    # database is configured in DB CONFIG from DATABASE_URL
+    django_heroku.settings(locals(), databases=False)
 
 # CORS CONFIG
 CORS_ALLOW_CREDENTIALS = True
@@ -150,7 +278,16 @@ CORS_ORIGIN_REGEX_WHITELIST = [
 CLOUDINARY_STORAGE = {'CLOUD_NAME': os.environ.get('CLOUDINARY_NAME'),
                       'API_KEY': os.environ.get('CLOUDINARY_API_KEY'),
                       'API_SECRET': os.environ.get('CLOUDINARY_API_SECRET')}
-DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
+DEFAULT_FILE_STORAGE = 'pigeon.instrumentation.storage.TimedMediaCloudinaryStorage'
+# uploaded files wait for process_image job under staging/ prefix of storage reachable by web and worker dynos,
+# raw storage accepts files which turn out not to be images
+IMAGE_STAGING_STORAGE = os.environ.get('IMAGE_STAGING_STORAGE',
+                                       'pigeon.instrumentation.storage.TimedRawMediaCloudinaryStorage')
+if 'test' in sys.argv:
+    # uploads of tests go to temporary directory instead of Cloudinary
+    DEFAULT_FILE_STORAGE = 'django.core.files.storage.FileSystemStorage'
+    IMAGE_STAGING_STORAGE = 'django.core.files.storage.FileSystemStorage'
+    MEDIA_ROOT = tempfile.mkdtemp(prefix='pigeon_media_')
 
 # MAIL CONFIG
 EMAIL_USE_TLS = True
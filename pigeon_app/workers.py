@@ -0,0 +1,13 @@
+"""
+Gunicorn worker classes of pigeon_app project.
+"""
+
+from uvicorn.workers import UvicornWorker
+
+
+class AutoUvicornWorker(UvicornWorker):
+    """
+    Uvicorn worker using uvloop and httptools when they are installed, asyncio and h11 otherwise,
+    default worker fails to boot without them
+    """
+    CONFIG_KWARGS = {'loop': 'auto', 'http': 'auto'}